@@ -0,0 +1,199 @@
+# backfill.py
+"""
+Rebuild the multi-year event corpus in one command.
+
+Usage:
+    python backfill.py --from-year 2019 [--to-year 2024] [--workers 4] [--rate 2]
+
+Bulletins are discovered with bulletin_discovery, then each one is scraped by a
+process pool worker (fetch -> parse -> Event -> near duplicates -> tweet) into
+its own part file.
+Every worker sends its requests through a session tied to one shared
+RateLimiter, so the whole pool stays under --rate requests per second. Completed
+bulletins are checkpointed: an interrupted backfill resumes where it stopped, and
+once every bulletin is done each part file goes through finish_part, like a
+scraping run: it is archived, added to the query index (event_index) and the
+fine-tuning dataset (dataset_builder), and merged into
+events_output/events_with_tweets.<format>.
+
+Republished copies of an event (near_duplicates) are dropped before the tweet
+stage. Each worker keeps one detector for all its bulletins, seeded with every
+event of the query index; copies of each other that two workers scrape in the
+same backfill are only caught once the first one is merged, by the next run.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from bulletin_discovery import discover_bulletins, year_range
+from csv_output import Checkpoint, open_sink
+from http_session import RateLimiter, create_session, set_session
+from near_duplicates import DEFAULT_THRESHOLD
+from seen_events import SeenEventsIndex
+
+OUTPUT_DIR = "events_output"
+
+_worker_id = None
+_near_dups = None
+
+def _init_worker(rate_limiter: RateLimiter, worker_counter, near_duplicate_threshold: Optional[float] = None,
+                 event_index_path: Optional[str] = None):
+    """
+    Process pool initializer: number the worker, give it a rate-limited shared session
+    and the near-duplicate detector shared by its bulletins.
+    """
+    global _worker_id, _near_dups
+    from scraping_finetuning import near_duplicate_detector, setup_logging
+
+    setup_logging()
+    with worker_counter.get_lock():
+        worker_counter.value += 1
+        _worker_id = worker_counter.value
+    set_session(create_session(rate_limiter=rate_limiter))
+    # Every indexed event, not only recent ones: the backfill scrapes bulletins of past years
+    _near_dups = near_duplicate_detector(near_duplicate_threshold, event_index_path, window_days=None)
+
+def part_path(part_dir: str, bulletin: str, output_format: str) -> str:
+    """Part file of one bulletin, e.g. mail_repertorio_2024_41_index_html.part.csv."""
+    name = re.sub(r'[^0-9A-Za-z]+', '_', urlparse(bulletin).path.strip('/'))
+    return os.path.join(part_dir, f"{name}.part.{output_format}")
+
+def _backfill_bulletin(bulletin: str, part_dir: str, index_path: Optional[str], refresh_after: Optional[float],
+                       pack_size: int, output_format: str) -> Tuple[int, str, int]:
+    """Worker task: stream the events of one bulletin into its part file."""
+    from scraping_finetuning import FIELDNAMES, stream_event_links
+
+    logger = logging.getLogger(f"backfill.worker{_worker_id}")
+    part_file = part_path(part_dir, bulletin, output_format)
+    checkpoint = Checkpoint(part_file + ".checkpoint")
+    index = SeenEventsIndex(index_path) if index_path else None
+    try:
+        with open_sink(part_file, FIELDNAMES) as sink:
+            written = stream_event_links([bulletin], logger, sink, checkpoint=checkpoint, index=index,
+                                         refresh_after=refresh_after, pack_size=pack_size, near_dups=_near_dups)
+    finally:
+        checkpoint.close()
+        if index is not None:
+            index.close()
+    return _worker_id, bulletin, written
+
+def backfill(bulletins: List[str], workers: int = 4, rate: float = 2.0,
+             index_path: Optional[str] = os.path.join(OUTPUT_DIR, "seen_events.sqlite3"),
+             refresh_after: Optional[float] = None, pack_size: int = 1, output_format: str = "csv",
+             archive_dir: Optional[str] = os.path.join(OUTPUT_DIR, "archive"),
+             event_index_path: Optional[str] = os.path.join(OUTPUT_DIR, "events.sqlite3"),
+             dataset_dir: Optional[str] = os.path.join(OUTPUT_DIR, "dataset"),
+             near_duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD) -> int:
+    """
+    Scrape many bulletins in parallel and merge them into the events output.
+
+    Args:
+        bulletins (List[str]): Bulletin URLs, e.g. from bulletin_discovery.discover_bulletins
+        workers (int): Worker processes
+        rate (float): Requests per second across all workers
+        index_path (Optional[str]): SQLite seen-events index, None to reprocess everything
+        refresh_after (Optional[float]): Seconds during which a checked event is not re-fetched
+        pack_size (int): Events packed into each LLM request
+        output_format (str): "csv" or "jsonl"
+        archive_dir (Optional[str]): Directory of the per-run event archive, None to disable it
+        event_index_path (Optional[str]): SQLite query index of the events, None to disable it
+        dataset_dir (Optional[str]): Directory of the fine-tuning dataset, None to disable it
+        near_duplicate_threshold (Optional[float]): Near-duplicate threshold, None to tweet every copy
+
+    Returns:
+        int: New or modified events written
+    """
+    from scraping_finetuning import finish_part, setup_logging
+    from tweetllm import get_service
+
+    setup_logging()
+    get_service()  # Fail fast on missing credentials, before the workers fetch anything
+    logger = logging.getLogger("backfill")
+    part_dir = os.path.join(OUTPUT_DIR, "backfill")
+    os.makedirs(part_dir, exist_ok=True)
+    output_file = os.path.join(OUTPUT_DIR, f"events_with_tweets.{output_format}")
+
+    done = Checkpoint(os.path.join(part_dir, "bulletins.checkpoint"))
+    pending = [bulletin for bulletin in bulletins if bulletin not in done]
+    if len(done):
+        logger.info(f"Resuming backfill: {len(bulletins) - len(pending)} of {len(bulletins)} bulletins already done")
+
+    per_worker = Counter()
+    written = failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(RateLimiter(rate), multiprocessing.Value('i', 0),
+                                           near_duplicate_threshold, event_index_path)) as pool:
+            futures = {pool.submit(_backfill_bulletin, bulletin, part_dir, index_path, refresh_after,
+                                   pack_size, output_format): bulletin for bulletin in pending}
+            for n, future in enumerate(as_completed(futures), start=1):
+                try:
+                    worker, bulletin, count = future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Backfill of {futures[future]} failed: {e}")
+                    continue
+                done.mark(bulletin)
+                per_worker[worker] += 1
+                written += count
+                logger.info(f"[worker {worker}] {bulletin}: {count} events "
+                            f"({n}/{len(pending)} bulletins, worker total {per_worker[worker]})")
+
+        if failed:
+            logger.warning(f"{failed} bulletins failed; rerun to retry them before the output is merged")
+            return written
+
+        parts = [part_path(part_dir, bulletin, output_format) for bulletin in bulletins]
+        parts = [part for part in parts if os.path.exists(part)]
+        total = None
+        for part in parts:
+            total = finish_part(part, output_file, logger, archive_dir, event_index_path, dataset_dir)
+            if os.path.exists(part + ".checkpoint"):
+                os.remove(part + ".checkpoint")
+        done.clear()
+        logger.info(f"Backfill done: {written} new or modified events from {len(bulletins)} bulletins "
+                    f"saved to {output_file} ({total if total is not None else 'no new'} rows in total)")
+        return written
+    finally:
+        done.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--from-year', type=int, required=True, help='First bulletin year')
+    parser.add_argument('--to-year', type=int, help='Last bulletin year (default: current year)')
+    parser.add_argument('--first-issue', type=int, default=1, help='First issue number probed each year')
+    parser.add_argument('--max-issue', type=int, default=60, help='Last issue number probed each year')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes')
+    parser.add_argument('--rate', type=float, default=2.0, help='Requests per second across all workers')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format')
+    parser.add_argument('--pack-size', type=int, default=1, help='Events per LLM request')
+    parser.add_argument('--no-index', action='store_true', help='Reprocess events already in the seen-events index')
+    parser.add_argument('--near-duplicate-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Similarity from which events are near duplicates (default: NEAR_DUPLICATE_THRESHOLD or 0.8)')
+    parser.add_argument('--keep-near-duplicates', action='store_true', help='Tweet near-duplicate events too')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the discovered bulletins')
+    args = parser.parse_args()
+
+    from scraping_finetuning import setup_logging
+
+    logger = setup_logging()
+    set_session(create_session(rate_limiter=RateLimiter(args.rate)))
+    bulletins = discover_bulletins(year_range(args.from_year, args.to_year), args.first_issue, args.max_issue)
+    logger.info(f"Discovered {len(bulletins)} bulletins")
+    if args.dry_run:
+        print('\n'.join(bulletins))
+        return
+
+    index_path = None if args.no_index else os.path.join(OUTPUT_DIR, "seen_events.sqlite3")
+    backfill(bulletins, workers=args.workers, rate=args.rate, index_path=index_path,
+             pack_size=args.pack_size, output_format=args.format,
+             near_duplicate_threshold=None if args.keep_near_duplicates else args.near_duplicate_threshold)
+
+if __name__ == '__main__':
+    main()
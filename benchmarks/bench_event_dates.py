@@ -0,0 +1,81 @@
+# benchmarks/bench_event_dates.py
+"""
+Throughput of the date/time/location normalization over a large event archive.
+
+Usage:
+    python -m benchmarks.bench_event_dates [--archive DIR] [--events N]
+
+Without --archive a synthetic archive is generated with the spellings seen in
+the bulletins (single days and ranges, "De 17:00 a 19:00 h" and the extractor's
+"17:00 a 19:00", venue variants). Every record goes through event_datetimes and
+normalize_location three ways: with the caches cleared before each record
+(no memoization), a first pass from empty caches, and a second, warm pass.
+Reported: records/s of each and the hit rate of each cache.
+"""
+import argparse
+import random
+import time
+
+import event_dates
+from event_archive import EventArchive
+
+PARSERS = (event_dates.parse_event_dates, event_dates.parse_event_times,
+           event_dates.event_datetimes, event_dates.normalize_location)
+
+def synthetic_records(n_events, seed=0):
+    rng = random.Random(seed)
+    months = ['agosto', 'septiembre', 'octubre', 'noviembre']
+    weekdays = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+    dates = [f'{rng.choice(weekdays)} {day} de {month} de 2024' for month in months for day in range(1, 29)]
+    dates += [f'Del {day} al {day + 2} de {month} de 2024' for month in months for day in range(1, 26, 5)]
+    times = [f'{prefix}{h}:{m} a {h + 2}:{m}{suffix}' for h in range(8, 20) for m in ('00', '30')
+             for prefix, suffix in (('', ''), ('De ', ' h'))]
+    locations = ['Río Hondo', 'Campus Rio Hondo', 'ITAM Río Hondo', 'Santa Teresa', 'Zoom', 'Virtual',
+                 'Auditorio Raúl Baillères - Río Hondo'] + [f'Aula {i}, Río Hondo' for i in range(100, 140)]
+    for i in range(n_events):
+        yield {'date': rng.choice(dates), 'time': rng.choice(times), 'location': rng.choice(locations)}
+
+def _clear():
+    for parser in PARSERS:
+        parser.cache_clear()
+
+def _normalize(records, clear_each=False):
+    start = time.perf_counter()
+    for record in records:
+        if clear_each:
+            _clear()
+        event_dates.event_datetimes(record['date'], record['time'])
+        event_dates.normalize_location(record['location'])
+    return len(records) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--archive', help='Event archive directory (default: synthetic records)')
+    parser.add_argument('--events', type=int, default=200000, help='Synthetic records')
+    args = parser.parse_args()
+
+    if args.archive:
+        records = [{'date': r.get('date'), 'time': r.get('time'), 'location': r.get('location')}
+                   for r in EventArchive(args.archive).iter_records()]
+    else:
+        records = list(synthetic_records(args.events))
+    distinct = len({(r['date'], r['time']) for r in records}) + len({r['location'] for r in records})
+
+    uncached = _normalize(records[:min(len(records), 20000)], clear_each=True)
+    _clear()
+    cold = _normalize(records)
+    hit_rates = {}
+    for parser in PARSERS:
+        info = parser.cache_info()
+        hit_rates[parser.__name__] = round(info.hits / max(1, info.hits + info.misses), 4)
+    warm = _normalize(records)
+
+    print(f"{len(records)} records, {distinct} distinct date/time pairs and locations")
+    print(f"{'uncached':>10}: {uncached:12,.0f} records/s")
+    print(f"{'cold':>10}: {cold:12,.0f} records/s ({cold / uncached:.1f}x)")
+    print(f"{'warm':>10}: {warm:12,.0f} records/s ({warm / uncached:.1f}x)")
+    for name, rate in hit_rates.items():
+        print(f"{name:>20} hit rate {rate:.1%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_event_index.py
+"""
+Query latency of the event index on a large synthetic archive.
+
+Usage:
+    python -m benchmarks.bench_event_index [--events N] [--queries N]
+
+Builds an index of N events spread over ten years (bulletin-like dates, times,
+venues, speakers and descriptions) in a temporary file, then reports the median
+and p95 latency of URL lookups, duplicate detection, upcoming events at a venue
+and full-text searches. "search broad term" matches a tenth of the archive and
+has to rank every match, so it is the slow case by construction.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from event_index import EventIndex
+from metrics import percentile
+
+TOPICS = ['economía', 'política pública', 'matemáticas aplicadas', 'inteligencia artificial', 'derecho',
+          'relaciones internacionales', 'finanzas', 'filosofía', 'actuaría', 'ciencia de datos']
+VENUES = ['Río Hondo', 'Santa Teresa', 'Zoom', 'Auditorio Raúl Baillères - Río Hondo'] + \
+         [f'Aula {i}, Río Hondo' for i in range(100, 130)]
+
+DAYS = 3650
+SPEAKERS = 5000
+
+def speaker(n):
+    return f'Dra. Ponente{n} Apellido{n * 7 % SPEAKERS}'
+
+def synthetic_records(n_events, seed=0):
+    rng = random.Random(seed)
+    first_day = datetime(2016, 1, 1)
+    for i in range(n_events):
+        starts_at = first_day + timedelta(days=rng.randrange(DAYS), hours=rng.randrange(8, 20))
+        topic = rng.choice(TOPICS)
+        yield {
+            'event_url': f'https://eventos.itam.mx/es/evento/{i}',
+            'title': f'Conferencia {i}: {topic}',
+            'description': f'Conferencia sobre {topic} impartida por {speaker(rng.randrange(SPEAKERS))}, '
+                           f'con invitados de {rng.choice(TOPICS)}. Entrada libre.',
+            'location': rng.choice(VENUES),
+            'starts_at': starts_at,
+            'ends_at': starts_at + timedelta(hours=2),
+            'created_at': first_day,
+        }
+
+def _latencies_us(func, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings), percentile(timings, 95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory, EventIndex(os.path.join(directory, 'events.sqlite3')) as index:
+        start = time.perf_counter()
+        index.upsert(synthetic_records(args.events))
+        print(f"Indexed {index.count()} events in {time.perf_counter() - start:.1f} s")
+
+        urls = [(f'https://eventos.itam.mx/es/evento/{rng.randrange(args.events)}',) for _ in range(args.queries)]
+        days = [datetime(2016, 1, 1) + timedelta(days=rng.randrange(DAYS)) for _ in range(args.queries)]
+        cases = {
+            'get': (index.get, urls),
+            'find_duplicates': (index.find_duplicates, urls),
+            'upcoming 7 days at Río Hondo': (lambda now: index.upcoming(7, 'Río Hondo', now=now),
+                                             [(day,) for day in days]),
+            'search speaker': (index.search, [(f'Ponente{rng.randrange(SPEAKERS)}',) for _ in range(args.queries)]),
+            'search speaker within a year': (lambda text, day: index.query(text, day, day + timedelta(days=365)),
+                                             [(f'Ponente{rng.randrange(SPEAKERS)}', day) for day in days]),
+            'search broad term (top 20)': (index.search, [(rng.choice(TOPICS),) for _ in range(args.queries // 10)]),
+        }
+        for name, (func, args_list) in cases.items():
+            median, p95 = _latencies_us(func, args_list)
+            print(f"{name:>30}: median {median:8.1f} µs, p95 {p95:8.1f} µs")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_event_memory.py
+"""
+Memory footprint of loading a large event archive as Event objects.
+
+Usage:
+    python -m benchmarks.bench_event_memory [--events N] [--locations N]
+
+Builds a synthetic JSONL archive run (repeated locations, dates and times, as in
+the real bulletins), loads it once into the previous dict-based Event and once
+into the current slotted, interned Event, and reports the memory held by each
+list of events (tracemalloc) and the load time.
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from event_archive import EventArchive
+
+@dataclass
+class LegacyEvent:
+    """Reference copy of the original Event: plain dataclass, no slots, no interning."""
+    title: str
+    description: str
+    image_url: Optional[str]
+    event_url: str
+    date: str
+    time: str
+    location: str
+    created_at: datetime = datetime.now()
+
+def synthetic_records(n_events, n_locations, seed=0):
+    rng = random.Random(seed)
+    locations = [f'Río Hondo, Aula {i}' for i in range(n_locations)]
+    days = [datetime(2024, 8, 1) + timedelta(days=i) for i in range(120)]
+    times = ['9:00 a 11:00', '13:00 a 15:00', '17:00 a 19:00', '19:00 a 21:00']
+    months = ['agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+    created_at = datetime(2024, 11, 1)
+    for i in range(n_events):
+        day = rng.choice(days)
+        hours = rng.choice(times)
+        start, end = (int(part.split(':')[0]) for part in hours.split(' a '))
+        yield {
+            'event_url': f'https://eventos.itam.mx/es/evento/{i}',
+            'title': f'Conferencia {i}',
+            'description': f'Descripción del evento {i}.',
+            'image_url': None,
+            'date': f'{day.day} de {months[day.month - 8]} de {day.year}',
+            'time': hours,
+            'location': rng.choice(locations),
+            'starts_at': day.replace(hour=start),
+            'ends_at': day.replace(hour=end),
+            'created_at': created_at + timedelta(seconds=i),
+        }
+
+def measure(load):
+    """Return (events, bytes held after loading, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    events = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return events, current, elapsed
+
+def load_legacy(archive):
+    events = []
+    for record in archive.iter_records():
+        created_at = record['created_at']
+        events.append(LegacyEvent(record['title'], record['description'], record['image_url'], record['event_url'],
+                                  record['date'], record['time'], record['location'],
+                                  datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at))
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=100_000, help='Events in the archive')
+    parser.add_argument('--locations', type=int, default=40, help='Distinct locations')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = EventArchive(directory)
+        path = archive.append(synthetic_records(args.events, args.locations))
+        print(f"{args.events} events, {args.locations} locations, {os.path.getsize(path) / 2**20:.1f} MiB archive ({os.path.basename(path)})\n")
+        print(f"{'Event':<10}{'MiB held':>10}{'bytes/event':>13}{'load s':>9}")
+
+        results = {}
+        for name, load in (('legacy', lambda: load_legacy(archive)), ('slotted', lambda: list(archive.iter_events()))):
+            events, held, elapsed = measure(load)
+            results[name] = held
+            print(f"{name:<10}{held / 2**20:>10.1f}{held / len(events):>13.0f}{elapsed:>9.2f}")
+            del events
+        print(f"\n{1 - results['slotted'] / results['legacy']:.0%} less memory")
+
+if __name__ == '__main__':
+    main()
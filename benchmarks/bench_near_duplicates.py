@@ -0,0 +1,86 @@
+# benchmarks/bench_near_duplicates.py
+"""
+Candidate generation and accuracy of the MinHash/LSH near-duplicate detector.
+
+Usage:
+    python -m benchmarks.bench_near_duplicates [--events N] [--copies FRACTION] [--threshold 0.8]
+
+Generates N distinct synthetic events (bulletin-like titles and descriptions
+sharing the same boilerplate around random text) plus a fraction of republished
+copies with small edits: a changed date, a fixed typo, an added sentence. Every
+event goes through NearDuplicateDetector.check. Reported: events/s, the
+candidate pairs compared against all N(N-1)/2 pairs an exhaustive search would
+compare, and the recall and precision of the flagged copies.
+"""
+import argparse
+import random
+import time
+
+from near_duplicates import NearDuplicateDetector
+
+TOPICS = ['economía', 'política pública', 'matemáticas aplicadas', 'inteligencia artificial', 'derecho',
+          'relaciones internacionales', 'finanzas', 'filosofía', 'actuaría', 'ciencia de datos']
+EDITS = [
+    lambda text, rng: text.replace('2024', '2025'),
+    lambda text, rng: text.replace('conferencia', 'confernecia', 1),
+    lambda text, rng: text + ' Cupo limitado, se requiere registro previo.',
+    lambda text, rng: text.replace('Entrada libre.', 'Entrada libre para la comunidad ITAM.'),
+]
+
+SYLLABLES = ['ca', 'de', 'mi', 'pro', 'ta', 'cion', 'les', 'eco', 'no', 'mia', 'po', 'li', 'ti', 'ra', 'sis']
+WORDS = sorted({''.join(random.Random(n).choices(SYLLABLES, k=random.Random(-n).randint(2, 4))) for n in range(3000)})
+
+def synthetic_event(i, rng):
+    topic, guest = rng.choice(TOPICS), rng.choice(TOPICS)
+    title = f'{rng.choice(["Conferencia", "Seminario", "Mesa redonda"])}: {" ".join(rng.sample(WORDS, 3))}'
+    description = (f'El Departamento de {topic} invita a la conferencia de la Dra. Ponente{i} Apellido{i * 7}, '
+                   f'investigadora en {guest}, el {rng.randrange(1, 29)} de noviembre de 2024. '
+                   f'{" ".join(rng.choices(WORDS, k=rng.randint(25, 60)))}. Entrada libre.')
+    return title, description
+
+def synthetic_events(n_events, copy_fraction, seed=0):
+    """(key, title, description, key of the original or None) in arrival order."""
+    rng = random.Random(seed)
+    originals = []
+    for i in range(n_events):
+        title, description = synthetic_event(i, rng)
+        originals.append((f'https://eventos.itam.mx/es/evento/{i}', title, description, None))
+    copies = []
+    for j, (key, title, description, _) in enumerate(rng.sample(originals, int(n_events * copy_fraction))):
+        copies.append((f'{key}-{j}', title, rng.choice(EDITS)(description, rng), key))
+    events = originals + copies
+    rng.shuffle(events)
+    # A copy that arrives before its original makes the original the flagged one; keep the original first
+    position = {key: i for i, (key, *_) in enumerate(events)}
+    events.sort(key=lambda event: position[event[3]] + 0.5 if event[3] else position[event[0]])
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=5000, help='Distinct events')
+    parser.add_argument('--copies', type=float, default=0.1, help='Fraction of events republished with edits')
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events, args.copies)
+    detector = NearDuplicateDetector(args.threshold)
+    flagged = {}
+    start = time.perf_counter()
+    for key, title, description, _ in events:
+        kept = detector.check(key, title, description)
+        if kept is not None:
+            flagged[key] = kept
+    elapsed = time.perf_counter() - start
+
+    copies = {key: original for key, _, _, original in events if original}
+    true_positives = sum(1 for key, kept in flagged.items() if copies.get(key) == kept)
+    all_pairs = len(events) * (len(events) - 1) // 2
+    print(f"{len(events)} events ({len(copies)} copies), {detector.bands} bands x {detector.rows} rows")
+    print(f"{'throughput':>12}: {len(events) / elapsed:10,.0f} events/s")
+    print(f"{'candidates':>12}: {detector.candidates_checked:10,} pairs of {all_pairs:,} "
+          f"({detector.candidates_checked / all_pairs:.3%})")
+    print(f"{'recall':>12}: {true_positives / max(1, len(copies)):10.1%}")
+    print(f"{'precision':>12}: {true_positives / max(1, len(flagged)):10.1%}")
+
+if __name__ == '__main__':
+    main()
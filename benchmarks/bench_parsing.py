@@ -0,0 +1,90 @@
+# benchmarks/bench_parsing.py
+"""
+Per-page parse time of the html_parsing backends against the BeautifulSoup reference.
+
+Usage:
+    python -m benchmarks.bench_parsing [--pages DIR] [--repeat N]
+
+Without --pages a synthetic event page (Drupal-like boilerplate around the
+fields the extractor reads) is used. Every backend's output is checked against
+the bs4 reference before it is timed.
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from html_parsing import BACKENDS, is_available
+
+def synthetic_event_page(n_blocks=300):
+    """Build an event page of realistic size: head metadata, navigation, body text and footer."""
+    nav = ''.join(f'<li class="menu-item"><a href="/es/seccion/{i}">Sección {i}</a></li>' for i in range(n_blocks))
+    paragraphs = ''.join(f'<p>Párrafo {i} con <strong>texto</strong> y <a href="#">enlaces</a>.</p>' for i in range(n_blocks))
+    return f'''<!DOCTYPE html>
+<html lang="es"><head>
+<meta charset="utf-8"><title>Conferencia magistral | Eventos ITAM</title>
+<meta name="viewport" content="width=device-width">
+<meta name="description" content="Conferencia magistral sobre economía y políticas públicas.">
+<meta property="og:title" content="Conferencia magistral">
+<meta property="og:image" content="https://eventos.itam.mx/sites/default/files/evento.jpg">
+<link rel="stylesheet" href="/sites/all/themes/zmagazine/style.css">
+<script>var Drupal = {{"settings": {{}}}};</script>
+</head><body>
+<header><ul class="menu">{nav}</ul></header>
+<main><article>
+<div class="field"><div id="fecha-evento">Martes 5 de noviembre de 2024<br>De 17:00 a 19:00 h</div></div>
+<div id="sede-evento">
+    Río Hondo, Aula Magna
+</div>
+<div class="body">{paragraphs}</div>
+</article></main>
+<footer><ul class="menu">{nav}</ul></footer>
+</body></html>'''
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+def time_backend(parse, pages, repeat):
+    """Return per-page parse times in milliseconds (best of `repeat` for each page)."""
+    timings = []
+    for html in pages:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse(html)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', help='Directory of recorded event pages (*.html)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per page, best one is kept')
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages) if args.pages else [synthetic_event_page()]
+    if not pages:
+        raise SystemExit(f"No *.html pages found in {args.pages}")
+
+    reference = [BACKENDS['bs4'](html) for html in pages]
+    print(f"{len(pages)} page(s), {sum(map(len, pages)) / len(pages) / 1024:.1f} KiB on average\n")
+    print(f"{'backend':<12}{'mean ms':>10}{'median ms':>12}{'speedup':>10}  identical")
+
+    baseline = None
+    for name, parse in BACKENDS.items():
+        if not is_available(name):
+            print(f"{name:<12}{'not installed':>32}")
+            continue
+        identical = all(parse(html) == expected for html, expected in zip(pages, reference))
+        timings = time_backend(parse, pages, args.repeat)
+        mean = statistics.mean(timings)
+        baseline = baseline or mean
+        print(f"{name:<12}{mean:>10.3f}{statistics.median(timings):>12.3f}{baseline / mean:>9.1f}x  {identical}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_pipeline.py
+"""
+Offline end-to-end and per-stage benchmark of the scraping pipeline.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--fixtures DIR] [--latency MS] [--llm-latency MS]
+                                        [--repeat N] [--baseline FILE] [--save-baseline] [--tolerance F]
+
+Fixtures (recorded with `python -m benchmarks.fixtures record`, or synthetic by
+default) are served by a local stand-in server with the given latency. The
+chat-completions endpoint is served by the same stand-in, so the real
+TweetService code path runs without an API key. Reported:
+
+    calendar_links_ms       extract_event_links_from_calendar, per bulletin (median)
+    event_extract_ms        extract_title_description_and_image, per event (median)
+    image_download_ms       download_image, per image (median)
+    pipeline_events_per_s   process_event_links over every bulletin
+
+plus the per-stage p50 latencies of the pipeline run (metrics.py). Results are
+compared with the stored baseline; the exit status is 1 if any headline number
+is more than --tolerance worse.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fixture_server import FixtureServer, fixture_session
+from benchmarks.fixtures import bulletins_in, load_manifest, synthetic_fixtures
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def _median_ms(func, args_list, repeat):
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+def run(fixtures, latency, llm_latency, repeat):
+    """Run every measurement against a fixture directory and return the results dict."""
+    with FixtureServer(fixtures, latency=latency, llm_latency=llm_latency) as server:
+        # Configuration read at import time by tweet_service / tweetllm
+        os.environ.update(OPENAI_API_URL=server.chat_url, OPENAI_API_KEY='benchmark', TWEET_CACHE_DISABLED='1')
+
+        import http_cache
+        import http_session
+        import metrics
+        from extract_links_calendar import extract_event_links_from_calendar
+        from extract_title_description import extract_title_description_and_image
+        from scraping_finetuning import process_event_links
+        from url_imagen import download_image
+
+        http_cache.set_default_cache(None)
+        http_session.set_session(fixture_session(server))
+
+        manifest = load_manifest(fixtures)
+        bulletins = bulletins_in(manifest)
+        events = [url for url in manifest if '/es/evento/' in url]
+        images = [url for url, entry in manifest.items() if entry['content_type'].startswith('image/')]
+        logger = logging.getLogger('bench_pipeline')
+        logger.setLevel(logging.WARNING)
+
+        with tempfile.TemporaryDirectory() as image_dir, contextlib.redirect_stdout(io.StringIO()):
+            results = {
+                'calendar_links_ms': _median_ms(extract_event_links_from_calendar, [(url,) for url in bulletins], repeat),
+                'event_extract_ms': _median_ms(extract_title_description_and_image, [(url,) for url in events], repeat),
+                'image_download_ms': _median_ms(download_image, [(url, image_dir) for url in images], repeat * 5),
+            }
+
+            run_metrics = metrics.reset_metrics()
+            start = time.perf_counter()
+            rows = process_event_links(bulletins, logger)
+            elapsed = time.perf_counter() - start
+
+        results['pipeline_events'] = len(rows)
+        results['pipeline_events_per_s'] = round(len(rows) / elapsed, 2)
+        results['pipeline_stage_p50_ms'] = {stage: values['p50_ms'] for stage, values in run_metrics.summary()['stages'].items()}
+        return results
+
+def compare(results, baseline, tolerance):
+    """Return the headline numbers more than `tolerance` worse than the baseline."""
+    regressions = []
+    for name, value in results.items():
+        expected = baseline.get(name)
+        if not isinstance(value, (int, float)) or not isinstance(expected, (int, float)) or not expected:
+            continue
+        if name.endswith('_ms') and value > expected * (1 + tolerance):
+            regressions.append(f"{name}: {value} ms vs {expected} ms baseline")
+        elif name.endswith('_per_s') and value < expected * (1 - tolerance):
+            regressions.append(f"{name}: {value}/s vs {expected}/s baseline")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fixtures', help='Fixture directory (default: synthetic fixtures in a temporary directory)')
+    parser.add_argument('--latency', type=float, default=20, help='Injected latency per HTTP response, in ms')
+    parser.add_argument('--llm-latency', type=float, default=50, help='Injected latency per LLM response, in ms')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the fixtures for the per-call numbers')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Stored baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before flagging')
+    args = parser.parse_args()
+
+    config = {'fixtures': args.fixtures or 'synthetic', 'latency_ms': args.latency, 'llm_latency_ms': args.llm_latency}
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        fixtures = args.fixtures
+        if not fixtures:
+            synthetic_fixtures(synthetic_dir)
+            fixtures = synthetic_dir
+        results = run(fixtures, args.latency / 1000, args.llm_latency / 1000, args.repeat)
+
+    print(json.dumps({'config': config, 'results': results}, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --save-baseline to store one")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != config:
+        print(f"Warning: baseline was measured with {baseline.get('config')}")
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/fixture_server.py
+"""
+Local stand-in for the bulletin, event, image and chat-completions hosts.
+
+FixtureServer replays a fixture directory (see benchmarks.fixtures) over HTTP on
+127.0.0.1 with a configurable injected latency per response. fixture_session()
+returns a requests session that sends every request to that server instead of
+the real host, so the extractors run unchanged against the original URLs.
+"""
+import http.server
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from benchmarks.fixtures import load_manifest
+from http_session import create_session
+
+CHAT_PATH = '/v1/chat/completions'
+
+def _local_path(url):
+    parts = urlsplit(url)
+    return f"/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return body
+
+    def do_HEAD(self):
+        entry = self.server.routes.get(self.path)
+        self._send(200 if entry else 404, content_type=entry[1] if entry else 'text/plain')
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        entry = self.server.routes.get(self.path)
+        if entry is None:
+            self.wfile.write(self._send(404, b'Not found'))
+            return
+        path, content_type = entry
+        with open(path, 'rb') as f:
+            self.wfile.write(self._send(200, f.read(), content_type))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.server.llm_latency)
+        if not self.path.endswith(CHAT_PATH):
+            self.wfile.write(self._send(404, b'Not found'))
+            return
+        reply = {'choices': [{'message': {'content': 'Tweet de prueba #ITAM'}}],
+                 'usage': {'prompt_tokens': 120, 'completion_tokens': 30}}
+        self.wfile.write(self._send(200, json.dumps(reply).encode('utf-8'), 'application/json'))
+
+class FixtureServer:
+    """
+    Serve a fixture directory on 127.0.0.1 (context manager).
+
+    Args:
+        directory (str): Fixture directory with a manifest.json
+        latency (float): Seconds slept before each GET response
+        llm_latency (float): Seconds slept before each chat-completions response
+    """
+
+    def __init__(self, directory, latency=0.0, llm_latency=0.0):
+        manifest = load_manifest(directory)
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.routes = {_local_path(url): (os.path.join(directory, entry['file']), entry['content_type'])
+                             for url, entry in manifest.items()}
+        self.httpd.latency = latency
+        self.httpd.llm_latency = llm_latency
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.chat_url = self.base_url + CHAT_PATH
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _RedirectAdapter(HTTPAdapter):
+    """Send each request to the fixture server, keeping the original host in the path."""
+
+    def __init__(self, base_url, inner):
+        self.base_url = base_url
+        self.inner = inner
+        super().__init__()
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + _local_path(request.url)
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+def fixture_session(server, pool_size=10):
+    """A pooled, retrying session (http_session.create_session) routed to the fixture server."""
+    session = create_session(pool_size=pool_size)
+    adapter = _RedirectAdapter(server.base_url, session.get_adapter(server.base_url))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
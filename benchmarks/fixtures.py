@@ -0,0 +1,150 @@
+# benchmarks/fixtures.py
+"""
+Recorded or synthetic bulletin/event/image fixtures for the offline benchmarks.
+
+Usage:
+    python -m benchmarks.fixtures record DIR BULLETIN_URL [BULLETIN_URL ...] [--max-events N]
+    python -m benchmarks.fixtures synthetic DIR [--bulletins N] [--events N]
+
+A fixture directory holds the raw responses plus a manifest.json mapping each
+original URL to its file and Content-Type, so fixture_server can replay them.
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import zlib
+from urllib.parse import urlparse
+
+from benchmarks.bench_parsing import synthetic_event_page
+
+MANIFEST = 'manifest.json'
+HTML = 'text/html; charset=utf-8'
+
+def _file_name(url, default_ext):
+    parsed = urlparse(url)
+    name = re.sub(r'[^0-9A-Za-z]+', '_', f"{parsed.netloc}{parsed.path}").strip('_')
+    return name + (os.path.splitext(parsed.path)[1] or default_ext)
+
+class FixtureWriter:
+    """Write responses into a fixture directory and keep its manifest up to date."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = load_manifest(directory) if os.path.exists(os.path.join(directory, MANIFEST)) else {}
+
+    def add(self, url, body, content_type):
+        kind = 'images' if content_type.startswith('image/') else 'pages'
+        path = os.path.join(kind, _file_name(url, '.bin' if kind == 'images' else '.html'))
+        os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+        with open(os.path.join(self.directory, path), 'wb') as f:
+            f.write(body.encode('utf-8') if isinstance(body, str) else body)
+        self.manifest[url] = {'file': path, 'content_type': content_type}
+
+    def save(self):
+        with open(os.path.join(self.directory, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def bulletins_in(manifest):
+    """Bulletin URLs of a fixture manifest, in order."""
+    return sorted((url for url in manifest if 'boletin.itam.mx' in url), key=_issue_order)
+
+def _issue_order(url):
+    return [int(part) if part.isdigit() else 0 for part in urlparse(url).path.split('/')]
+
+def record_fixtures(directory, bulletin_urls, max_events=20):
+    """
+    Record real bulletins, their event pages and one event image.
+
+    Args:
+        directory (str): Fixture directory (created or extended)
+        bulletin_urls (list): Bulletin URLs to record
+        max_events (int): Event pages recorded per bulletin
+    """
+    from extract_links_calendar import parse_event_links_from_calendar
+    from extract_title_description import parse_title_description_and_image
+    from http_session import fetch
+
+    writer = FixtureWriter(directory)
+    image_url = None
+    for bulletin in bulletin_urls:
+        response = fetch(bulletin)
+        writer.add(bulletin, response.text, HTML)
+        for link in parse_event_links_from_calendar(response.text)[:max_events]:
+            page = fetch(link)
+            writer.add(link, page.text, HTML)
+            image_url = image_url or parse_title_description_and_image(page.text)[2]
+        print(f"Recorded {bulletin}")
+    if image_url:
+        image = fetch(image_url)
+        writer.add(image_url, image.content, image.headers.get('Content-Type', 'image/jpeg'))
+    writer.save()
+    return writer.manifest
+
+def _png(width, height):
+    """A valid RGB PNG with a gradient, so its size is realistic after compression."""
+    rows = b''.join(b'\x00' + bytes(value for x in range(width)
+                                    for value in (x * 255 // width, y * 255 // height, (x ^ y) & 255))
+                    for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+def synthetic_bulletin(links):
+    """A bulletin with the table layout extract_links_calendar selects."""
+    anchors = ''.join(f'<p><a href="{link}">Evento</a></p>' for link in links)
+    return f'''<html><body><table><tbody>
+<tr><td>Repertorio</td></tr>
+<tr><td><table><tbody>
+<tr><td>Cabecera</td></tr><tr><td>Índice</td></tr><tr><td>Avisos</td></tr>
+<tr><td>{anchors}</td></tr>
+</tbody></table></td></tr>
+</tbody></table></body></html>'''
+
+def synthetic_fixtures(directory, n_bulletins=4, events_per_bulletin=12, year=2024, first_issue=34):
+    """Generate bulletins, event pages and one image shared by every event."""
+    writer = FixtureWriter(directory)
+    image_url = 'https://eventos.itam.mx/sites/default/files/evento.png'
+    page = synthetic_event_page().replace('https://eventos.itam.mx/sites/default/files/evento.jpg', image_url)
+    n = 0
+    for issue in range(first_issue, first_issue + n_bulletins):
+        links = []
+        for _ in range(events_per_bulletin):
+            n += 1
+            link = f'https://eventos.itam.mx/es/evento/{n}'
+            writer.add(link, page.replace('Conferencia magistral', f'Conferencia {n}'), HTML)
+            links.append(link)
+        writer.add(f'http://boletin.itam.mx/mail/repertorio/{year}/{issue}/index.html', synthetic_bulletin(links), HTML)
+    writer.add(image_url, _png(320, 240), 'image/png')
+    writer.save()
+    return writer.manifest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='Record real bulletins, event pages and an image')
+    record.add_argument('directory')
+    record.add_argument('bulletins', nargs='+')
+    record.add_argument('--max-events', type=int, default=20)
+    synthetic = commands.add_parser('synthetic', help='Generate synthetic fixtures')
+    synthetic.add_argument('directory')
+    synthetic.add_argument('--bulletins', type=int, default=4)
+    synthetic.add_argument('--events', type=int, default=12, help='Events per bulletin')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        manifest = record_fixtures(args.directory, args.bulletins, args.max_events)
+    else:
+        manifest = synthetic_fixtures(args.directory, args.bulletins, args.events)
+    print(f"{len(manifest)} responses in {args.directory}")
+
+if __name__ == '__main__':
+    main()
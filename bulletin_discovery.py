@@ -0,0 +1,81 @@
+# bulletin_discovery.py
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Iterable, List, Optional
+
+import requests
+
+from http_session import get_session
+
+BULLETIN_URL = "http://boletin.itam.mx/mail/repertorio/{year}/{issue}/index.html"
+
+logger = logging.getLogger(__name__)
+
+def bulletin_url(year: int, issue: int) -> str:
+    return BULLETIN_URL.format(year=year, issue=issue)
+
+def bulletin_exists(url: str, session: Optional[requests.Session] = None) -> bool:
+    """
+    Probe a bulletin URL with a HEAD request (no body is downloaded).
+
+    Servers that refuse HEAD (405/501) are probed with a streamed GET that is
+    closed before the body is read.
+
+    Returns:
+        bool: True if the bulletin answers 200, False on 4xx or a network error
+    """
+    session = session or get_session()
+    try:
+        response = session.head(url, allow_redirects=True)
+        if response.status_code in (405, 501):
+            response = session.get(url, stream=True)
+            response.close()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not probe {url}: {e}")
+        return False
+    return response.status_code == 200
+
+def discover_issues(year: int, first_issue: int = 1, max_issue: int = 60,
+                    session: Optional[requests.Session] = None) -> List[str]:
+    """
+    Enumerate the bulletins of one year, probing issue numbers in order.
+
+    Issues before the first one that exists are skipped (numbering may not start
+    at first_issue); after that, the first missing issue ends the year.
+
+    Args:
+        year (int): Bulletin year
+        first_issue (int): First issue number probed
+        max_issue (int): Last issue number probed
+        session (requests.Session): Session to use instead of the shared one
+
+    Returns:
+        List[str]: Bulletin URLs of the year, in issue order
+    """
+    urls = []
+    for issue in range(first_issue, max_issue + 1):
+        url = bulletin_url(year, issue)
+        if bulletin_exists(url, session):
+            urls.append(url)
+        elif urls:
+            break
+    logger.info(f"Discovered {len(urls)} bulletins for {year}")
+    return urls
+
+def discover_bulletins(years: Iterable[int], first_issue: int = 1, max_issue: int = 60,
+                       max_workers: int = 4, session: Optional[requests.Session] = None) -> List[str]:
+    """
+    Enumerate the bulletins of several years, probing the years concurrently.
+
+    Returns:
+        List[str]: Bulletin URLs, ordered by year and issue
+    """
+    years = sorted(years)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        per_year = pool.map(lambda year: discover_issues(year, first_issue, max_issue, session), years)
+        return [url for urls in per_year for url in urls]
+
+def year_range(first_year: int, last_year: Optional[int] = None) -> range:
+    """Years from first_year up to last_year (default: the current year), inclusive."""
+    return range(first_year, (last_year or date.today().year) + 1)
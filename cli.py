@@ -0,0 +1,141 @@
+# cli.py
+"""
+Command line entry point for the event operator.
+
+Usage:
+    python cli.py scrape CALENDAR_URL [--format csv|jsonl]
+    python cli.py tweet [BULLETIN_URL ...] [--year Y --first-issue N] [--concurrent] [--pack-size N]
+    python cli.py tweet --text "Event description"
+    python cli.py download IMAGE_URL [IMAGE_URL ...] [--dir DIR]
+    python cli.py publish [--csv FILE] [--workers N] [--base-url URL] [--limit N] [--dry-run] [--batch]
+                          [--images FILE | --no-images]
+                          [--upcoming-days N]
+    python cli.py watch [--year Y] [--first-issue N] [--min-interval S] [--max-interval S] [--once]
+
+Only argparse is imported at startup. Each subcommand imports what it needs
+when it runs: scrape never loads the LLM client, and torch/transformers are
+only loaded by tweet with TWEET_BACKEND=local. Credentials are checked when a
+subcommand first needs them, not at import.
+"""
+import argparse
+import sys
+
+def cmd_scrape(args):
+    """Calendar events and their images, no tweets."""
+    from scraping_solo_un_evento import scrape_calendar
+
+    scrape_calendar(args.url, output_format=args.format,
+                    index_path=None if args.no_index else "eventos/seen_events.sqlite3")
+
+def cmd_tweet(args):
+    """Bulletin events with their generated tweets, or a single tweet for --text."""
+    if args.text:
+        from tweetllm import tweet
+
+        print(tweet(args.text))
+        return
+
+    from tweetllm import get_service
+    from scraping_finetuning import scraping
+
+    get_service()  # Fail fast on missing credentials, before anything is fetched
+    urls = args.urls
+    if not urls:
+        from bulletin_discovery import discover_issues
+
+        urls = discover_issues(args.year, first_issue=args.first_issue)
+    options = {}
+    if args.keep_near_duplicates:
+        options['near_duplicate_threshold'] = None
+    elif args.near_duplicate_threshold is not None:
+        options['near_duplicate_threshold'] = args.near_duplicate_threshold
+    scraping(urls, concurrent=args.concurrent, pack_size=args.pack_size, output_format=args.format,
+             index_path=None if args.no_index else "events_output/seen_events.sqlite3", **options)
+
+def cmd_download(args):
+    """Download images concurrently into a directory."""
+    from url_imagen import download_images
+
+    paths = download_images(args.urls, save_directory=args.dir, max_workers=args.workers)
+    failed = [url for url, path in paths.items() if path is None]
+    if failed:
+        print(f"{len(failed)} downloads failed", file=sys.stderr)
+        return 1
+
+def cmd_publish(args):
+    """Publish the generated tweets through Metricool with a pool of headless browsers."""
+    import logging
+
+    from metricool_publisher import BASE_URL, publish_tweets
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    return publish_tweets(args.csv, args.workers, args.base_url or BASE_URL, args.limit,
+                          headless=not args.no_headless, dry_run=args.dry_run, batch=args.batch,
+                          upcoming_days=args.upcoming_days, images_csv=None if args.no_images else args.images)
+
+def cmd_watch(args):
+    """Stay up and tweet the events of new bulletins as soon as they are published."""
+    from watch_daemon import watch
+
+    watch(args.year, args.first_issue, args.min_interval, args.max_interval, args.format, args.pack_size, args.once)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    scrape = commands.add_parser('scrape', help='Scrape calendar events and download their images')
+    scrape.add_argument('url', help='Bulletin/calendar URL')
+    scrape.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format')
+    scrape.add_argument('--no-index', action='store_true', help='Reprocess events already seen')
+    scrape.set_defaults(func=cmd_scrape)
+
+    tweet = commands.add_parser('tweet', help='Scrape bulletin events and generate their tweets')
+    tweet.add_argument('urls', nargs='*', help='Bulletin URLs (default: discover them from --year)')
+    tweet.add_argument('--text', help='Generate one tweet for this event description and exit')
+    tweet.add_argument('--year', type=int, default=2024, help='Bulletin year to discover')
+    tweet.add_argument('--first-issue', type=int, default=34, help='First issue number to discover')
+    tweet.add_argument('--concurrent', action='store_true', help='Use the asyncio crawl engine')
+    tweet.add_argument('--pack-size', type=int, default=1, help='Events per LLM request')
+    tweet.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format')
+    tweet.add_argument('--no-index', action='store_true', help='Reprocess events already seen')
+    tweet.add_argument('--near-duplicate-threshold', type=float,
+                       help='Similarity from which events are near duplicates (default: NEAR_DUPLICATE_THRESHOLD or 0.8)')
+    tweet.add_argument('--keep-near-duplicates', action='store_true', help='Tweet near-duplicate events too')
+    tweet.set_defaults(func=cmd_tweet)
+
+    download = commands.add_parser('download', help='Download images')
+    download.add_argument('urls', nargs='+', help='Image URLs')
+    download.add_argument('--dir', default='downloaded_images', help='Destination directory')
+    download.add_argument('--workers', type=int, default=8, help='Simultaneous downloads')
+    download.set_defaults(func=cmd_download)
+
+    publish = commands.add_parser('publish', help='Publish the generated tweets through Metricool (Selenium)')
+    publish.add_argument('--csv', default='events_output/events_with_tweets.csv', help='Scraper output with a Tweet column')
+    publish.add_argument('--workers', type=int, default=2, help='Browsers kept logged in')
+    publish.add_argument('--base-url', help='Metricool (or stub page) URL')
+    publish.add_argument('--limit', type=int, help='Publish at most N tweets')
+    publish.add_argument('--no-headless', action='store_true', help='Show the browser windows')
+    publish.add_argument('--dry-run', action='store_true', help='Only list the queued tweets')
+    publish.add_argument('--batch', action='store_true', help='Schedule every post in one planner session')
+    publish.add_argument('--upcoming-days', type=float, help='Only publish events starting within N days')
+    publish.add_argument('--images', default='eventos/calendar_events.csv', help='Calendar output with the event images')
+    publish.add_argument('--no-images', action='store_true', help='Post the tweets without images')
+    publish.set_defaults(func=cmd_publish)
+
+    watch = commands.add_parser('watch', help='Poll for new bulletins and tweet their events as they appear')
+    watch.add_argument('--year', type=int, help='Bulletin year (default: current year)')
+    watch.add_argument('--first-issue', type=int, default=1, help='First issue number probed at startup')
+    watch.add_argument('--min-interval', type=float, default=30.0, help='Seconds between busy polls')
+    watch.add_argument('--max-interval', type=float, default=600.0, help='Seconds between quiet polls')
+    watch.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format')
+    watch.add_argument('--pack-size', type=int, default=1, help='Events per LLM request')
+    watch.add_argument('--once', action='store_true', help='Poll once and exit')
+    watch.set_defaults(func=cmd_watch)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
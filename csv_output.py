@@ -0,0 +1,200 @@
+# csv_output.py
+import csv
+import json
+import os
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional
+
+def merge_rows_into_csv(filepath: str, rows: Iterable[dict], fieldnames: List[str],
+                        key: Callable[[dict], str]) -> int:
+    """
+    Merge rows into an existing CSV file instead of overwriting it.
+
+    Rows whose key matches an existing row replace it in place; the rest are
+    appended. The file is rewritten atomically, so an interrupted run never
+    leaves a truncated CSV behind.
+
+    Args:
+        filepath (str): CSV file to update (created if missing)
+        rows (Iterable[dict]): New or modified rows
+        fieldnames (List[str]): CSV columns
+        key (Callable[[dict], str]): Function returning the identity of a row
+
+    Returns:
+        int: Total number of rows in the file after the merge
+    """
+    merged = {}
+    if os.path.exists(filepath):
+        with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                merged[key(row)] = row
+
+    for row in rows:
+        merged[key(row)] = row  # dicts keep insertion order, so replaced rows stay in place
+
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.csv.tmp')
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(merged.values())
+    os.replace(tmp_path, filepath)
+
+    return len(merged)
+
+def merge_rows_into_jsonl(filepath: str, rows: Iterable[dict], key: Callable[[dict], str]) -> int:
+    """
+    JSON Lines counterpart of merge_rows_into_csv.
+
+    Args:
+        filepath (str): JSONL file to update (created if missing)
+        rows (Iterable[dict]): New or modified rows
+        key (Callable[[dict], str]): Function returning the identity of a row
+
+    Returns:
+        int: Total number of rows in the file after the merge
+    """
+    merged = {}
+    if os.path.exists(filepath):
+        for row in read_jsonl(filepath):
+            merged[key(row)] = row
+
+    for row in rows:
+        merged[key(row)] = row
+
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.jsonl.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as jsonlfile:
+        for row in merged.values():
+            jsonlfile.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+    os.replace(tmp_path, filepath)
+
+    return len(merged)
+
+def read_jsonl(filepath: str) -> Iterator[dict]:
+    """Yield the rows of a JSON Lines file, skipping a truncated last line."""
+    with open(filepath, 'r', encoding='utf-8') as jsonlfile:
+        for line in jsonlfile:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def read_rows(filepath: str) -> Iterator[dict]:
+    """Yield the rows of a CSV or JSONL file (chosen by extension)."""
+    if filepath.endswith('.jsonl'):
+        yield from read_jsonl(filepath)
+        return
+    with open(filepath, 'r', newline='', encoding='utf-8') as csvfile:
+        yield from csv.DictReader(csvfile)
+
+class CsvSink:
+    """
+    Append rows to a CSV file one at a time, flushing after each row.
+
+    The header is only written when the file is new or empty, so a resumed run
+    keeps appending to the rows an interrupted one already wrote.
+    """
+
+    def __init__(self, filepath: str, fieldnames: List[str]):
+        self.filepath = filepath
+        write_header = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+        self.file = open(filepath, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, extrasaction='ignore')
+        if write_header:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write(self, row: dict):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonlSink:
+    """Append rows to a JSON Lines file one at a time, flushing after each row."""
+
+    def __init__(self, filepath: str, fieldnames: Optional[List[str]] = None):
+        self.filepath = filepath
+        self.file = open(filepath, 'a', encoding='utf-8')
+
+    def write(self, row: dict):
+        self.file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_sink(filepath: str, fieldnames: List[str]):
+    """CsvSink or JsonlSink depending on the file extension."""
+    if filepath.endswith('.jsonl'):
+        return JsonlSink(filepath, fieldnames)
+    return CsvSink(filepath, fieldnames)
+
+def merge_part_into(part_path: str, filepath: str, fieldnames: List[str], key: Callable[[dict], str]) -> int:
+    """Merge the rows streamed into a run's part file into the final output, then remove the part file."""
+    if filepath.endswith('.jsonl'):
+        total = merge_rows_into_jsonl(filepath, read_rows(part_path), key)
+    else:
+        total = merge_rows_into_csv(filepath, read_rows(part_path), fieldnames, key)
+    os.remove(part_path)
+    return total
+
+class Checkpoint:
+    """
+    Append-only list of event URLs whose output row is already on disk.
+
+    Each URL is flushed as soon as it is marked, so after an interruption the
+    next run can skip exactly the events that were written. clear() removes the
+    checkpoint once a run completes.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.done = set()
+        if os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.endswith('\n')}
+        self.file = open(filepath, 'a', encoding='utf-8')
+
+    def __contains__(self, event_url: str) -> bool:
+        return event_url in self.done
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def mark(self, event_url: str):
+        self.done.add(event_url)
+        self.file.write(event_url + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def clear(self):
+        self.close()
+        os.remove(self.filepath)
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to `size` consecutive items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
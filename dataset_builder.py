@@ -0,0 +1,347 @@
+# dataset_builder.py
+"""
+Fine-tuning dataset built from the scraped events and their tweets.
+
+Usage:
+    python dataset_builder.py build [SOURCE ...] [--dir events_output/dataset] [--shard-size 1000]
+    python dataset_builder.py tokenize [--dir events_output/dataset] [--workers N] [--base-model NAME]
+
+Each example is one chat in the format the final_model adapter is trained on:
+the tweet_service system prompt, the event prompt the scraper sends at
+inference time, and the tweet as the assistant reply. The prompt is rebuilt
+from the raw Event text of each row, not from the canonicalized typed columns,
+so it is the one the tweet was generated from. Examples are identified by the
+SHA-256 of their messages and appended to JSONL shards (data/train-00000.jsonl,
+...): the last shard is filled up before a new one is started, and
+data/manifest.json keeps the ids of each shard so adding rows does not re-read
+the whole dataset. SOURCE is scraper output (CSV or JSONL) or an event archive
+directory (default: events_output/events_with_tweets.csv).
+
+tokenize applies the Llama-3.2 chat template of final_model/tokenizer_config.json
+(local_tweet.load_tokenizer) in worker processes and writes the token ids of
+each data shard under tokens/<tokenizer fingerprint>/. Shards already tokenized
+with the same tokenizer and template are skipped, so retraining only tokenizes
+the new rows (a refilled last shard loses its token shards and is tokenized again). Both layouts load with datasets.load_dataset("json") (see
+load_dataset below).
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from csv_output import read_jsonl, read_rows
+from event import Event
+from local_tweet import ADAPTER_DIR, read_adapter_config
+from metrics import timer
+from tweet_service import SYSTEM_PROMPT
+
+DEFAULT_DATASET_DIR = os.path.join("events_output", "dataset")
+DEFAULT_SHARD_SIZE = 1000
+MANIFEST_NAME = "manifest.json"
+# The Llama-3.2 template inserts today's date into the system header; a fixed date keeps the
+# token ids (and therefore the cache) independent of the day the dataset is tokenized
+DATE_STRING = "26 Jul 2024"
+IGNORE_INDEX = -100  # Label of prompt tokens, ignored by the loss
+
+_EVENT_TEXT_RE = re.compile(
+    r"Event: (?P<title>.*)\nDate: (?P<date>.*)\nTime: (?P<time>.*)\nLocation: (?P<location>.*)\n"
+    r"Description: (?P<description>.*)\nURL: (?P<event_url>[^\n]*)\nImage: (?P<image_url>[^\n]*)"
+    r"(?:\nCreated: (?P<created_at>[^\n]*))?", re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+def _record_from_event_text(text: str) -> Optional[dict]:
+    """Event fields, as scraped, from the str(Event) text of the Event column."""
+    match = _EVENT_TEXT_RE.search(text)
+    if not match:
+        return None
+    record = match.groupdict()
+    if record['image_url'] == 'No image':
+        record['image_url'] = None
+    return record
+
+def event_from_row(row: dict) -> Optional[Event]:
+    """
+    Event of a scraper output or archive row.
+
+    Built from the raw Event text when the row has it, so the fields (the location
+    above all) are the ones the tweet was generated from; the typed columns, whose
+    location is canonicalized, are the fallback for archive rows written without it.
+    """
+    record = _record_from_event_text(row.get('Event') or '') or (row if row.get('title') else None)
+    if record is None or not record.get('event_url'):
+        return None
+    return Event.from_record(record)
+
+def example_from_row(row: dict) -> Optional[dict]:
+    """
+    Chat example for a scraper output or archive row.
+
+    Args:
+        row (dict): Row with a Tweet and either the typed event columns or the Event text
+
+    Returns:
+        Optional[dict]: {"id", "event_url", "messages"}, or None for rows without a usable tweet
+    """
+    from scraping_finetuning import event_prompt
+
+    tweet_text = (row.get('Tweet') or '').strip()
+    if not tweet_text or tweet_text.startswith('Error:'):
+        return None
+    event = event_from_row(row)
+    if event is None:
+        return None
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": event_prompt(event)},
+        {"role": "assistant", "content": tweet_text},
+    ]
+    return {"id": example_id(messages), "event_url": event.event_url, "messages": messages}
+
+def example_id(messages: List[dict]) -> str:
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def read_source(path: str) -> Iterator[dict]:
+    """Rows of scraper output (CSV/JSONL) or of every run file of an event archive directory."""
+    if os.path.isdir(path):
+        from event_archive import EventArchive
+
+        return EventArchive(path, extra_fields=['Event', 'Tweet']).iter_records()
+    return read_rows(path)
+
+def _write_atomic(path: str, rows: Iterable[dict]):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.jsonl.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+
+class DatasetBuilder:
+    """
+    Append-only, sharded JSONL dataset of chat examples.
+
+    Args:
+        directory (str): Dataset directory (data/ shards and tokens/ caches)
+        shard_size (int): Examples per shard
+    """
+
+    def __init__(self, directory: str = DEFAULT_DATASET_DIR, shard_size: int = DEFAULT_SHARD_SIZE):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.data_dir = os.path.join(directory, "data")
+        self.manifest_path = os.path.join(self.data_dir, MANIFEST_NAME)
+
+    def shards(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.data_dir, "train-*.jsonl")))
+
+    def manifest(self) -> Dict[str, dict]:
+        """
+        Shard name -> {"size": bytes, "ids": example ids}.
+
+        Read from data/manifest.json; a shard missing from it or whose size changed
+        (e.g. a run stopped between writing a shard and the manifest) is re-read.
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        manifest = {}
+        for shard in self.shards():
+            name, size = os.path.basename(shard), os.path.getsize(shard)
+            entry = saved.get(name)
+            if entry is None or entry.get('size') != size:
+                entry = {'size': size, 'ids': [example['id'] for example in read_jsonl(shard)]}
+            manifest[name] = entry
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, dict]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, suffix='.json.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def ids(self) -> set:
+        """Content hashes of every example already in the dataset."""
+        return {example_id for entry in self.manifest().values() for example_id in entry['ids']}
+
+    def add_rows(self, rows: Iterable[dict]) -> int:
+        """
+        Stream rows into the shards, skipping examples already in the dataset.
+
+        The last shard is filled up to shard_size before a new one is started;
+        rewriting it drops its token shards, which no longer match.
+
+        Args:
+            rows (Iterable[dict]): Scraper output or archive rows
+
+        Returns:
+            int: Number of examples added
+        """
+        manifest = self.manifest()
+        seen = {example_id for entry in manifest.values() for example_id in entry['ids']}
+        shards = self.shards()
+        next_shard = len(shards)
+        buffer = []
+        if shards and len(manifest[os.path.basename(shards[-1])]['ids']) < self.shard_size:
+            next_shard -= 1
+            buffer = list(read_jsonl(shards[-1]))
+        added = 0
+        dirty = False
+
+        def flush():
+            nonlocal next_shard, dirty
+            name = f"train-{next_shard:05d}.jsonl"
+            if name in manifest:
+                for tokens_path in glob.glob(os.path.join(self.directory, "tokens", "*", name)):
+                    os.remove(tokens_path)
+            path = os.path.join(self.data_dir, name)
+            _write_atomic(path, buffer)
+            manifest[name] = {'size': os.path.getsize(path), 'ids': [example['id'] for example in buffer]}
+            next_shard += 1
+            buffer.clear()
+            dirty = False
+
+        for row in rows:
+            example = example_from_row(row)
+            if example is None or example['id'] in seen:
+                continue
+            seen.add(example['id'])
+            buffer.append(example)
+            added += 1
+            dirty = True
+            if len(buffer) >= self.shard_size:
+                flush()
+        if dirty:
+            flush()
+        if added:
+            self._save_manifest(manifest)
+        return added
+
+    def tokens_dir(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, "tokens", fingerprint)
+
+def tokenizer_fingerprint(adapter_dir: str = ADAPTER_DIR, base_model: Optional[str] = None) -> str:
+    """Short hash of the base model, the shipped tokenizer config and the template date."""
+    base_model = base_model or read_adapter_config(adapter_dir)["base_model_name_or_path"]
+    with open(os.path.join(adapter_dir, "tokenizer_config.json"), "rb") as f:
+        config = f.read()
+    payload = base_model.encode("utf-8") + b"\0" + config + b"\0" + DATE_STRING.encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+_tokenizer = None
+
+def _init_worker(adapter_dir: str, base_model: Optional[str]):
+    """Process pool initializer: load the tokenizer once per worker."""
+    global _tokenizer
+    from local_tweet import load_tokenizer
+
+    _tokenizer = load_tokenizer(adapter_dir, base_model)
+
+def tokenize_example(tokenizer, example: dict) -> dict:
+    """Token ids of a chat example, with the prompt tokens masked out of the labels."""
+    messages = example['messages']
+    prompt_ids = tokenizer.apply_chat_template(messages[:-1], tokenize=True, add_generation_prompt=True,
+                                               date_string=DATE_STRING)
+    input_ids = tokenizer.apply_chat_template(messages, tokenize=True, date_string=DATE_STRING)
+    labels = [IGNORE_INDEX] * len(prompt_ids) + input_ids[len(prompt_ids):]
+    return {"id": example['id'], "input_ids": input_ids, "labels": labels}
+
+def _tokenize_shard(shard_path: str, out_path: str) -> int:
+    tokenized = [tokenize_example(_tokenizer, example) for example in read_jsonl(shard_path)]
+    _write_atomic(out_path, tokenized)
+    return len(tokenized)
+
+def tokenize_dataset(directory: str = DEFAULT_DATASET_DIR, workers: Optional[int] = None,
+                     adapter_dir: str = ADAPTER_DIR, base_model: Optional[str] = None) -> dict:
+    """
+    Pre-tokenize every data shard that has no token shard for the current tokenizer yet.
+
+    Args:
+        directory (str): Dataset directory
+        workers (Optional[int]): Worker processes (default: one per CPU)
+        adapter_dir (str): Directory with tokenizer_config.json and adapter_config.json
+        base_model (Optional[str]): Base model whose vocabulary is used (default: from the adapter config)
+
+    Returns:
+        dict: fingerprint, tokenized and cached shard counts, tokenized example count
+    """
+    builder = DatasetBuilder(directory)
+    fingerprint = tokenizer_fingerprint(adapter_dir, base_model)
+    tokens_dir = builder.tokens_dir(fingerprint)
+    pending = []
+    for shard in builder.shards():
+        out_path = os.path.join(tokens_dir, os.path.basename(shard))
+        if not os.path.exists(out_path):
+            pending.append((shard, out_path))
+
+    examples = 0
+    if pending:
+        with timer('tokenize'), ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                    initargs=(adapter_dir, base_model)) as executor:
+            for (shard, _), count in zip(pending, executor.map(_tokenize_shard, *zip(*pending))):
+                examples += count
+                logger.info(f"Tokenized {count} examples of {os.path.basename(shard)}")
+    return {'fingerprint': fingerprint, 'tokenized_shards': len(pending),
+            'cached_shards': len(builder.shards()) - len(pending), 'tokenized_examples': examples}
+
+def load_dataset(directory: str = DEFAULT_DATASET_DIR, tokenized: bool = False,
+                 adapter_dir: str = ADAPTER_DIR, base_model: Optional[str] = None):
+    """
+    The dataset as a HuggingFace datasets.Dataset.
+
+    Args:
+        directory (str): Dataset directory
+        tokenized (bool): Load the token shards of the current tokenizer instead of the chat examples
+        adapter_dir (str): Adapter directory, for the tokenizer fingerprint
+        base_model (Optional[str]): Base model, for the tokenizer fingerprint
+    """
+    import datasets
+
+    builder = DatasetBuilder(directory)
+    if tokenized:
+        pattern = os.path.join(builder.tokens_dir(tokenizer_fingerprint(adapter_dir, base_model)), "train-*.jsonl")
+        files = sorted(glob.glob(pattern))
+    else:
+        files = builder.shards()
+    if not files:
+        raise FileNotFoundError(f"No {'token ' if tokenized else ''}shards in {directory}")
+    return datasets.load_dataset("json", data_files=files, split="train")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Append new examples from scraper output or an event archive')
+    build.add_argument('sources', nargs='*', default=[os.path.join("events_output", "events_with_tweets.csv")])
+    build.add_argument('--dir', default=DEFAULT_DATASET_DIR, help='Dataset directory')
+    build.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='Examples per shard')
+    tokenize = commands.add_parser('tokenize', help='Pre-tokenize the shards not tokenized yet')
+    tokenize.add_argument('--dir', default=DEFAULT_DATASET_DIR, help='Dataset directory')
+    tokenize.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    tokenize.add_argument('--adapter-dir', default=ADAPTER_DIR, help='Directory with the tokenizer config')
+    tokenize.add_argument('--base-model', help='Base model (default: from adapter_config.json)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == 'build':
+        builder = DatasetBuilder(args.dir, args.shard_size)
+        for source in args.sources:
+            added = builder.add_rows(read_source(source))
+            logger.info(f"{added} new examples from {source}")
+        logger.info(f"{len(builder.shards())} shards in {builder.data_dir}")
+    else:
+        stats = tokenize_dataset(args.dir, args.workers, args.adapter_dir, args.base_model)
+        logger.info(f"Tokenizer {stats['fingerprint']}: {stats['tokenized_examples']} examples in "
+                    f"{stats['tokenized_shards']} shards tokenized, {stats['cached_shards']} shards cached")
+
+if __name__ == '__main__':
+    main()
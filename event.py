@@ -1,10 +1,32 @@
 # event.py
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
 
-@dataclass
+from event_dates import MISSING_VALUES, event_datetimes, normalize_location
+
+# Typed columns produced by Event.to_record, in output order
+RECORD_FIELDS = ['event_url', 'title', 'description', 'image_url', 'date', 'time', 'location',
+                 'starts_at', 'ends_at', 'created_at']
+
+# Raw fields in Event order, as produced by Event.to_row
+ROW_FIELDS = ('title', 'description', 'image_url', 'event_url', 'date', 'time', 'location', 'created_at')
+
+# dataclass(slots=True) needs Python 3.10; older interpreters keep a __dict__ per event
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+@dataclass(**_SLOTS)
 class Event:
+    """
+    A scraped event.
+
+    Slotted (no per-instance __dict__) on Python 3.10+, and the date, time and location strings,
+    which repeat across many events, are interned so equal values share one object.
+    """
     title: str
     description: str
     image_url: Optional[str]
@@ -12,7 +34,12 @@ class Event:
     date: str
     time: str
     location: str
-    created_at: datetime = datetime.now()
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def __post_init__(self):
+        self.date = _intern(self.date)
+        self.time = _intern(self.time)
+        self.location = _intern(self.location)
 
     def __str__(self):
         return f"""
@@ -24,4 +51,57 @@ Description: {self.description}
 URL: {self.event_url}
 Image: {self.image_url or 'No image'}
 Created: {self.created_at}
-"""
\ No newline at end of file
+"""
+
+    def to_record(self) -> dict:
+        """
+        Typed, column-per-field representation of the event.
+
+        The raw date/time strings are kept as scraped, starts_at/ends_at are parsed
+        datetimes, the location is canonicalized against the venue table
+        (event_dates.normalize_location), and the extractor's "No ... found"
+        placeholders become None.
+        """
+        starts_at, ends_at = event_datetimes(self.date, self.time)
+        return {
+            'event_url': self.event_url,
+            'title': None if self.title in MISSING_VALUES else self.title,
+            'description': None if self.description in MISSING_VALUES else self.description,
+            'image_url': self.image_url,
+            'date': None if self.date in MISSING_VALUES else self.date,
+            'time': None if self.time in MISSING_VALUES else self.time,
+            'location': normalize_location(self.location),
+            'starts_at': starts_at,
+            'ends_at': ends_at,
+            'created_at': self.created_at,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Event":
+        """Rebuild an Event from a to_record() dict (or a row read back from the archive)."""
+        created_at = record.get('created_at')
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return cls(
+            title=record.get('title') or "No title found",
+            description=record.get('description') or "No description found",
+            image_url=record.get('image_url') or None,
+            event_url=record['event_url'],
+            date=record.get('date') or "No date found",
+            time=record.get('time') or "No time found",
+            location=record.get('location') or "No location found",
+            created_at=created_at or datetime.now(),
+        )
+
+    def to_row(self) -> tuple:
+        """Raw fields as a tuple in ROW_FIELDS order (no parsing, unlike to_record)."""
+        return (self.title, self.description, self.image_url, self.event_url,
+                self.date, self.time, self.location, self.created_at)
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "Event":
+        """Rebuild an Event from a to_row() tuple; created_at may be an ISO string."""
+        title, description, image_url, event_url, date, time, location, created_at = row
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        return cls(title, description, image_url, event_url, date, time, location, created_at)
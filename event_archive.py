@@ -0,0 +1,147 @@
+# event_archive.py
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from event import Event, RECORD_FIELDS
+from csv_output import read_jsonl
+
+DEFAULT_ARCHIVE_DIR = os.getenv("EVENT_ARCHIVE_DIR", "events_archive")
+
+DATETIME_FIELDS = ('starts_at', 'ends_at', 'created_at')
+# Low-cardinality text columns stored dictionary-encoded (categoricals once loaded)
+DICTIONARY_FIELDS = ('date', 'time', 'location')
+
+def _arrow_schema(extra_fields: List[str]):
+    import pyarrow as pa
+
+    def column_type(name):
+        if name in DATETIME_FIELDS:
+            return pa.timestamp('us')
+        if name in DICTIONARY_FIELDS:
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.string()
+
+    return pa.schema([(name, column_type(name)) for name in RECORD_FIELDS + extra_fields])
+
+def _have_pyarrow() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def coerce_record(row: dict, extra_fields: Iterable[str] = ()) -> dict:
+    """
+    Typed record from a row read back from a CSV/JSONL part file.
+
+    CSV stores every value as text: empty strings become None and the datetime
+    columns are parsed back from their ISO form.
+    """
+    record = {}
+    for name in list(RECORD_FIELDS) + [f for f in extra_fields if f not in RECORD_FIELDS]:
+        value = row.get(name)
+        if value == '':
+            value = None
+        if name in DATETIME_FIELDS and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        record[name] = value
+    return record
+
+class EventArchive:
+    """
+    Append-only columnar store of event records, one file per run.
+
+    Each run writes run-<timestamp>.parquet with a typed schema (strings for the
+    text fields, dictionary-encoded date/time/location, timestamps for
+    starts_at/ends_at/created_at). Without pyarrow it falls back to
+    run-<timestamp>.jsonl with ISO datetimes. load() reads every run back into a
+    single pandas DataFrame; iter_events() yields Event objects without pandas.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIR, extra_fields: Iterable[str] = ()):
+        self.directory = directory
+        self.extra_fields = [f for f in extra_fields if f not in RECORD_FIELDS]
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, records: Iterable[dict]) -> Optional[str]:
+        """
+        Write the records of one run as a new archive file.
+
+        Returns:
+            Optional[str]: Path of the file written, None if there were no records
+        """
+        records = [coerce_record(record, self.extra_fields) for record in records]
+        if not records:
+            return None
+
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        if _have_pyarrow():
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            path = os.path.join(self.directory, f'run-{stamp}.parquet')
+            table = pa.Table.from_pylist(records, schema=_arrow_schema(self.extra_fields))
+            pq.write_table(table, path + '.tmp')
+        else:
+            path = os.path.join(self.directory, f'run-{stamp}.jsonl')
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=datetime.isoformat) + '\n')
+        os.replace(path + '.tmp', path)
+        return path
+
+    def files(self) -> List[str]:
+        """Archive files in run order."""
+        return sorted(glob.glob(os.path.join(self.directory, 'run-*.parquet')) +
+                      glob.glob(os.path.join(self.directory, 'run-*.jsonl')),
+                      key=os.path.basename)
+
+    def iter_records(self) -> Iterator[dict]:
+        """Yield the raw records of every run, oldest first."""
+        for path in self.files():
+            if path.endswith('.parquet'):
+                import pyarrow.parquet as pq
+
+                yield from pq.read_table(path).to_pylist()
+            else:
+                yield from read_jsonl(path)
+
+    def iter_events(self) -> Iterator[Event]:
+        """Yield every archived record as an Event."""
+        for record in self.iter_records():
+            yield Event.from_record(record)
+
+    def load(self, latest: bool = True):
+        """
+        Load every run into one pandas DataFrame.
+
+        Args:
+            latest (bool): Keep only the most recent record of each event_url
+
+        Returns:
+            pandas.DataFrame: One row per record, datetime columns as datetime64 and
+                              date/time/location as categoricals
+        """
+        import pandas as pd
+
+        frames = []
+        for path in self.files():
+            if path.endswith('.parquet'):
+                frames.append(pd.read_parquet(path))
+            else:
+                frames.append(pd.read_json(path, lines=True, dtype=False,
+                                           convert_dates=list(DATETIME_FIELDS)))
+        if not frames:
+            return pd.DataFrame(columns=RECORD_FIELDS + self.extra_fields)
+
+        df = pd.concat(frames, ignore_index=True)
+        for name in DATETIME_FIELDS:
+            df[name] = pd.to_datetime(df[name])
+        for name in DICTIONARY_FIELDS:
+            df[name] = df[name].astype('category')
+        if latest:
+            df = df.drop_duplicates('event_url', keep='last').reset_index(drop=True)
+        return df
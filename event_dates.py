@@ -0,0 +1,208 @@
+# event_dates.py
+"""
+Normalization of the free-text date, time and location fields of an event.
+
+The patterns are compiled once at import and every public parser is memoized
+(functools.lru_cache): bulletins repeat the same few dates, time ranges and
+venues over and over, so an archive of thousands of events only parses a few
+hundred distinct strings. Locations are canonicalized against VENUES, which
+can be extended with a JSON file ({"Canonical name": ["alias", ...]}) named
+by EVENT_VENUES_PATH.
+"""
+import functools
+import json
+import os
+import re
+import unicodedata
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+}
+
+# Placeholders written by the extractor when a field is missing
+MISSING_VALUES = {"No date found", "No time found", "No location found", "No description found", "No title found"}
+
+# Canonical venue -> spellings seen in the sede-evento text (compared accent- and case-insensitively)
+VENUES = {
+    'Campus Río Hondo': ['Río Hondo', 'Campus Rio Hondo', 'ITAM Río Hondo', 'Río Hondo 1', 'Río Hondo #1'],
+    'Campus Santa Teresa': ['Santa Teresa', 'ITAM Santa Teresa', 'Camino a Santa Teresa 930'],
+    'Auditorio Raúl Baillères Jr.': ['Auditorio Raúl Baillères', 'Auditorio Raúl Bailleres Jr', 'Auditorio RBJ'],
+    'Biblioteca Raúl Baillères Jr.': ['Biblioteca Raúl Baillères', 'Biblioteca ITAM', 'Biblioteca'],
+    'En línea': ['En linea', 'Virtual', 'Online', 'Zoom', 'Vía Zoom', 'Transmisión en vivo', 'Facebook Live'],
+}
+VENUES_PATH_ENV = "EVENT_VENUES_PATH"
+
+_MONTH = '(' + '|'.join(MONTHS) + ')'
+_WEEKDAY = r'(?:lunes|martes|miercoles|jueves|viernes|sabado|domingo),?\s+'
+_DATE_RE = re.compile(r'(\d{1,2})\s+de\s+' + _MONTH + r'(?:\s+(?:de|del)\s+(\d{4}))?')
+# "del 5 al 7 de noviembre de 2024", "5 y 6 de noviembre", "30 de octubre al 2 de noviembre de 2024",
+# "jueves 5 y viernes 6 de diciembre de 2024", "30 de diciembre de 2024 al 3 de enero de 2025"
+_DATE_RANGE_RE = re.compile(r'(?<!\d)(\d{1,2})(?:\s+de\s+' + _MONTH + r'(?:\s+(?:de|del)\s+\d{4})?)?\s+(?:al?|y|-)\s+'
+                            + r'(?:' + _WEEKDAY + r')?(\d{1,2})\s+de\s+' + _MONTH + r'(?:\s+(?:de|del)\s+(\d{4}))?')
+_CLOCK = r'(?<!\d)(\d{1,2})(?:[:.](\d{2}))?(?!\d)(?:\s*([ap])\.?\s*m\b\.?)?'
+# "De 17:00 a 19:00 h", "17:00 a 19:00", "de 5 a 7 pm", "18:30 hrs", "9.30 - 11.00", "17 h"
+_TIME_RANGE_RE = re.compile(_CLOCK + r'\s*(h(?:rs?|oras)?\b\.?)?\s*(?:(?:a|al|hasta|-|–)\s*(?:las\s+)?' + _CLOCK + r')?')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+_LOCATION_SPLIT_RE = re.compile(r'\s*(?:,|;|\s-\s|\s–\s|\|)\s*')
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents ('Miércoles' -> 'miercoles')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def _venue_key(text: str) -> str:
+    return ' '.join(_NON_ALNUM_RE.sub(' ', _fold(text)).split())
+
+def _load_venues() -> Dict[str, str]:
+    venues = {canonical: list(aliases) for canonical, aliases in VENUES.items()}
+    path = os.getenv(VENUES_PATH_ENV)
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for canonical, aliases in json.load(f).items():
+                venues.setdefault(canonical, []).extend(aliases)
+    return {_venue_key(alias): canonical for canonical, aliases in venues.items() for alias in [canonical, *aliases]}
+
+_VENUE_KEYS = _load_venues()
+
+@functools.lru_cache(maxsize=4096)
+def parse_event_dates(text: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Parse the fecha-evento text into (first day, last day).
+
+    Single days ("Martes 5 de noviembre de 2024") give the same day twice;
+    ranges ("Del 5 al 7 de noviembre de 2024", "30 de octubre al 2 de noviembre
+    de 2024", "Jueves 5 y viernes 6 de diciembre de 2024") give their first and
+    last day. The first half of a range takes the year of the second (the
+    previous one if the months wrap).
+
+    Returns:
+        Tuple[Optional[date], Optional[date]]: (None, None) without day, month and year
+    """
+    if not text or text in MISSING_VALUES:
+        return None, None
+    folded = _fold(text)
+    match = _DATE_RANGE_RE.search(folded)
+    if match and match.group(5):
+        first_day, first_month, last_day, last_month, year = match.groups()
+        last_month = MONTHS[last_month]
+        first_month = MONTHS[first_month] if first_month else last_month
+        first_year = int(year) - 1 if first_month > last_month else int(year)
+        try:
+            return date(first_year, first_month, int(first_day)), date(int(year), last_month, int(last_day))
+        except ValueError:
+            return None, None
+    match = _DATE_RE.search(folded)
+    if not match or not match.group(3):
+        return None, None
+    try:
+        day = date(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+    except ValueError:
+        return None, None
+    return day, day
+
+def parse_event_date(text: Optional[str]) -> Optional[date]:
+    """
+    Parse the fecha-evento text, e.g. "Martes 5 de noviembre de 2024".
+
+    Returns:
+        Optional[date]: The (first) date, or None if there is no day/month/year in the text
+    """
+    return parse_event_dates(text)[0]
+
+def _clock(hours: str, minutes: str, meridiem: str) -> Optional[time]:
+    hours = int(hours)
+    if meridiem == 'p' and hours < 12:
+        hours += 12
+    elif meridiem == 'a' and hours == 12:
+        hours = 0
+    try:
+        return time(hours, int(minutes or 0))
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def parse_event_times(text: Optional[str]) -> Tuple[Optional[time], Optional[time]]:
+    """
+    Parse the time text, raw ("De 17:00 a 19:00 h") or as left by the extractor ("17:00 a 19:00").
+
+    Also understands "18:30 hrs", "9.30 - 11.00" and a.m./p.m. ("de 5 a 7 pm": the
+    meridiem of the end applies to a bare start). A number outside a range is only
+    a clock with minutes, a meridiem or an h suffix ("17 h"), so years and session
+    numbers ("Sesión 3: 17:00") are skipped, and so are out-of-range clocks.
+
+    Returns:
+        Tuple[Optional[time], Optional[time]]: (start, end); missing parts are None
+    """
+    if not text or text in MISSING_VALUES:
+        return None, None
+    for match in _TIME_RANGE_RE.finditer(_fold(text)):
+        start_h, start_m, start_ap, suffix, end_h, end_m, end_ap = match.groups()
+        if not end_h and not (start_m or start_ap or suffix):
+            continue
+        if end_h and not start_ap and end_ap and int(start_h) <= int(end_h):
+            start_ap = end_ap
+        start = _clock(start_h, start_m, start_ap)
+        if start is None:
+            continue
+        end = _clock(end_h, end_m, end_ap) if end_h else None
+        return start, end
+    return None, None
+
+@functools.lru_cache(maxsize=16384)  # Keyed by (date, time) pairs, which outnumber either text
+def event_datetimes(date_text: Optional[str], time_text: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Combine the date and time texts into (starts_at, ends_at).
+
+    An event with a date but no time starts at midnight; ends_at is only set when
+    the time text has an end. It falls on the last day of a date range, and on
+    the next day when the end time is earlier than the start ("22:00 a 1:00").
+    """
+    first_day, last_day = parse_event_dates(date_text)
+    if first_day is None:
+        return None, None
+    start, end = parse_event_times(time_text)
+    starts_at = datetime.combine(first_day, start or time(0, 0))
+    if end is None:
+        return starts_at, None
+    ends_at = datetime.combine(last_day, end)
+    if ends_at < starts_at:
+        ends_at += timedelta(days=1)
+    return starts_at, ends_at
+
+def canonical_venue(text: str) -> str:
+    """The VENUES name of a venue spelling, or the spelling itself with whitespace collapsed."""
+    return _VENUE_KEYS.get(_venue_key(text), ' '.join(text.split()))
+
+def venue_key(text: str) -> str:
+    """Lookup key of a venue: its canonical name, lowercased and without accents or punctuation."""
+    return _venue_key(canonical_venue(text))
+
+@functools.lru_cache(maxsize=4096)
+def normalize_location(text: Optional[str]) -> Optional[str]:
+    """
+    Canonical sede-evento text; None when missing.
+
+    Each comma/semicolon/dash separated part is canonicalized against VENUES
+    ("Auditorio Raul Bailleres - Rio Hondo" -> "Auditorio Raúl Baillères Jr.,
+    Campus Río Hondo"), and repeated parts are dropped.
+    """
+    if not text or text in MISSING_VALUES:
+        return None
+    parts = []
+    for part in _LOCATION_SPLIT_RE.split(text.strip()):
+        if part.strip():
+            venue = canonical_venue(part)
+            if venue not in parts:
+                parts.append(venue)
+    return ', '.join(parts) or None
+
+def clear_caches():
+    """Forget the memoized parses (e.g. after changing VENUES)."""
+    global _VENUE_KEYS
+    _VENUE_KEYS = _load_venues()
+    for parser in (parse_event_dates, parse_event_times, event_datetimes, normalize_location):
+        parser.cache_clear()
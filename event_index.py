@@ -0,0 +1,301 @@
+# event_index.py
+"""
+Indexed SQLite store of the scraped events, for lookups without loading the archive.
+
+Usage:
+    python event_index.py [--index events_output/events.sqlite3] build [SOURCE ...]
+    python event_index.py upcoming [--days 7] [--location "Río Hondo"] [--limit N]
+    python event_index.py search TEXT [--from DATE] [--to DATE] [--location LOCATION] [--limit N]
+    python event_index.py get URL
+    python event_index.py duplicates URL
+
+One row per event URL (the latest record wins) with B-tree indexes on
+starts_at, location and the canonical URL, a venue table indexed by canonical
+venue (event_dates.venue_key) and an FTS5 index over title and description
+(accent-insensitive). SOURCE is scraper output (CSV/JSONL) or an event archive
+directory (default: events_output/archive). Every command except build accepts
+--json.
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from event_dates import event_datetimes, normalize_location, venue_key
+from link_canonical import canonicalize_url
+
+DEFAULT_INDEX_PATH = os.path.join("events_output", "events.sqlite3")
+
+COLUMNS = ('event_url', 'canonical_url', 'title', 'description', 'image_url', 'date', 'time', 'location',
+           'starts_at', 'ends_at', 'created_at', 'tweet')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    event_url TEXT NOT NULL UNIQUE,
+    canonical_url TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    image_url TEXT,
+    date TEXT,
+    time TEXT,
+    location TEXT,
+    starts_at TEXT,
+    ends_at TEXT,
+    created_at TEXT,
+    tweet TEXT
+);
+CREATE INDEX IF NOT EXISTS events_starts_at ON events(starts_at);
+CREATE INDEX IF NOT EXISTS events_location ON events(location);
+CREATE INDEX IF NOT EXISTS events_canonical_url ON events(canonical_url);
+CREATE TABLE IF NOT EXISTS event_venues (
+    venue TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    PRIMARY KEY (venue, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS event_venues_event ON event_venues(event_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    title, description, content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+    INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+    INSERT INTO events_fts(events_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    DELETE FROM event_venues WHERE event_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF title, description ON events BEGIN
+    INSERT INTO events_fts(events_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO events_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+
+def _text(value) -> Optional[str]:
+    """Sortable text for a datetime ("2024-11-05 17:00:00"), None for empty values."""
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return str(value).replace('T', ' ', 1)
+
+def _fts_query(text: str) -> str:
+    """Each word as a quoted FTS5 string, so user input can't break the MATCH syntax."""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+class EventIndex:
+    """
+    SQLite event store with date, location, URL and full-text indexes.
+
+    Args:
+        path (str): Database file (created with its schema if missing)
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript(_SCHEMA)
+
+    def _row(self, record: dict) -> tuple:
+        date_text, time_text = record.get('date'), record.get('time')
+        starts_at, ends_at = record.get('starts_at'), record.get('ends_at')
+        if not starts_at:
+            starts_at, ends_at = event_datetimes(date_text or None, time_text or None)
+        return (record['event_url'], canonicalize_url(record['event_url']), record.get('title') or None,
+                record.get('description') or None, record.get('image_url') or None, date_text or None,
+                time_text or None, normalize_location(record.get('location')), _text(starts_at), _text(ends_at),
+                _text(record.get('created_at')), record.get('Tweet') or record.get('tweet') or None)
+
+    def upsert(self, records: Iterable[dict]) -> int:
+        """
+        Insert or update records (Event.to_record() dicts, archive records or scraper output rows).
+
+        The tweet of a row is kept when a later record of the same event has none.
+
+        Returns:
+            int: Number of records written
+        """
+        n = 0
+        with self.conn:
+            for record in records:
+                if not record.get('event_url'):
+                    continue
+                row = self._row(record)
+                self.conn.execute(f"""
+                    INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})
+                    ON CONFLICT(event_url) DO UPDATE SET
+                        {', '.join(f'{c} = excluded.{c}' for c in COLUMNS[1:-1])},
+                        tweet = COALESCE(excluded.tweet, events.tweet)
+                """, row)
+                event_id = self.conn.execute("SELECT id FROM events WHERE event_url = ?", (row[0],)).fetchone()[0]
+                self.conn.execute("DELETE FROM event_venues WHERE event_id = ?", (event_id,))
+                if row[7]:
+                    self.conn.executemany("INSERT OR IGNORE INTO event_venues (venue, event_id) VALUES (?, ?)",
+                                          [(venue_key(part), event_id) for part in row[7].split(', ')])
+                n += 1
+            self.conn.execute("PRAGMA optimize")  # Refresh the planner statistics after large loads
+        return n
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def get(self, event_url: str) -> Optional[dict]:
+        """The event stored for a URL, matched exactly or by its canonical form."""
+        row = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM events WHERE event_url = ?", (event_url,)).fetchone()
+        if row is None:
+            row = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM events WHERE canonical_url = ? LIMIT 1",
+                                    (canonicalize_url(event_url),)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def find_duplicates(self, event_url: str, title: Optional[str] = None,
+                        starts_at: Optional[datetime] = None) -> List[str]:
+        """
+        Other stored URLs of the same event: same canonical URL, or same title at the same start.
+
+        Args:
+            event_url (str): Event link
+            title (Optional[str]): Title to match (default: the stored event's)
+            starts_at (Optional[datetime]): Start to match (default: the stored event's)
+
+        Returns:
+            List[str]: Stored event URLs other than event_url
+        """
+        stored = self.get(event_url)
+        if stored is not None:
+            title = title or stored['title']
+            starts_at = starts_at or stored['starts_at']
+        rows = self.conn.execute("SELECT event_url FROM events WHERE canonical_url = ?",
+                                 (canonicalize_url(event_url),)).fetchall()
+        if title and starts_at:
+            rows += self.conn.execute("SELECT event_url FROM events WHERE starts_at = ? AND title = ?",
+                                      (_text(starts_at), title)).fetchall()
+        return sorted({row[0] for row in rows} - {event_url})
+
+    def query(self, text: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              location: Optional[str] = None, limit: Optional[int] = 50) -> List[dict]:
+        """
+        Events matching every given filter, by start time (or by relevance with text).
+
+        Args:
+            text (Optional[str]): Words that must all appear in the title or description
+            start (Optional[datetime]): Earliest start (inclusive)
+            end (Optional[datetime]): Latest start (exclusive)
+            location (Optional[str]): Venue(s) the event must be at, e.g. "Río Hondo"
+            limit (Optional[int]): Maximum number of events, None for all
+
+        Returns:
+            List[dict]: Matching events
+        """
+        clauses, params = [], []
+        if text:
+            clauses.append("e.id IN (SELECT rowid FROM events_fts WHERE events_fts MATCH ?)")
+            params.append(_fts_query(text))
+        if start is not None:
+            clauses.append("e.starts_at >= ?")
+            params.append(_text(start))
+        if end is not None:
+            clauses.append("e.starts_at < ?")
+            params.append(_text(end))
+        for part in (normalize_location(location) or '').split(', ') if location else ():
+            clauses.append("EXISTS (SELECT 1 FROM event_venues v WHERE v.venue = ? AND v.event_id = e.id)")
+            params.append(venue_key(part))
+        sql = f"SELECT {', '.join('e.' + c for c in COLUMNS)} FROM events e"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY e.starts_at, e.id"  # Index order (the starts_at index ends with the rowid)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+    def search(self, text: str, limit: int = 20) -> List[dict]:
+        """Full-text search over title and description, best matches first (bm25)."""
+        rows = self.conn.execute(f"""
+            SELECT {', '.join('e.' + c for c in COLUMNS)} FROM events_fts
+            JOIN events e ON e.id = events_fts.rowid
+            WHERE events_fts MATCH ? ORDER BY bm25(events_fts) LIMIT ?
+        """, (_fts_query(text), limit))
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def upcoming(self, days: float = 7, location: Optional[str] = None, now: Optional[datetime] = None,
+                 limit: Optional[int] = None) -> List[dict]:
+        """Events starting in the next `days` days (from `now`), optionally at a venue."""
+        now = now or datetime.now()
+        return self.query(start=now, end=now + timedelta(days=days), location=location, limit=limit)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _print_events(events: List[dict], as_json: bool):
+    if as_json:
+        print(json.dumps(events, ensure_ascii=False, indent=2))
+        return
+    for event in events:
+        print(f"{event['starts_at'] or '?':19}  {event['title'] or '(sin título)'}\n"
+              f"{'':19}  {event['location'] or '-'}  {event['event_url']}")
+
+def _date_arg(text: str) -> datetime:
+    return datetime.fromisoformat(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Index database')
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--json', action='store_true', help='Print JSON instead of text')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Add scraper output or archived events to the index')
+    build.add_argument('sources', nargs='*', default=[os.path.join("events_output", "archive")])
+    upcoming = commands.add_parser('upcoming', parents=[output], help='Events of the next days')
+    upcoming.add_argument('--days', type=float, default=7)
+    upcoming.add_argument('--location', help='Venue, e.g. "Río Hondo"')
+    upcoming.add_argument('--limit', type=int)
+    search = commands.add_parser('search', parents=[output],
+                                 help='Full-text search, optionally within dates and a venue')
+    search.add_argument('text')
+    search.add_argument('--from', dest='start', type=_date_arg, help='ISO date or datetime')
+    search.add_argument('--to', dest='end', type=_date_arg, help='ISO date or datetime')
+    search.add_argument('--location')
+    search.add_argument('--limit', type=int, default=20)
+    get = commands.add_parser('get', parents=[output], help='The stored event of a URL')
+    get.add_argument('url')
+    duplicates = commands.add_parser('duplicates', parents=[output], help='Other stored URLs of the same event')
+    duplicates.add_argument('url')
+    args = parser.parse_args()
+
+    with EventIndex(args.index) as index:
+        if args.command == 'build':
+            from dataset_builder import read_source
+
+            for source in args.sources:
+                print(f"{index.upsert(read_source(source))} records from {source}")
+            print(f"{index.count()} events in {args.index}")
+        elif args.command == 'upcoming':
+            _print_events(index.upcoming(args.days, args.location, limit=args.limit), args.json)
+        elif args.command == 'search':
+            if args.start or args.end or args.location:
+                events = index.query(args.text, args.start, args.end, args.location, args.limit)
+            else:
+                events = index.search(args.text, args.limit)
+            _print_events(events, args.json)
+        elif args.command == 'get':
+            event = index.get(args.url)
+            if event is None:
+                print(f"{args.url} is not in the index")
+                return 1
+            _print_events([event], args.json)
+        else:
+            urls = index.find_duplicates(args.url)
+            print(json.dumps(urls) if args.json else '\n'.join(urls) or "No duplicates")
+
+if __name__ == '__main__':
+    raise SystemExit(main())
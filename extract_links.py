@@ -1,10 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
+from http_session import fetch
 
-def extract_event_links(url):
-    # Fetch the webpage content
-    response = requests.get(url)
-    response.raise_for_status()  # Ensure the request was successful
+def extract_event_links(url, session=None):
+    # Fetch the webpage content through the shared pooled session
+    response = fetch(url, session=session)
     
     # Parse the HTML content
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -1,13 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
+from http_cache import fetch_text, fetch_text_async
+from metrics import timer
 
-def extract_event_links_from_calendar(url):
-    # Fetch the webpage content
-    response = requests.get(url)
-    response.raise_for_status()  # Ensure the request was successful
-
+def parse_event_links_from_calendar(html):
     # Parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
 
     # Use CSS selector to find the specific table row
     specific_row = soup.select('body > table > tbody > tr:nth-child(2) > td > table > tbody > tr:nth-child(4)')
@@ -21,3 +18,19 @@ def extract_event_links_from_calendar(url):
         event_links.extend(links)
 
     return event_links
+
+def extract_event_links_from_calendar(url, session=None, **cache_kwargs):
+    # Fetch the webpage content through the HTTP cache and shared pooled session
+    with timer('bulletin_fetch'):
+        html = fetch_text(url, session=session, **cache_kwargs)
+
+    with timer('bulletin_parse'):
+        return parse_event_links_from_calendar(html)
+
+async def extract_event_links_from_calendar_async(session, url, **cache_kwargs):
+    # Fetch the webpage content with a shared aiohttp.ClientSession, through the HTTP cache
+    with timer('bulletin_fetch'):
+        html = await fetch_text_async(session, url, **cache_kwargs)
+
+    with timer('bulletin_parse'):
+        return parse_event_links_from_calendar(html)
@@ -1,53 +1,57 @@
 # extract_title_description.py
-import requests
-from bs4 import BeautifulSoup
+from html_parsing import get_backend
+from http_cache import fetch_text, fetch_text_async
+from metrics import timer
 from datetime import datetime
 import re
 
-def extract_title_description_and_image(url):
+def parse_title_description_and_image(html, backend=None):
+    """
+    Extract title, description, image, date, time and location from page HTML.
+    
+    Parameters:
+    html (str): The HTML of the event page
+    backend (str): Parser backend ('selectolax', 'lxml', 'stdlib', 'bs4'); defaults to
+                   the fastest one installed, see html_parsing.get_backend
+    
+    Returns:
+    tuple: (title, description, image_url, date, time, location)
+    """
+    return get_backend(backend)(html)
+
+def extract_title_description_and_image(url, session=None, **cache_kwargs):
     """
     Extract title, description, image, date, time and location from a webpage.
     
     Parameters:
     url (str): The URL of the webpage
+    session (requests.Session): Session to use instead of the shared pooled one
+    cache (HTTPCache): Optional keyword; cache to use instead of the default, None disables it
     
     Returns:
     tuple: (title, description, image_url, date, time, location)
     """
-    # Fetch the page content
-    response = requests.get(url)
-    response.raise_for_status()
-    
-    # Parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Extract the title
-    title = soup.title.string if soup.title else "No title found"
-    
-    # Extract the meta description
-    description_meta = soup.find('meta', attrs={'name': 'description'})
-    description = description_meta['content'] if description_meta else "No description found"
-    
-    # Extract the main image
-    image_url = None
-    for meta in soup.find_all('meta'):
-        if meta.get('property') in ['og:image', 'twitter:image']:
-            image_url = meta.get('content')
-            break
-    
-    # Extract date and time
-    date_div = soup.find('div', id='fecha-evento')
-    if date_div:
-        # Get the text and split it by <br>
-        date_parts = [part.strip() for part in date_div.get_text('\n').split('\n') if part.strip()]
-        date = date_parts[0] if date_parts else "No date found"
-        time = date_parts[1].replace('De ', '').replace(' h', '') if len(date_parts) > 1 else "No time found"
-    else:
-        date = "No date found"
-        time = "No time found"
-    
-    # Extract location
-    location_div = soup.find('div', id='sede-evento')
-    location = location_div.get_text().strip() if location_div else "No location found"
-    
-    return title, description, image_url, date, time, location
\ No newline at end of file
+    # Fetch the page content through the HTTP cache and shared pooled session
+    with timer('event_fetch'):
+        html = fetch_text(url, session=session, **cache_kwargs)
+    
+    with timer('event_parse'):
+        return parse_title_description_and_image(html)
+
+async def extract_title_description_and_image_async(session, url, **cache_kwargs):
+    """
+    Async counterpart of extract_title_description_and_image.
+    
+    Parameters:
+    session (aiohttp.ClientSession): Shared session used for the request
+    url (str): The URL of the webpage
+    
+    Returns:
+    tuple: (title, description, image_url, date, time, location)
+    """
+    # Fetch the page content through the HTTP cache
+    with timer('event_fetch'):
+        html = await fetch_text_async(session, url, **cache_kwargs)
+    
+    with timer('event_parse'):
+        return parse_title_description_and_image(html)
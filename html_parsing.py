@@ -0,0 +1,258 @@
+# html_parsing.py
+import os
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+IMAGE_PROPERTIES = ('og:image', 'twitter:image')
+DATE_DIV_ID = 'fecha-evento'
+LOCATION_DIV_ID = 'sede-evento'
+
+def _date_and_time(strings):
+    """Split the text nodes of the fecha-evento div into (date, time), like get_text('\\n') would."""
+    date_parts = [part.strip() for part in '\n'.join(strings).split('\n') if part.strip()]
+    date = date_parts[0] if date_parts else "No date found"
+    time = date_parts[1].replace('De ', '').replace(' h', '') if len(date_parts) > 1 else "No time found"
+    return date, time
+
+def _result(title, description_meta, image_url, date_strings, location_strings):
+    """Assemble the extractor tuple from the raw pieces found by a backend."""
+    if description_meta is None:
+        description = "No description found"
+    else:
+        description = description_meta['content']  # KeyError when missing, as with BeautifulSoup
+    if date_strings is None:
+        date, time = "No date found", "No time found"
+    else:
+        date, time = _date_and_time(date_strings)
+    location = ''.join(location_strings).strip() if location_strings is not None else "No location found"
+    return title, description, image_url, date, time, location
+
+def parse_with_bs4(html):
+    """Reference implementation: full BeautifulSoup tree with html.parser and several searches."""
+    # Parse the HTML content
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract the title
+    title = soup.title.string if soup.title else "No title found"
+
+    # Extract the meta description
+    description_meta = soup.find('meta', attrs={'name': 'description'})
+    description = description_meta['content'] if description_meta else "No description found"
+
+    # Extract the main image
+    image_url = None
+    for meta in soup.find_all('meta'):
+        if meta.get('property') in ['og:image', 'twitter:image']:
+            image_url = meta.get('content')
+            break
+
+    # Extract date and time
+    date_div = soup.find('div', id='fecha-evento')
+    if date_div:
+        # Get the text and split it by <br>
+        date_parts = [part.strip() for part in date_div.get_text('\n').split('\n') if part.strip()]
+        date = date_parts[0] if date_parts else "No date found"
+        time = date_parts[1].replace('De ', '').replace(' h', '') if len(date_parts) > 1 else "No time found"
+    else:
+        date = "No date found"
+        time = "No time found"
+
+    # Extract location
+    location_div = soup.find('div', id='sede-evento')
+    location = location_div.get_text().strip() if location_div else "No location found"
+
+    return title, description, image_url, date, time, location
+
+class _StopParsing(Exception):
+    pass
+
+class _EventPageParser(HTMLParser):
+    """
+    Streaming single-pass extractor on the stdlib tokenizer (the one BeautifulSoup's
+    'html.parser' builder uses), without building a tree. Parsing stops as soon as
+    every field has been found.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.title_found = False
+        self.in_title = False
+        self.description_meta = None
+        self.image_url = None
+        self.image_found = False
+        self.captures = {}  # div id -> list of text nodes
+        self.depths = {}  # div id -> open <div> depth while capturing
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            # BeautifulSoup turns valueless attributes into ''
+            attributes = {name: '' if value is None else value for name, value in attrs}
+            if self.description_meta is None and attributes.get('name') == 'description':
+                self.description_meta = attributes
+            if not self.image_found and attributes.get('property') in IMAGE_PROPERTIES:
+                self.image_url = attributes.get('content')
+                self.image_found = True
+            self._maybe_stop()
+        elif tag == 'title' and not self.title_found:
+            self.title_found = True
+            self.in_title = True
+            self.title_parts = []
+        elif tag == 'div':
+            for div_id in self.depths:
+                self.depths[div_id] += 1
+            div_id = dict(attrs).get('id')
+            if div_id in (DATE_DIV_ID, LOCATION_DIV_ID) and div_id not in self.captures:
+                self.captures[div_id] = []
+                self.depths[div_id] = 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'div':
+            # <div/> opens and closes at once
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+        else:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            # Tag.string semantics: a single text child, None when empty
+            self.title = ''.join(self.title_parts) if self.title_parts else None
+            self._maybe_stop()
+        elif tag == 'div':
+            for div_id in list(self.depths):
+                self.depths[div_id] -= 1
+                if self.depths[div_id] == 0:
+                    del self.depths[div_id]
+            self._maybe_stop()
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+        for div_id in self.depths:
+            self.captures[div_id].append(data)
+
+    def _maybe_stop(self):
+        if (self.title_found and not self.in_title and self.description_meta is not None
+                and self.image_found and len(self.captures) == 2 and not self.depths):
+            raise _StopParsing()
+
+def parse_with_stdlib(html):
+    """Single pass over the stdlib tokenizer; no third-party dependency."""
+    parser = _EventPageParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except _StopParsing:
+        pass
+    if parser.in_title:
+        parser.title = ''.join(parser.title_parts) or None
+    title = parser.title if parser.title_found else "No title found"
+    return _result(title, parser.description_meta, parser.image_url,
+                   parser.captures.get(DATE_DIV_ID), parser.captures.get(LOCATION_DIV_ID))
+
+def parse_with_lxml(html):
+    """libxml2 parse plus one walk over the title, meta and div elements."""
+    import lxml.html
+
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    root = lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+
+    title = "No title found"
+    title_found = False
+    description_meta = None
+    image_url = None
+    image_found = False
+    date_strings = None
+    location_strings = None
+    for element in root.iter('title', 'meta', 'div'):
+        tag = element.tag
+        if tag == 'meta':
+            if description_meta is None and element.get('name') == 'description':
+                description_meta = element.attrib
+            if not image_found and element.get('property') in IMAGE_PROPERTIES:
+                image_url = element.get('content')
+                image_found = True
+        elif tag == 'title':
+            if not title_found:
+                title = element.text
+                title_found = True
+        else:
+            div_id = element.get('id')
+            if div_id == DATE_DIV_ID and date_strings is None:
+                date_strings = list(element.itertext())
+            elif div_id == LOCATION_DIV_ID and location_strings is None:
+                location_strings = list(element.itertext())
+    return _result(title, description_meta, image_url, date_strings, location_strings)
+
+def parse_with_selectolax(html):
+    """Lexbor parse plus a single grouped CSS query for the nodes we need."""
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+
+    title = "No title found"
+    title_found = False
+    description_meta = None
+    image_url = None
+    image_found = False
+    date_strings = None
+    location_strings = None
+    for node in tree.css('title, meta, div#fecha-evento, div#sede-evento'):
+        tag = node.tag
+        if tag == 'meta':
+            attributes = node.attributes
+            if description_meta is None and attributes.get('name') == 'description':
+                description_meta = attributes
+            if not image_found and attributes.get('property') in IMAGE_PROPERTIES:
+                image_url = attributes.get('content')
+                image_found = True
+        elif tag == 'title':
+            if not title_found:
+                title = node.text(deep=True) or None
+                title_found = True
+        elif node.id == DATE_DIV_ID:
+            if date_strings is None:
+                date_strings = [node.text(deep=True, separator='\n')]
+        elif location_strings is None:
+            location_strings = [node.text(deep=True)]
+    return _result(title, description_meta, image_url, date_strings, location_strings)
+
+BACKENDS = {
+    'bs4': parse_with_bs4,
+    'stdlib': parse_with_stdlib,
+    'lxml': parse_with_lxml,
+    'selectolax': parse_with_selectolax,
+}
+
+def is_available(name):
+    module = {'lxml': 'lxml.html', 'selectolax': 'selectolax.lexbor'}.get(name)
+    if module is None:
+        return True
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def get_backend(name=None):
+    """
+    Return the parse function for a backend.
+
+    Parameters:
+    name (str): 'bs4', 'stdlib', 'lxml', 'selectolax' or 'auto' (default: the
+                HTML_PARSER_BACKEND env var, else 'auto' = fastest installed)
+
+    Returns:
+    callable: html -> (title, description, image_url, date, time, location)
+    """
+    name = name or os.getenv('HTML_PARSER_BACKEND', 'auto')
+    if name == 'auto':
+        for candidate in ('selectolax', 'lxml', 'stdlib'):
+            if is_available(candidate):
+                return BACKENDS[candidate]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    return BACKENDS[name]
@@ -0,0 +1,237 @@
+# http_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from http_session import fetch
+from metrics import incr
+
+DEFAULT_CACHE_DIR = os.getenv('HTTP_CACHE_DIR', '.http_cache')
+DEFAULT_TTL = float(os.getenv('HTTP_CACHE_TTL', 3600))  # seconds a response is served without revalidating
+DEFAULT_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+_UNSET = object()
+_default_cache = _UNSET
+_default_lock = threading.Lock()
+
+class HTTPCache:
+    """
+    On-disk HTTP response cache with conditional revalidation.
+
+    Each URL is stored as two files named after the SHA-256 of the URL: the raw
+    body (<key>.body) and its metadata (<key>.json) with the ETag, Last-Modified,
+    text encoding and fetch time. Entries younger than ``ttl`` are served straight
+    from disk; older ones are revalidated with If-None-Match / If-Modified-Since.
+    The body file's mtime doubles as the LRU clock, and the least recently used
+    entries are evicted once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory)
+                                if entry.name.endswith('.body'))
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    def lookup(self, url):
+        """Return the cached (metadata, body) for a URL, or None if it isn't cached."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            os.utime(body_path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def is_fresh(self, meta):
+        """Whether an entry can be served without revalidating."""
+        return time.time() - meta['fetched_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(meta):
+        """Build the If-None-Match / If-Modified-Since headers for an entry."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def store(self, url, body, headers, encoding):
+        """
+        Save a full (200) response.
+
+        Parameters:
+        url (str): Requested URL
+        body (bytes): Raw response body
+        headers (Mapping): Response headers
+        encoding (str): Text encoding used to decode the body
+
+        Returns:
+        dict: The stored metadata
+        """
+        body_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'encoding': encoding,
+            'fetched_at': time.time(),
+            'size': len(body),
+        }
+        with self._lock:
+            try:
+                previous_size = os.path.getsize(body_path)
+            except OSError:
+                previous_size = 0
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            self._total_bytes += len(body) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return meta
+
+    def refresh(self, url, meta, headers=None):
+        """Record a successful revalidation (304) so the entry is fresh again."""
+        meta = dict(meta, fetched_at=time.time())
+        if headers is not None:
+            # A 304 may carry updated validators
+            meta['etag'] = headers.get('ETag') or meta.get('etag')
+            meta['last_modified'] = headers.get('Last-Modified') or meta.get('last_modified')
+        _, meta_path = self._paths(url)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        return meta
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.body'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, body_path in entries:
+            if total <= self.max_bytes:
+                break
+            for path in (body_path, body_path[:-len('.body')] + '.json'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self._total_bytes = total
+
+    @staticmethod
+    def decode(meta, body):
+        return body.decode(meta.get('encoding') or 'utf-8', errors='replace')
+
+def get_default_cache():
+    """Return the process-wide cache (configured from HTTP_CACHE_* env vars), or None if disabled."""
+    global _default_cache
+    if _default_cache is _UNSET:
+        with _default_lock:
+            if _default_cache is _UNSET:
+                _default_cache = None if os.getenv('HTTP_CACHE_DISABLED') else HTTPCache()
+    return _default_cache
+
+def set_default_cache(cache):
+    """Replace the process-wide cache; pass None to disable caching."""
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
+
+def fetch_text(url, session=None, cache=_UNSET):
+    """
+    GET a page as text, going through the HTTP cache.
+
+    Parameters:
+    url (str): URL to fetch
+    session (requests.Session): Session to use instead of the shared pooled one
+    cache (HTTPCache): Cache to use; defaults to get_default_cache(), None disables it
+
+    Returns:
+    str: Page body
+    """
+    if cache is _UNSET:
+        cache = get_default_cache()
+    if cache is None:
+        response = fetch(url, session=session)
+        incr('http.bytes', len(response.content))
+        return response.text
+
+    cached = cache.lookup(url)
+    if cached and cache.is_fresh(cached[0]):
+        incr('http_cache.hit')
+        return cache.decode(*cached)
+
+    headers = cache.conditional_headers(cached[0]) if cached else {}
+    response = fetch(url, session=session, headers=headers)
+    if response.status_code == 304 and cached:
+        incr('http_cache.revalidated')
+        meta = cache.refresh(url, cached[0], response.headers)
+        return cache.decode(meta, cached[1])
+
+    incr('http_cache.miss')
+    incr('http.bytes', len(response.content))
+    encoding = response.encoding or response.apparent_encoding
+    meta = cache.store(url, response.content, response.headers, encoding)
+    return cache.decode(meta, response.content)
+
+async def fetch_text_async(session, url, cache=_UNSET):
+    """
+    Async counterpart of fetch_text for a shared aiohttp.ClientSession.
+
+    Parameters:
+    session (aiohttp.ClientSession): Session used for the request
+    url (str): URL to fetch
+    cache (HTTPCache): Cache to use; defaults to get_default_cache(), None disables it
+
+    Returns:
+    str: Page body
+    """
+    if cache is _UNSET:
+        cache = get_default_cache()
+    cached = cache.lookup(url) if cache is not None else None
+    if cached and cache.is_fresh(cached[0]):
+        incr('http_cache.hit')
+        return cache.decode(*cached)
+
+    headers = cache.conditional_headers(cached[0]) if cached else {}
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304 and cached:
+            incr('http_cache.revalidated')
+            meta = cache.refresh(url, cached[0], response.headers)
+            return cache.decode(meta, cached[1])
+        response.raise_for_status()  # Ensure the request was successful
+        body = await response.read()
+        encoding = response.get_encoding()
+
+    incr('http.bytes', len(body))
+    if cache is not None:
+        incr('http_cache.miss')
+
+    if cache is None:
+        return body.decode(encoding, errors='replace')
+    meta = cache.store(url, body, response.headers, encoding)
+    return cache.decode(meta, body)
@@ -0,0 +1,127 @@
+# http_session.py
+import multiprocessing
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeout in seconds applied to every request that doesn't set its own
+DEFAULT_TIMEOUT = (5, 30)
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Operador_Eventos/1.0 (+https://eventos.itam.mx)',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+class RateLimiter:
+    """
+    Politeness limit: at most `rate` requests per second, shared across processes.
+
+    The next free slot lives in shared memory, so one limiter handed to every
+    worker of a process pool (e.g. through its initializer) spaces the requests of
+    all of them, not just those of each worker.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = multiprocessing.Value('d', 0.0)
+
+    def wait(self):
+        """Block until this caller's slot comes up."""
+        with self._next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller doesn't pass one, and an optional rate limit."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, rate_limiter=None, **kwargs):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        return super().send(request, **kwargs)
+
+def create_session(pool_size=10, retries=3, backoff_factor=0.5, timeout=DEFAULT_TIMEOUT, rate_limiter=None):
+    """
+    Build a requests.Session with keep-alive pooling, retries and default timeouts.
+
+    Parameters:
+    pool_size (int): Connections kept alive per host (raise it for threaded callers)
+    retries (int): Retries on connection errors and RETRY_STATUSES responses
+    backoff_factor (float): Exponential backoff factor between retries, in seconds
+    timeout (float or tuple): Default (connect, read) timeout
+    rate_limiter (RateLimiter): Limit applied to every request sent, None for no limit
+
+    Returns:
+    requests.Session: Configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Return the last response so raise_for_status reports it
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=timeout,
+        rate_limiter=rate_limiter,
+    )
+
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def set_session(session):
+    """Replace the shared session (e.g. with a differently tuned or mocked one)."""
+    global _session
+    with _session_lock:
+        _session = session
+
+def fetch(url, session=None, **kwargs):
+    """
+    GET a URL through the shared (or given) session and raise on HTTP errors.
+
+    Parameters:
+    url (str): URL to fetch
+    session (requests.Session): Session to use instead of the shared one
+    **kwargs: Extra arguments for session.get (stream, timeout, headers...)
+
+    Returns:
+    requests.Response: The successful response
+    """
+    session = session or get_session()
+    response = session.get(url, **kwargs)
+    response.raise_for_status()  # Ensure the request was successful
+    return response
@@ -0,0 +1,310 @@
+# image_variants.py
+"""
+Validated, per-network image variants for social posting.
+
+Usage:
+    python image_variants.py IMAGE [IMAGE ...] [--dir downloaded_images/variants] [--workers N]
+
+url_imagen stores the downloaded bytes as they come. This stage opens each
+image with Pillow (it must decode, be one of ALLOWED_FORMATS and stay under
+MAX_PIXELS) and renders one variant per network in NETWORKS: EXIF-rotated,
+flattened to RGB, fitted inside the network's recommended size and recompressed
+as progressive JPEG, so publishing uploads a small ready-made file instead of
+the full-size original.
+
+Variants are rendered in worker processes and cached by content hash: the file
+name holds the first 16 hex digits of the original's SHA-256 plus the network
+and its size and quality, so an image already rendered (same bytes, any URL) is
+reused and a changed size is rendered again. The cache is bounded to
+IMAGE_VARIANTS_CACHE_MB (default 256): the least recently used variants are
+evicted first, except those handed out during the current run, which its rows
+still point to. Pillow is optional; without it no variants are produced and the
+original images are used as they are.
+
+The image_<network> columns (VARIANT_FIELDS) are cache hints: a later run may
+have evicted the file a row points to. The publisher (metricool_publisher.post_images)
+resolves them with variant_for_row(), which re-renders a missing variant from
+local_image_path and falls back to the original image.
+"""
+import argparse
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from metrics import incr, timer
+
+# Network -> (max width, max height, JPEG quality); images are fitted inside the box, never enlarged
+NETWORKS = {
+    'twitter': (1600, 900, 85),
+    'facebook': (1200, 630, 85),
+    'linkedin': (1200, 627, 85),
+    'instagram': (1080, 1350, 85),
+}
+# Output columns holding the variant paths of an event image
+VARIANT_FIELDS = [f'image_{network}' for network in NETWORKS]
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP', 'BMP'}
+MAX_PIXELS = 40_000_000
+DEFAULT_VARIANTS_DIR = os.path.join("downloaded_images", "variants")
+DEFAULT_CACHE_BYTES = int(float(os.getenv("IMAGE_VARIANTS_CACHE_MB", "256")) * 1024 * 1024)
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+def _have_pillow() -> bool:
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def file_digest(path: str) -> str:
+    """Hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _flatten(image):
+    """RGB copy of an image, transparent areas composited over white."""
+    from PIL import Image
+
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+def _render_variants(path: str, outputs: Dict[str, Tuple[str, int, int, int]]) -> Optional[str]:
+    """
+    Validate an image and write its variants.
+
+    Runs in the worker processes. Each variant is written to a temporary file and
+    renamed, so a crash never leaves a truncated variant in the cache.
+
+    Args:
+        path (str): Original image
+        outputs (Dict[str, Tuple[str, int, int, int]]): Network -> (variant path, width, height, quality)
+
+    Returns:
+        Optional[str]: None on success, the reason the image was rejected otherwise
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(path) as image:
+            if image.format not in ALLOWED_FORMATS:
+                return f"unsupported format {image.format}"
+            if image.width * image.height > MAX_PIXELS:
+                return f"too large ({image.width}x{image.height})"
+            image.verify()
+        with Image.open(path) as image:
+            # JPEGs are decoded straight at the smallest scale that still covers the largest variant
+            image.draft('RGB', (max(w for _, w, _, _ in outputs.values()), max(h for _, _, h, _ in outputs.values())))
+            image = _flatten(ImageOps.exif_transpose(image))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return f"invalid image: {e}"
+
+    for network, (out_path, width, height, quality) in outputs.items():
+        variant = image.copy()
+        variant.thumbnail((width, height), Image.Resampling.LANCZOS)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                variant.save(f, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return None
+
+class ImageVariants:
+    """
+    Size-bounded cache of per-network image variants, rendered in a process pool.
+
+    The pool is started on the first render and kept until close(), so a run
+    rendering images batch by batch pays the worker startup once. Every variant
+    returned by render() is kept out of eviction for the life of the object,
+    since rows written earlier in the run reference it.
+
+    Args:
+        directory (str): Cache directory
+        networks (Optional[Iterable[str]]): Networks to render (default: all of NETWORKS)
+        max_bytes (int): Cache size above which the least recently used variants are evicted
+        workers (Optional[int]): Worker processes (default: one per CPU); 0 renders in this process
+    """
+
+    def __init__(self, directory: str = DEFAULT_VARIANTS_DIR, networks: Optional[Iterable[str]] = None,
+                 max_bytes: int = DEFAULT_CACHE_BYTES, workers: Optional[int] = None):
+        self.directory = directory
+        self.networks = {network: NETWORKS[network] for network in (networks or NETWORKS)}
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.executor = None
+        self.referenced = set()  # Variant paths handed out by render(), never evicted
+        self.rejected = set()  # Digests of images that failed validation, not decoded again
+        self.enabled = _have_pillow()
+        if not self.enabled:
+            logger.warning("Pillow is not installed: images are posted without per-network variants")
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.sizes = {}  # Variant path -> bytes, for the cache size
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                self.sizes[entry.path] = entry.stat().st_size
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.sizes.values())
+
+    def variant_path(self, digest: str, network: str) -> str:
+        width, height, quality = self.networks[network]
+        return os.path.join(self.directory, f"{digest[:16]}-{network}-{width}x{height}q{quality}.jpg")
+
+    def render(self, image_paths: Iterable[Optional[str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Variants of each image, from the cache or rendered now.
+
+        Args:
+            image_paths (Iterable[Optional[str]]): Downloaded images (None and repeated paths are skipped)
+
+        Returns:
+            Dict[str, Dict[str, str]]: Image path -> {network: variant path}; {} for rejected images
+        """
+        paths = list(dict.fromkeys(path for path in image_paths if path))
+        if not self.enabled or not paths:
+            return {path: {} for path in paths}
+
+        variants, pending, digests = {}, {}, {}
+        for path in paths:
+            try:
+                digest = file_digest(path)
+            except OSError as e:
+                logger.warning(f"Skipping variants of {path}: {e}")
+                variants[path] = {}
+                continue
+            digests[path] = digest
+            if digest in self.rejected:
+                variants[path] = {}
+                continue
+            variants[path] = {network: self.variant_path(digest, network) for network in self.networks}
+            missing = {network: (out_path, *self.networks[network])
+                       for network, out_path in variants[path].items() if not os.path.exists(out_path)}
+            if missing:
+                incr('image_variants.miss')
+                pending[path] = missing
+            else:
+                incr('image_variants.hit')
+                for out_path in variants[path].values():
+                    os.utime(out_path)  # Most recently used, evicted last
+
+        if pending:
+            with timer('image_variants'):
+                if self.workers == 0 or len(pending) == 1:
+                    errors = [_render_variants(path, outputs) for path, outputs in pending.items()]
+                else:
+                    if self.executor is None:
+                        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                    errors = list(self.executor.map(_render_variants, pending.keys(), pending.values()))
+            for path, error in zip(pending, errors):
+                if error:
+                    self.rejected.add(digests[path])
+                    incr('image_variants.rejected')
+                    logger.warning(f"Skipping variants of {path}: {error}")
+                    variants[path] = {}
+                    continue
+                for out_path in variants[path].values():
+                    self.sizes[out_path] = os.path.getsize(out_path)
+        self.referenced.update(out_path for outputs in variants.values() for out_path in outputs.values())
+        if pending:
+            self.evict()
+        return variants
+
+    def evict(self, keep: Iterable[str] = ()) -> int:
+        """Remove the least recently used variants (except keep and referenced) until the cache fits in max_bytes."""
+        keep = self.referenced.union(keep)
+        total = self.total_bytes
+        evicted = 0
+        if total <= self.max_bytes:
+            return 0
+        for path in sorted(self.sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            total -= self.sizes.pop(path)
+            if os.path.exists(path):
+                os.remove(path)
+            evicted += 1
+        incr('image_variants.evicted', evicted)
+        return evicted
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def variant_columns(variants: Dict[str, str]) -> dict:
+    """Output columns (VARIANT_FIELDS) of an image's variants; empty for networks without one."""
+    return {f'image_{network}': variants.get(network, '') for network in NETWORKS}
+
+def variant_for_row(row: dict, network: str, cache: Optional[ImageVariants] = None) -> Optional[str]:
+    """
+    Image to post on a network for an output row.
+
+    The row's image_<network> path when the file still exists; otherwise the
+    variant rendered again from local_image_path. Without Pillow the original
+    image itself is used; an image Pillow rejects (corrupt, unsupported, too
+    large) is not posted at all.
+
+    Args:
+        row (dict): Calendar output row (FIELDNAMES of scraping_solo_un_evento)
+        network (str): Network in NETWORKS
+        cache (Optional[ImageVariants]): Cache to render into (default: one over DEFAULT_VARIANTS_DIR)
+
+    Returns:
+        Optional[str]: Path of the image, None if the row has no usable image
+    """
+    variant_path = row.get(f'image_{network}')
+    if variant_path and os.path.exists(variant_path):
+        return variant_path
+    image_path = row.get('local_image_path')
+    if not image_path or not os.path.exists(image_path):
+        return None
+    if cache is None:
+        with ImageVariants(networks=[network], workers=0) as own_cache:
+            return variant_for_row(row, network, own_cache)
+    if not cache.enabled:
+        return image_path
+    return cache.render([image_path]).get(image_path, {}).get(network)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('images', nargs='+', help='Downloaded images')
+    parser.add_argument('--dir', default=DEFAULT_VARIANTS_DIR, help='Variant cache directory')
+    parser.add_argument('--networks', nargs='+', choices=list(NETWORKS), help='Networks (default: all)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    with ImageVariants(args.dir, args.networks, workers=args.workers) as cache:
+        for path, variants in cache.render(args.images).items():
+            print(path)
+            for network, out_path in variants.items():
+                print(f"  {network:>10}: {out_path} ({os.path.getsize(out_path) // 1024} KiB)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# link_canonical.py
+from collections import Counter
+from typing import Iterable, Iterator
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid'}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Hosts that serve every page over https, so http links to them are upgraded
+HTTPS_HOSTS = {'eventos.itam.mx'}
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of an event link, so every spelling of it maps to one key.
+
+    The scheme and host are lowercased (http becomes https for HTTPS_HOSTS), the
+    host loses a default port, trailing slashes are dropped from the path, the
+    fragment is removed and the query keeps only non-tracking parameters, sorted.
+    For example
+    "HTTP://Eventos.itam.mx:80/es/evento/123/?utm_source=boletin#top" becomes
+    "https://eventos.itam.mx/es/evento/123".
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if scheme == 'http' and host in HTTPS_HOSTS:
+        scheme = 'https'
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if key not in TRACKING_PARAMS and not key.startswith('utm_')))
+    return urlunsplit((scheme, host, path, query, ''))
+
+class LinkDeduplicator:
+    """
+    Run-wide set of canonical event links.
+
+    Each link is let through the first time it is seen (in canonical form) and
+    counted as a duplicate afterwards, so an event linked from several bulletins is
+    fetched, parsed and tweeted once per run. summary() reports how many fetches
+    and LLM calls the duplicates would have cost.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.duplicates = Counter()
+        self.tweeted = set()
+        self.total = 0
+
+    def first_time(self, url: str) -> bool:
+        """Register a canonical link; True the first time it is seen."""
+        self.total += 1
+        if url in self.seen:
+            self.duplicates[url] += 1
+            return False
+        self.seen.add(url)
+        return True
+
+    def filter(self, links: Iterable[str]) -> Iterator[str]:
+        """Yield the canonical form of each link not seen before in this run."""
+        for link in links:
+            url = canonicalize_url(link)
+            if self.first_time(url):
+                yield url
+
+    def mark_tweeted(self, url: str):
+        """Record that a link's event got a tweet, so its duplicates count as avoided LLM calls."""
+        self.tweeted.add(url)
+
+    @property
+    def fetches_avoided(self) -> int:
+        return sum(self.duplicates.values())
+
+    @property
+    def llm_calls_avoided(self) -> int:
+        return sum(count for url, count in self.duplicates.items() if url in self.tweeted)
+
+    def summary(self) -> str:
+        return (f"Link dedup: {self.total} links, {len(self.seen)} unique; avoided "
+                f"{self.fetches_avoided} duplicate fetches and {self.llm_calls_avoided} LLM calls")
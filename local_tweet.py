@@ -0,0 +1,129 @@
+# local_tweet.py
+import json
+import os
+from typing import List, Optional
+
+from metrics import timer
+from token_budget import length_batches, record_padding
+from tweet_service import SYSTEM_PROMPT
+
+ADAPTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "final_model")
+
+def read_adapter_config(adapter_dir: str = ADAPTER_DIR) -> dict:
+    with open(os.path.join(adapter_dir, "adapter_config.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_tokenizer(adapter_dir: str = ADAPTER_DIR, base_model: Optional[str] = None):
+    """
+    Load the tokenizer used to train the adapter.
+
+    final_model/ ships tokenizer_config.json and special_tokens_map.json but not the
+    tokenizer.json vocabulary, so the vocabulary comes from the base model and the
+    shipped config (chat template, pad/eos tokens) is applied on top of it.
+    """
+    from transformers import AutoTokenizer
+
+    if os.path.exists(os.path.join(adapter_dir, "tokenizer.json")):
+        tokenizer = AutoTokenizer.from_pretrained(adapter_dir)
+    else:
+        base_model = base_model or read_adapter_config(adapter_dir)["base_model_name_or_path"]
+        tokenizer = AutoTokenizer.from_pretrained(base_model)
+        with open(os.path.join(adapter_dir, "tokenizer_config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("chat_template"):
+            tokenizer.chat_template = config["chat_template"]
+        if config.get("pad_token"):
+            tokenizer.pad_token = config["pad_token"]
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+class LocalTweetModel:
+    """
+    CPU tweet generation with the final_model LoRA adapter.
+
+    The base model is loaded once, the adapter is merged into its weights (no LoRA
+    overhead per forward pass) and, optionally, every nn.Linear is dynamically
+    quantized to int8. Generation is batched: prompts are sorted by token length so
+    each left-padded batch wastes as little padding as possible (token_budget.length_batches,
+    with the padding counted on the run metrics), and the KV cache is kept on during
+    decoding. Exposes the same tweet / tweet_many interface as
+    tweet_service.TweetService.
+    """
+
+    def __init__(self, adapter_dir: str = ADAPTER_DIR, base_model: Optional[str] = None,
+                 quantize: bool = False, max_new_tokens: int = 120, temperature: float = 0.1,
+                 batch_size: int = 8, num_threads: Optional[int] = None):
+        import torch
+        from peft import PeftModel
+        from transformers import AutoModelForCausalLM
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        base_model = base_model or read_adapter_config(adapter_dir)["base_model_name_or_path"]
+        self.tokenizer = load_tokenizer(adapter_dir, base_model)
+        self.tokenizer.padding_side = "left"  # Decoder-only: new tokens must follow the prompt directly
+
+        model = AutoModelForCausalLM.from_pretrained(base_model, torch_dtype=torch.float32)
+        model = PeftModel.from_pretrained(model, adapter_dir).merge_and_unload()
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        self.torch = torch
+        self.model = model
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.batch_size = batch_size
+
+    def _prompt(self, query: str) -> str:
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": query}]
+        return self.tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
+
+    def _generate(self, prompts: List[str]) -> List[str]:
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, add_special_tokens=False)
+        generation_kwargs = {
+            "max_new_tokens": self.max_new_tokens,
+            "use_cache": True,
+            "pad_token_id": self.tokenizer.pad_token_id,
+            "eos_token_id": self.tokenizer.eos_token_id,
+        }
+        if self.temperature > 0:
+            generation_kwargs.update(do_sample=True, temperature=self.temperature)
+        else:
+            generation_kwargs.update(do_sample=False)
+
+        with self.torch.inference_mode(), timer('llm_generate'):
+            output = self.model.generate(**inputs, **generation_kwargs)
+        new_tokens = output[:, inputs["input_ids"].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+    def tweet_many(self, queries: List[str], pack_size: int = 1) -> List[str]:
+        """
+        Generate tweets for many events in length-sorted batches.
+
+        Args:
+            queries (List[str]): Event descriptions
+            pack_size (int): Ignored; kept for interface compatibility with TweetService
+
+        Returns:
+            List[str]: One tweet (or "Error: ..." string) per query, in order
+        """
+        prompts = [self._prompt(query) for query in queries]
+        lengths = [len(ids) for ids in self.tokenizer(prompts, add_special_tokens=False)["input_ids"]]
+        batches = length_batches(lengths, self.batch_size)
+        record_padding(lengths, batches)
+
+        results: List[Optional[str]] = [None] * len(prompts)
+        for batch in batches:
+            try:
+                tweets = self._generate([prompts[i] for i in batch])
+            except Exception as e:
+                tweets = [f"Error: {str(e)}"] * len(batch)
+            for i, tweet_text in zip(batch, tweets):
+                results[i] = tweet_text
+        return results
+
+    def tweet(self, query: str) -> str:
+        return self.tweet_many([query])[0]
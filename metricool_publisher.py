@@ -0,0 +1,531 @@
+# metricool_publisher.py
+"""
+Publish the generated tweets through Metricool with a pool of headless browsers.
+
+Usage:
+    python metricool_publisher.py [--csv events_output/events_with_tweets.csv] [--workers 2]
+                                  [--base-url URL] [--limit N] [--no-headless] [--dry-run] [--batch]
+                                  [--upcoming-days N] [--index events_output/events.sqlite3]
+                                  [--images eventos/calendar_events.csv | --no-images]
+
+Each worker keeps one logged-in Chrome for the whole run. Login cookies are
+persisted to a JSON file, so the next run (and every other worker) skips the
+login form. Waits are explicit conditions, never fixed sleeps, and the network
+toggles are enabled with a single DOM query and JS dispatch per post. --batch
+schedules the whole queue from one planner session and reports posts/minute.
+Published event URLs are recorded in a ledger next to the CSV, so a tweet is
+never posted twice. Each post carries the event's image when the calendar
+output (--images) has it: the per-network variant (image_variants) of the first
+toggled network, since one post is shared by every network, re-rendered when
+the cache no longer holds it.
+Point --base-url at a local copy of benchmarks/metricool_stub.html (e.g. served
+with `python -m http.server`) to exercise the whole flow offline.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from csv_output import Checkpoint, read_rows
+from event_index import DEFAULT_INDEX_PATH, EventIndex
+from metrics import percentile, timer
+
+BASE_URL = os.getenv("METRICOOL_BASE_URL", "https://metricool.com/")
+COOKIES_PATH = os.getenv("METRICOOL_COOKIES_PATH", ".metricool_cookies.json")
+DEFAULT_TIMEOUT = 15
+DEFAULT_IMAGES_CSV = os.path.join("eventos", "calendar_events.csv")
+
+NETWORKS = [('x-twitter', 'Twitter'), ('facebook', 'Facebook'), ('linkedin', 'LinkedIn')]
+# Metricool network icon -> image_variants network whose variant is uploaded
+VARIANT_NETWORKS = {'x-twitter': 'twitter', 'facebook': 'facebook', 'linkedin': 'linkedin'}
+
+# CSS selectors of the Metricool pages (as used by selenium_metri); the stub page mirrors them
+SELECTORS = {
+    'login_button': ".cta-blanco-login",
+    'email': "#j_username",
+    'password': "#j_password",
+    'login_submit': "#loginFormSubmit",
+    'planner': "a[href*='/planner'] .fa-calendar-days",
+    'create_post': "button.v-btn.primary .fa-plus",
+    'editor': "span.editor-box[contenteditable='true']",
+    'media_input': os.getenv("METRICOOL_MEDIA_SELECTOR", "input[type='file']"),
+    'submit_post': os.getenv("METRICOOL_SUBMIT_SELECTOR", "button.v-btn.primary .fa-paper-plane"),
+}
+
+# Finds every requested network toggle with one DOM query and clicks it in the page; returns
+# null while the editor toolbar is not rendered yet, so it doubles as a wait condition
+TOGGLE_NETWORKS_JS = """
+const toggles = document.querySelectorAll('div.flex-grow-0 div.cursor-pointer');
+if (!toggles.length) return null;
+const result = {clicked: [], disabled: [], missing: []};
+for (const icon of arguments[0]) {
+  const found = document.querySelector('div.flex-grow-0 i.fa-' + icon);
+  const toggle = found && found.closest('div.cursor-pointer');
+  if (!toggle) result.missing.push(icon);
+  else if (toggle.classList.contains('opacity-50')) result.disabled.push(icon);
+  else { toggle.click(); result.clicked.push(icon); }
+}
+return result;
+"""
+
+logger = logging.getLogger(__name__)
+
+def create_driver(headless: bool = True):
+    """Chrome driver without automation banners; headless unless asked otherwise."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+    return webdriver.Chrome(options=options)
+
+def _host_matches(domain: str, host: str) -> bool:
+    domain = domain.lstrip('.')
+    return host == domain or host.endswith('.' + domain)
+
+def click_network_toggles(driver, networks=NETWORKS, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """
+    Enable the given network toggles of the open post editor in a single JS dispatch.
+
+    Args:
+        driver: Selenium WebDriver with the post editor open
+        networks (list): (icon_class, network_name) pairs
+        timeout (float): Seconds to wait for the toggles to render
+
+    Returns:
+        dict: Icon classes that were 'clicked', 'disabled' (skipped) or 'missing'
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    icons = [icon_class for icon_class, _ in networks]
+    result = WebDriverWait(driver, timeout).until(lambda d: d.execute_script(TOGGLE_NETWORKS_JS, icons))
+    names = dict(networks)
+    for icon_class in result['disabled']:
+        logger.info(f"{names[icon_class]} toggle is disabled, skipping")
+    for icon_class in result['missing']:
+        logger.warning(f"{names[icon_class]} toggle not found")
+    return result
+
+class MetricoolSession:
+    """One logged-in browser: restores or performs the login, then creates posts from the planner."""
+
+    def __init__(self, driver, base_url: str = BASE_URL, cookies_path: Optional[str] = COOKIES_PATH,
+                 timeout: float = DEFAULT_TIMEOUT):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver = driver
+        self.base_url = base_url
+        self.cookies_path = cookies_path
+        self.timeout = timeout
+        self.wait = WebDriverWait(driver, timeout)
+
+    def _find(self, name: str, condition: str = 'clickable', timeout: Optional[float] = None):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        locator = (By.CSS_SELECTOR, SELECTORS[name])
+        expected = EC.element_to_be_clickable(locator) if condition == 'clickable' else EC.presence_of_element_located(locator)
+        wait = self.wait if timeout is None else WebDriverWait(self.driver, timeout)
+        return wait.until(expected)
+
+    def _logged_in(self, timeout: float = 5) -> bool:
+        from selenium.common.exceptions import TimeoutException
+
+        try:
+            self._find('planner', 'present', timeout=timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    def restore_cookies(self) -> bool:
+        """Load the persisted cookies; True if they still give a logged-in session."""
+        if not self.cookies_path or not os.path.exists(self.cookies_path):
+            return False
+        with open(self.cookies_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.driver.get(saved['url'])
+        host = urlparse(self.driver.current_url).hostname or ''
+        for cookie in saved['cookies']:
+            if _host_matches(cookie.get('domain', host), host):
+                cookie.pop('sameSite', None)  # Chrome rejects some stored values
+                self.driver.add_cookie(cookie)
+        self.driver.get(saved['url'])
+        return self._logged_in()
+
+    def save_cookies(self):
+        if not self.cookies_path:
+            return
+        tmp_path = self.cookies_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': self.driver.current_url, 'cookies': self.driver.get_cookies()}, f)
+        os.replace(tmp_path, self.cookies_path)
+
+    def login(self, email: str, password: str):
+        """Reuse the persisted cookies if they are still valid, otherwise log in through the form."""
+        if self.restore_cookies():
+            logger.info("Restored Metricool session from cookies")
+            return
+        self.driver.get(self.base_url)
+        self._find('login_button').click()
+        email_input = self._find('email')
+        email_input.clear()
+        email_input.send_keys(email)
+        password_input = self._find('password')
+        password_input.clear()
+        password_input.send_keys(password)
+        self._find('login_submit').click()
+        self._find('planner', 'present')
+        self.save_cookies()
+        logger.info("Logged in to Metricool")
+
+    def open_planner(self):
+        self._find('planner').click()
+        self._find('create_post')
+
+    def toggle_networks(self, networks=NETWORKS) -> dict:
+        return click_network_toggles(self.driver, networks, self.timeout)
+
+    def publish(self, text: str, networks=NETWORKS, image_path: Optional[str] = None):
+        """Create one post with `text` (and the image, if any) on the given networks and wait until the editor closes."""
+        from selenium.webdriver.support import expected_conditions as EC
+
+        self._find('create_post').click()
+        editor = self._find('editor', 'present')
+        self.driver.execute_script("arguments[0].innerText = arguments[1];", editor, text)
+        if image_path:
+            self._find('media_input', 'present').send_keys(os.path.abspath(image_path))
+        self.toggle_networks(networks)
+        self._find('submit_post').click()
+        self.wait.until(EC.staleness_of(editor))
+
+    def close(self):
+        self.driver.quit()
+
+class DriverPool:
+    """
+    Fixed-size pool of logged-in MetricoolSessions, created lazily.
+
+    The first session to log in saves the cookies the others restore, so the
+    login form is filled at most once per run (and not at all while the saved
+    cookies stay valid).
+    """
+
+    def __init__(self, size: int, email: str, password: str, headless: bool = True,
+                 base_url: str = BASE_URL, cookies_path: Optional[str] = COOKIES_PATH):
+        self.size = size
+        self.email = email
+        self.password = password
+        self.headless = headless
+        self.base_url = base_url
+        self.cookies_path = cookies_path
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.login_lock = threading.Lock()
+        self.sessions = []
+
+    def _new_session(self) -> MetricoolSession:
+        session = MetricoolSession(create_driver(self.headless), self.base_url, self.cookies_path)
+        try:
+            with self.login_lock:  # One login at a time, so later sessions reuse the saved cookies
+                session.login(self.email, self.password)
+            session.open_planner()
+        except Exception:
+            session.close()
+            raise
+        return session
+
+    @contextmanager
+    def acquire(self) -> Iterator[MetricoolSession]:
+        """
+        Lend a session for the duration of the block.
+
+        If the block raises, the session is taken back to the planner, or dropped
+        when that fails too; its slot is then handed to the next acquire (possibly
+        one already waiting), which logs in a fresh session.
+        """
+        with self.lock:
+            grow = self.idle.empty() and self.created < self.size
+            if grow:
+                self.created += 1
+        session = None if grow else self.idle.get()
+        if session is None:  # A new slot, or the slot of a dropped session
+            try:
+                session = self._new_session()
+            except Exception:
+                if grow:
+                    with self.lock:
+                        self.created -= 1
+                else:
+                    self.idle.put(None)
+                raise
+            with self.lock:
+                self.sessions.append(session)
+        try:
+            yield session
+        except BaseException:
+            if self.recover(session):
+                self.idle.put(session)
+            raise
+        self.idle.put(session)
+
+    def recover(self, session: MetricoolSession) -> bool:
+        """
+        Take a session whose last post failed back to the planner.
+
+        Returns:
+            bool: False if it could not be reset; it is then closed and its slot freed
+        """
+        try:
+            session.open_planner()
+            return True
+        except Exception as e:
+            logger.warning(f"Dropping a Metricool session that could not return to the planner: {e}")
+        try:
+            session.close()
+        except Exception as e:
+            logger.warning(f"Could not close a broken Metricool session: {e}")
+        with self.lock:
+            self.sessions.remove(session)
+        self.idle.put(None)  # Wakes a waiter, which logs in a new session in this slot
+        return False
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+
+def post_images(images_csv: Optional[str], event_urls: List[str], networks=NETWORKS) -> Dict[str, str]:
+    """
+    Image to upload with each event's post, from the calendar output.
+
+    The image_variants variant of the first of `networks` with one, resolved with
+    variant_for_row: re-rendered from the original when the variant was evicted,
+    or the original itself when it cannot be rendered.
+
+    Args:
+        images_csv (Optional[str]): Calendar output (scraping_solo_un_evento) with the image columns
+        event_urls (List[str]): Events about to be published
+        networks (list): (icon_class, network_name) pairs toggled on each post
+
+    Returns:
+        Dict[str, str]: Event URL -> image path, for the events that have an image
+    """
+    from image_variants import ImageVariants, variant_for_row
+    from link_canonical import canonicalize_url
+
+    network = next((VARIANT_NETWORKS[icon] for icon, _ in networks if icon in VARIANT_NETWORKS), None)
+    if not images_csv or not os.path.exists(images_csv) or network is None:
+        return {}
+    wanted = {canonicalize_url(event_url): event_url for event_url in event_urls}
+    images = {}
+    with ImageVariants(networks=[network], workers=0) as cache:
+        for row in read_rows(images_csv):
+            event_url = wanted.get(canonicalize_url(row.get('event_url') or ''))
+            if event_url is not None and (image_path := variant_for_row(row, network, cache)):
+                images[event_url] = image_path
+    return images
+
+def read_tweet_queue(csv_path: str, published: Optional[Checkpoint] = None,
+                     only: Optional[set] = None) -> List[Tuple[str, str]]:
+    """
+    (event_url, tweet) pairs from the scraper output that still have to be published.
+
+    Failed generations ("Error: ...") and tweets already in the published ledger are skipped,
+    and so are events not in `only` when it is given.
+    """
+    from scraping_finetuning import _event_url_of
+
+    pending = []
+    for row in read_rows(csv_path):
+        tweet_text = (row.get('Tweet') or '').strip()
+        if not tweet_text or tweet_text.startswith('Error:'):
+            continue
+        event_url = _event_url_of(row)
+        if published is not None and event_url in published:
+            continue
+        if only is not None and event_url not in only:
+            continue
+        pending.append((event_url, tweet_text))
+    return pending
+
+def publish_queue(tweets: List[Tuple[str, str]], pool: DriverPool, published: Optional[Checkpoint] = None,
+                  networks=NETWORKS, images: Optional[Dict[str, str]] = None) -> List[float]:
+    """
+    Publish every queued tweet through the pool's sessions, with its event's image from `images` (see post_images).
+
+    Returns:
+        List[float]: Latency in seconds of each successful post
+    """
+    latencies = []
+
+    def publish_one(item):
+        try:
+            with pool.acquire() as session:
+                return _publish_one(session, item, published, networks, images)
+        except Exception:
+            return None  # Logged by _publish_one (or _new_session); acquire reset or dropped the session
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        for latency in executor.map(publish_one, tweets):
+            if latency is not None:
+                latencies.append(latency)
+    return latencies
+
+def schedule_batch(tweets: List[Tuple[str, str]], session: MetricoolSession, published: Optional[Checkpoint] = None,
+                   networks=NETWORKS, images: Optional[Dict[str, str]] = None) -> List[float]:
+    """
+    Create every queued post back to back in one planner session.
+
+    The planner stays open between posts, so each post costs only the editor
+    round trip: open the editor, fill it (text and image from `images`), one
+    JS dispatch for the network toggles, submit.
+
+    Returns:
+        List[float]: Latency in seconds of each successful post
+    """
+    latencies = []
+    for item in tweets:
+        try:
+            latencies.append(_publish_one(session, item, published, networks, images))
+        except Exception:
+            try:
+                session.open_planner()  # Back to a clean planner for the next post
+            except Exception as e:
+                logger.error(f"Planner session lost, stopping the batch: {e}")
+                break
+    return latencies
+
+def _publish_one(session: MetricoolSession, item: Tuple[str, str], published: Optional[Checkpoint],
+                 networks, images: Optional[Dict[str, str]] = None) -> float:
+    """
+    Publish one queued tweet and mark it in the ledger.
+
+    Returns:
+        float: Latency of the post in seconds
+
+    Raises:
+        Exception: The publish failure, after logging it; the caller resets the session
+    """
+    event_url, tweet_text = item
+    start = time.perf_counter()
+    try:
+        with timer('publish_post'):
+            session.publish(tweet_text, networks, (images or {}).get(event_url))
+    except Exception as e:
+        logger.error(f"Failed to publish {event_url}: {e}")
+        raise
+    latency = time.perf_counter() - start
+    if published is not None:
+        published.mark(event_url)
+    logger.info(f"Published {event_url} in {latency:.2f} s")
+    return latency
+
+def latency_report(latencies: List[float], total: int, elapsed: Optional[float] = None) -> str:
+    if not latencies:
+        return f"Published 0/{total} posts"
+    report = (f"Published {len(latencies)}/{total} posts; latency p50 {percentile(latencies, 50):.2f} s, "
+              f"p95 {percentile(latencies, 95):.2f} s, max {max(latencies):.2f} s")
+    if elapsed:
+        report += f"; {len(latencies) * 60 / elapsed:.1f} posts/min"
+    return report
+
+def publish_tweets(csv_path: str, workers: int = 2, base_url: str = BASE_URL, limit: Optional[int] = None,
+                   headless: bool = True, dry_run: bool = False, batch: bool = False,
+                   upcoming_days: Optional[float] = None, event_index_path: str = DEFAULT_INDEX_PATH,
+                   images_csv: Optional[str] = DEFAULT_IMAGES_CSV) -> int:
+    """
+    Publish the pending tweets of a scraper CSV through a pool of browsers.
+
+    Args:
+        csv_path (str): Scraper output with a Tweet column
+        workers (int): Browsers kept logged in
+        base_url (str): Metricool (or stub page) URL
+        limit (int): Publish at most this many tweets
+        headless (bool): Run the browsers without windows
+        dry_run (bool): Only print the queued tweets
+        batch (bool): Schedule every post in a single planner session instead of the pool
+        upcoming_days (Optional[float]): Only publish events starting within this many days
+                                         (looked up in the event index)
+        event_index_path (str): Event index used by upcoming_days
+        images_csv (Optional[str]): Calendar output with the event images, None to post text only
+
+    Returns:
+        int: Exit status, 0 if every queued tweet was published
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    published = Checkpoint(csv_path + '.published')
+    try:
+        only = None
+        if upcoming_days is not None:
+            with EventIndex(event_index_path) as event_index:
+                only = {event['event_url'] for event in event_index.upcoming(upcoming_days)}
+        tweets = read_tweet_queue(csv_path, published, only)[:limit]
+        logger.info(f"{len(tweets)} tweets queued for publishing")
+        images = post_images(images_csv, [event_url for event_url, _ in tweets])
+        if images:
+            logger.info(f"{len(images)} posts carry an image")
+        if dry_run:
+            for event_url, tweet_text in tweets:
+                image = f"\n[{images[event_url]}]" if event_url in images else ""
+                print(f"{event_url}\n{tweet_text}{image}\n")
+            return 0
+
+        email = os.getenv('METRICOOL_EMAIL')
+        password = os.getenv('METRICOOL_PASSWORD')
+        if not email or not password:
+            logger.error("Please set METRICOOL_EMAIL and METRICOOL_PASSWORD in your .env file")
+            return 1
+
+        pool = DriverPool(1 if batch else workers, email, password, headless=headless, base_url=base_url)
+        start = time.perf_counter()
+        try:
+            if batch:
+                with pool.acquire() as session:
+                    latencies = schedule_batch(tweets, session, published, images=images)
+            else:
+                latencies = publish_queue(tweets, pool, published, images=images)
+        finally:
+            pool.close()
+        logger.info(latency_report(latencies, len(tweets), time.perf_counter() - start))
+        return 0 if len(latencies) == len(tweets) else 1
+    finally:
+        published.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--csv', default=os.path.join('events_output', 'events_with_tweets.csv'),
+                        help='Scraper output with a Tweet column')
+    parser.add_argument('--workers', type=int, default=2, help='Browsers kept logged in')
+    parser.add_argument('--base-url', default=BASE_URL, help='Metricool (or stub page) URL')
+    parser.add_argument('--limit', type=int, help='Publish at most N tweets')
+    parser.add_argument('--no-headless', action='store_true', help='Show the browser windows')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the queued tweets')
+    parser.add_argument('--batch', action='store_true', help='Schedule every post in one planner session')
+    parser.add_argument('--upcoming-days', type=float, help='Only publish events starting within N days')
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='Event index for --upcoming-days')
+    parser.add_argument('--images', default=DEFAULT_IMAGES_CSV, help='Calendar output with the event images')
+    parser.add_argument('--no-images', action='store_true', help='Post the tweets without images')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    return publish_tweets(args.csv, args.workers, args.base_url, args.limit,
+                          headless=not args.no_headless, dry_run=args.dry_run, batch=args.batch,
+                          upcoming_days=args.upcoming_days, event_index_path=args.index,
+                          images_csv=None if args.no_images else args.images)
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+# metrics.py
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Counter suffixes that make up the lookups of a cache (hit rate = hit / all of them)
+CACHE_OUTCOMES = ('hit', 'revalidated', 'miss')
+
+# Profiler wrapped around each instrumented run: "cprofile", "pyinstrument" or unset
+PROFILE_ENV = "SCRAPER_PROFILE"
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+class Metrics:
+    """
+    Thread-safe stage timers and counters for one run.
+
+    timer(stage) records the wall time of each pass through a stage; incr(name)
+    counts events such as bytes transferred or cache hits and misses. Counters
+    named "<cache>.hit" / "<cache>.revalidated" / "<cache>.miss" are turned into
+    hit rates in summary().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.counters = Counter()
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.timings[stage].append(elapsed)
+
+    def incr(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] += n
+
+    def summary(self) -> dict:
+        """Per-stage count/total/p50/p95/max, raw counters and cache hit rates."""
+        with self.lock:
+            timings = {stage: list(values) for stage, values in self.timings.items()}
+            counters = dict(self.counters)
+
+        stages = {}
+        for stage, values in sorted(timings.items()):
+            stages[stage] = {
+                'count': len(values),
+                'total_s': round(sum(values), 3),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'max_ms': round(max(values) * 1000, 2),
+            }
+
+        hit_rates = {}
+        for name in counters:
+            if name.endswith('.hit'):
+                cache = name[:-len('.hit')]
+                lookups = sum(counters.get(f"{cache}.{outcome}", 0) for outcome in CACHE_OUTCOMES)
+                hit_rates[cache] = round(counters[name] / lookups, 3) if lookups else None
+
+        return {
+            'wall_s': round(time.perf_counter() - self.started, 3),
+            'stages': stages,
+            'counters': dict(sorted(counters.items())),
+            'cache_hit_rates': hit_rates,
+        }
+
+    def write_summary(self, path: str) -> dict:
+        summary = self.summary()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+_metrics = Metrics()
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics of the current run."""
+    return _metrics
+
+def reset_metrics() -> Metrics:
+    """Start a new run: replace the process-wide metrics with empty ones."""
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+def timer(stage: str):
+    """Time a stage on the current run's metrics: `with timer('event_fetch'): ...`."""
+    return _metrics.timer(stage)
+
+def incr(name: str, n: int = 1):
+    _metrics.incr(name, n)
+
+@contextmanager
+def profiled(profiler: Optional[str], path: str):
+    """
+    Optionally profile a block with cProfile or pyinstrument.
+
+    Args:
+        profiler (Optional[str]): "cprofile", "pyinstrument", or None to do nothing
+        path (str): Output path without extension (.prof for cProfile, .html for pyinstrument)
+    """
+    if not profiler:
+        yield
+        return
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profiler_obj = Profiler()
+        profiler_obj.start()
+        try:
+            yield
+        finally:
+            profiler_obj.stop()
+            with open(path + '.html', 'w', encoding='utf-8') as f:
+                f.write(profiler_obj.output_html())
+        return
+    if profiler != 'cprofile':
+        raise ValueError(f"Unknown profiler {profiler!r}; use 'cprofile' or 'pyinstrument'")
+
+    import cProfile
+
+    profiler_obj = cProfile.Profile()
+    profiler_obj.enable()
+    try:
+        yield
+    finally:
+        profiler_obj.disable()
+        profiler_obj.dump_stats(path + '.prof')
+
+def report_run(name: str, directory: str):
+    """
+    Decorator for a run entry point (scraping, scrape_calendar).
+
+    Each call starts with fresh metrics, runs under the profiler named by the
+    SCRAPER_PROFILE env var (if any), and ends by writing <directory>/<name>_metrics.json
+    and logging the same JSON summary.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = reset_metrics()
+            os.makedirs(directory, exist_ok=True)
+            try:
+                with profiled(os.getenv(PROFILE_ENV), os.path.join(directory, f"{name}_profile")):
+                    return func(*args, **kwargs)
+            finally:
+                summary = metrics.write_summary(os.path.join(directory, f"{name}_metrics.json"))
+                logging.getLogger(func.__module__).info(f"Run metrics: {json.dumps(summary)}")
+        return wrapper
+    return decorator
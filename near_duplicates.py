@@ -0,0 +1,251 @@
+# near_duplicates.py
+"""
+Near-duplicate event detection with shingling and MinHash/LSH.
+
+Usage:
+    python near_duplicates.py [SOURCE] [--threshold 0.8] [--num-perm 128] [--json]
+
+The ITAM site republishes events under new URLs with small edits (a changed
+date, a fixed typo). Each event's title and description are folded (lowercase,
+no accents or punctuation) and cut into character shingles; a MinHash
+signature of the shingle set is split into LSH bands, and only events sharing
+a band bucket are compared, so candidates are found without comparing every
+pair. Candidates are confirmed with the exact Jaccard similarity of their
+shingle sets. The extractor's "No ... found" placeholders are not part of the
+text, and events left with fewer than MIN_SHINGLES shingles (a short title and
+no description) are too little text to compare: they are never flagged nor
+indexed.
+
+NearDuplicateDetector is a streaming pipeline stage: each event is checked
+against the ones seen before it, the first of a cluster is kept and later
+copies are reported as duplicates of it. The CLI prints the clusters of a
+scraper output file or event archive (default: events_output/events_with_tweets.csv).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from event_dates import MISSING_VALUES
+
+DEFAULT_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+DEFAULT_NUM_PERM = 128
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 40  # About 45 characters of text, more than most titles alone
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+_EMPTY = _MAX_HASH
+_DENSIFY_OFFSET = 1 << 61  # Keeps borrowed values apart from a bin's own minimum
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits into single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(_NON_ALNUM_RE.sub(' ', folded).split())
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> frozenset:
+    """Hashed (CRC-32) character k-shingles of the normalized text."""
+    text = normalize_text(text)
+    if len(text) <= k:
+        return frozenset([zlib.crc32(text.encode('utf-8'))]) if text else frozenset()
+    return frozenset(zlib.crc32(text[i:i + k].encode('utf-8')) for i in range(len(text) - k + 1))
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    (bands, rows) for the LSH index.
+
+    The most selective split (most rows per band) under which a pair at the
+    threshold still becomes a candidate with probability >= 0.95; pairs below it
+    mostly never meet, and the exact Jaccard check removes the rest.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= 0.95:
+            best = (bands, rows)
+    return best
+
+class MinHasher:
+    """
+    MinHash signatures by one-permutation hashing.
+
+    Each shingle is hashed once (a * x + b mod 2^61 - 1) and falls into one of
+    num_perm bins; the signature is the minimum of each bin, and an empty bin
+    borrows the value of the next non-empty one (rotation densification). Two
+    signatures agree on a position with probability close to the Jaccard
+    similarity of the sets, at the cost of one hash per shingle instead of num_perm.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.a = rng.randrange(1, _MERSENNE_PRIME)
+        self.b = rng.randrange(0, _MERSENNE_PRIME)
+
+    def signature(self, shingle_set: frozenset) -> Tuple[int, ...]:
+        num_perm = self.num_perm
+        if not shingle_set:
+            return tuple([_MAX_HASH] * num_perm)
+        bins = [_EMPTY] * num_perm
+        a, b = self.a, self.b
+        for h in shingle_set:
+            value = (a * h + b) % _MERSENNE_PRIME
+            slot, value = value % num_perm, value // num_perm
+            if value < bins[slot]:
+                bins[slot] = value
+        signature = bins[:]
+        nearest = position = None
+        for slot in range(2 * num_perm - 1, -1, -1):  # Twice around, so the last bins can borrow from the first
+            value = bins[slot % num_perm]
+            if value != _EMPTY:
+                nearest, position = value, slot
+            elif slot < num_perm:
+                signature[slot] = nearest + (position - slot) * _DENSIFY_OFFSET
+        return tuple(signature)
+
+class NearDuplicateDetector:
+    """
+    Streaming near-duplicate filter over event title + description.
+
+    Args:
+        threshold (float): Jaccard similarity of the shingle sets from which two events are duplicates
+        num_perm (int): MinHash functions per signature
+        shingle_size (int): Characters per shingle
+        min_shingles (int): Shingles an event needs to be checked at all
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                 shingle_size: int = SHINGLE_SIZE, min_shingles: int = MIN_SHINGLES):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets: List[Dict[Tuple[int, ...], List[str]]] = [defaultdict(list) for _ in range(self.bands)]
+        self.shingle_sets: Dict[str, frozenset] = {}
+        self.titles: Dict[str, str] = {}
+        self.representative: Dict[str, str] = {}
+        self.similarity: Dict[str, float] = {}
+        self.candidates_checked = 0
+        self.too_short = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def check(self, key: str, title: str, description: str = '') -> Optional[str]:
+        """
+        Add an event and return the key of the kept event it duplicates, or None if it is new.
+
+        A key already seen (e.g. the same canonical URL re-scraped) is never its own duplicate,
+        and an event with too little text (see MIN_SHINGLES) is always new and not indexed.
+
+        Args:
+            key (str): Event identity, e.g. its canonical URL
+            title (str): Event title
+            description (str): Event description
+        """
+        if key in self.shingle_sets:
+            return None if self.representative[key] == key else self.representative[key]
+        text = ' '.join(part for part in (title, description) if part and part not in MISSING_VALUES)
+        shingle_set = shingles(text, self.shingle_size)
+        if len(shingle_set) < self.min_shingles:
+            self.too_short += 1
+            return None
+        signature = self.hasher.signature(shingle_set)
+        band_keys = list(self._band_keys(signature))
+
+        candidates = {other for band, band_key in band_keys for other in self.buckets[band].get(band_key, ())}
+        best, best_similarity = None, 0.0
+        for other in candidates:
+            self.candidates_checked += 1
+            similarity = jaccard(shingle_set, self.shingle_sets[other])
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = other, similarity
+
+        self.shingle_sets[key] = shingle_set
+        self.titles[key] = title
+        self.representative[key] = self.representative[best] if best is not None else key
+        if best is not None:
+            self.similarity[key] = round(best_similarity, 4)
+        for band, band_key in band_keys:
+            self.buckets[band][band_key].append(key)  # Copies are indexed too, so later copies match any member
+        return None if best is None else self.representative[key]
+
+    def seed(self, events: Iterable[Tuple[str, str, str]]):
+        """Add already published (key, title, description) events, e.g. recent ones from the event index."""
+        for key, title, description in events:
+            self.check(key, title or '', description or '')
+
+    @property
+    def duplicates(self) -> int:
+        return sum(1 for key, kept in self.representative.items() if key != kept)
+
+    def clusters(self) -> List[dict]:
+        """Clusters with at least one duplicate: the kept event and the merged copies."""
+        members = defaultdict(list)
+        for key, kept in self.representative.items():
+            if key != kept:
+                members[kept].append(key)
+        return [{'kept': kept, 'title': self.titles[kept],
+                 'merged': [{'key': key, 'title': self.titles[key], 'similarity': self.similarity[key]}
+                            for key in copies]}
+                for kept, copies in members.items()]
+
+    def report(self) -> dict:
+        return {'threshold': self.threshold, 'bands': self.bands, 'rows': self.rows,
+                'events': len(self.representative), 'duplicates': self.duplicates,
+                'too_short': self.too_short, 'candidates_checked': self.candidates_checked,
+                'clusters': self.clusters()}
+
+    def summary(self) -> str:
+        clusters = self.clusters()
+        return (f"Near duplicates: {self.duplicates} of {len(self.representative)} events merged into "
+                f"{len(clusters)} clusters (threshold {self.threshold}, "
+                f"{self.candidates_checked} candidate pairs checked, {self.too_short} too short to compare)")
+
+def write_report(detector: NearDuplicateDetector, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(detector.report(), f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=os.path.join("events_output", "events_with_tweets.csv"),
+                        help='Scraper output (CSV/JSONL) or event archive directory')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Jaccard similarity threshold')
+    parser.add_argument('--num-perm', type=int, default=DEFAULT_NUM_PERM, help='MinHash functions')
+    parser.add_argument('--json', action='store_true', help='Print the full JSON report')
+    args = parser.parse_args()
+
+    from dataset_builder import event_from_row, read_source
+    from link_canonical import canonicalize_url
+
+    detector = NearDuplicateDetector(args.threshold, args.num_perm)
+    for row in read_source(args.source):
+        event = event_from_row(row)
+        if event is not None:
+            detector.check(canonicalize_url(event.event_url), event.title, event.description)
+
+    if args.json:
+        print(json.dumps(detector.report(), ensure_ascii=False, indent=2))
+        return
+    print(detector.summary())
+    for cluster in detector.clusters():
+        print(f"\n{cluster['title']}\n  kept   {cluster['kept']}")
+        for copy in cluster['merged']:
+            print(f"  merged {copy['key']} ({copy['similarity']:.2f}) {copy['title']}")
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,31 @@
-from extract_links import extract_event_links
-from extract_title_description import extract_title_description_and_image
-from extract_links_calendar import extract_event_links_from_calendar
-from url_imagen import download_image
-from event import Event
-from tweetllm import tweet  # Import the tweet function
-from typing import List
+from extract_title_description import extract_title_description_and_image, extract_title_description_and_image_async
+from extract_links_calendar import extract_event_links_from_calendar, extract_event_links_from_calendar_async
+from event import Event, RECORD_FIELDS
+from event_archive import EventArchive
+from dataset_builder import DatasetBuilder
+from event_index import EventIndex
+from seen_events import SeenEventsIndex, content_hash
+from link_canonical import LinkDeduplicator, canonicalize_url
+from metrics import incr, report_run, timer
+from near_duplicates import DEFAULT_THRESHOLD, NearDuplicateDetector, write_report
+from token_budget import PROMPT_TOKEN_BUDGET, fit_prompt
+from csv_output import merge_rows_into_csv, merge_part_into, open_sink, read_rows, batched, Checkpoint
+from tweetllm import get_service, tweet, tweet_many  # Import the tweet functions
+from typing import Iterable, Iterator, List, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
 import logging
 import csv
 import os
+import re
 import time  # Ensure this import is at the top level
 
+# Events of the query index starting this many days back are compared against new ones
+NEAR_DUPLICATE_WINDOW_DAYS = 60
+
+# The Event text and its tweet (the fine-tuning pair), followed by the typed event columns
+FIELDNAMES = ['Event', 'Tweet'] + RECORD_FIELDS
+
 def setup_logging():
     """Configure logging for the scraping process."""
     logging.basicConfig(
@@ -22,69 +38,380 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
-def process_event_links(urls: List[str], logger: logging.Logger) -> List[dict]:
+def build_event(link: str, fields: tuple) -> Event:
     """
-    Extract and process events from a list of URLs.
+    Build the Event for an extracted event page.
     
     Args:
-        urls (List[str]): List of URLs to scrape
-        logger (logging.Logger): Logger instance
+        link (str): URL of the event page
+        fields (tuple): (title, description, image, date, time, location) as returned by the extractor
         
     Returns:
-        List[dict]: List of dictionaries containing event details and corresponding tweets
+        Event: The event
+    """
+    title, description, image, date, time_val, location = fields
+    
+    # Create Event object
+    event = Event(
+        title=title,
+        description=description,
+        image_url=image,
+        event_url=link,
+        date=date,
+        time=time_val,  # Changed variable name to avoid shadowing time module
+        location=location
+    )
+    return event
+
+def event_prompt(event: Event, max_tokens: Optional[int] = PROMPT_TOKEN_BUDGET) -> str:
+    """
+    Text sent to the LLM to generate the tweet of an event.
+
+    The description is truncated so the whole prompt fits in max_tokens tokens
+    (token_budget.fit_prompt); None sends it in full.
+    """
+    def render(description: str) -> str:
+        return f"Title: {event.title}\nDescription: {description}\nDate: {event.date}, Time: {event.time}\nLocation: {event.location}\nLink: {event.event_url}"
+
+    return fit_prompt(render, event.description, max_tokens)
+
+def event_row(event: Event, tweet_text: str) -> dict:
+    """Output row for an event and its tweet: the Event text, the tweet and the typed event columns."""
+    print(f"Tweet generado: {tweet_text}")
+    
+    return {
+        "Event": str(event),
+        "Tweet": tweet_text,
+        **event.to_record()
+    }
+
+def build_event_with_tweet(link: str, fields: tuple) -> dict:
+    """
+    Build the Event for an extracted event page and generate its tweet.
+    
+    Args:
+        link (str): URL of the event page
+        fields (tuple): (title, description, image, date, time, location) as returned by the extractor
+        
+    Returns:
+        dict: Dictionary with the "Event" string and its "Tweet"
+    """
+    event = build_event(link, fields)
+    return event_row(event, tweet(event_prompt(event)))
+
+def _event_url_of(row: dict) -> str:
+    """Merge key of a CSV row: the event URL, recovered from the Event text for rows read back from disk."""
+    if row.get("event_url"):
+        return row["event_url"]
+    match = re.search(r'^URL: (.*)$', row["Event"], re.MULTILINE)
+    return match.group(1) if match else row["Event"]
+
+def _is_unchanged(index: Optional[SeenEventsIndex], link: str, fields: tuple,
+                  logger: logging.Logger) -> Optional[str]:
+    """
+    Compare the extracted fields with the seen-events index.
+    
+    Returns:
+        Optional[str]: None if the event is unchanged (and should be skipped), its content hash otherwise
+    """
+    digest = content_hash(fields)
+    if index is not None and index.is_unchanged(link, digest):
+        index.touch(link)
+        incr('events.unchanged')
+        logger.info(f"Skipping unchanged event: {fields[0]}")
+        return None
+    return digest
+
+def _record_processed(index: Optional[SeenEventsIndex], link: str, digest: str, event_with_tweet: dict):
+    """Store a freshly tweeted event in the index; failed tweets are left out so they are retried."""
+    if index is not None and not event_with_tweet["Tweet"].startswith("Error:"):
+        index.record(link, digest, event_with_tweet["Tweet"])
+
+def _is_near_duplicate(near_dups: Optional[NearDuplicateDetector], link: str, title: str, description: str,
+                       logger: logging.Logger) -> bool:
+    """Whether the event is a near copy (title + description) of one already kept, under another URL."""
+    if near_dups is None:
+        return False
+    kept = near_dups.check(canonicalize_url(link), title, description)
+    if kept is None:
+        return False
+    incr('events.near_duplicates')
+    logger.info(f"Skipping near duplicate of {kept}: {title}")
+    return True
+
+def _recently_checked(index: Optional[SeenEventsIndex], link: str, refresh_after: Optional[float],
+                      logger: logging.Logger) -> bool:
+    """Whether a known event was checked recently enough to skip fetching it at all."""
+    if index is not None and refresh_after is not None and index.checked_within(link, refresh_after):
+        incr('events.recently_checked')
+        logger.info(f"Skipping recently checked event: {link}")
+        return True
+    return False
+
+def iter_event_links(urls: List[str], logger: logging.Logger,
+                     dedup: Optional[LinkDeduplicator] = None) -> Iterator[str]:
     """
-    events_with_tweets = []
+    Fetch stage: yield the event links of each bulletin, one bulletin at a time.
     
+    Links are yielded in canonical form, and only the first time they appear in
+    the run: an event linked from several bulletins is processed once.
+    
+    Args:
+        urls (List[str]): Bulletin URLs
+        logger (logging.Logger): Logger instance
+        dedup (Optional[LinkDeduplicator]): Run-wide set of links already yielded
+    """
+    dedup = dedup if dedup is not None else LinkDeduplicator()
     for url in urls:
         try:
             logger.info(f"Processing URL: {url}")
             event_links = extract_event_links_from_calendar(url)
             logger.info(f"Found {len(event_links)} event links in {url}")
-            
-            for link in event_links:
-                try:
-                    title, description, image, date, time_val, location = extract_title_description_and_image(link)
-                    
-                    # Create Event object
-                    event = Event(
-                        title=title,
-                        description=description,
-                        image_url=image,
-                        event_url=link,
-                        date=date,
-                        time=time_val,  # Changed variable name to avoid shadowing time module
-                        location=location
-                    )
-                    
-                    # Generate tweet for the event
-                    event_str = f"Title: {event.title}\nDescription: {event.description}\nDate: {event.date}, Time: {event.time}\nLocation: {event.location}\nLink: {event.event_url}"
-                    tweet_text = tweet(event_str)
-                    print(f"Tweet generado: {tweet_text}")
-                    
-                    # Append event and tweet as a dictionary
-                    events_with_tweets.append({
-                        "Event": str(event),
-                        "Tweet": tweet_text
-                    })
-                    
-                    logger.info(f"Successfully processed event: {event.title}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing event link {link}: {str(e)}")
-                    continue
-                
         except Exception as e:
             logger.error(f"Error processing URL {url}: {str(e)}")
+            continue
+        yield from dedup.filter(event_links)
+
+def iter_extracted_events(links: Iterable[str], logger: logging.Logger, index: Optional[SeenEventsIndex] = None,
+                          refresh_after: Optional[float] = None,
+                          checkpoint: Optional[Checkpoint] = None,
+                          failed: Optional[Set[str]] = None) -> Iterator[tuple[str, str, Event]]:
+    """
+    Parse and Event stages: fetch each event page and yield (link, content hash, Event).
+    
+    Links already written by an interrupted run (checkpoint), recently checked ones
+    and unchanged ones (seen-events index) are skipped. Links whose page cannot be
+    fetched or parsed are logged and added to failed, when given.
+    """
+    for link in links:
+        if checkpoint is not None and link in checkpoint:
+            continue
+        if _recently_checked(index, link, refresh_after, logger):
+            continue
+        try:
+            fields = extract_title_description_and_image(link)
+            digest = _is_unchanged(index, link, fields, logger)
+            if digest is None:
+                continue
+            yield link, digest, build_event(link, fields)
+            
+        except Exception as e:
+            logger.error(f"Error processing event link {link}: {str(e)}")
+            if failed is not None:
+                failed.add(link)
+            continue
+
+def iter_distinct_events(events: Iterable[tuple[str, str, Event]], logger: logging.Logger,
+                         near_dups: Optional[NearDuplicateDetector] = None) -> Iterator[tuple[str, str, Event]]:
+    """Near-duplicate stage: drop events that repeat (almost word for word) one already kept."""
+    for link, digest, event in events:
+        if not _is_near_duplicate(near_dups, link, event.title, event.description, logger):
+            yield link, digest, event
+
+def iter_tweeted_events(events: Iterable[tuple[str, str, Event]], logger: logging.Logger,
+                        index: Optional[SeenEventsIndex] = None, pack_size: int = 1,
+                        batch_size: int = 8) -> Iterator[dict]:
+    """
+    Tweet stage: generate tweets for small batches of events through tweetllm.tweet_many
+    (concurrent, cached requests) and yield one row per event.
+    """
+    for batch in batched(events, max(batch_size, pack_size)):
+        with timer('tweet'):
+            tweets = tweet_many([event_prompt(event) for _, _, event in batch], pack_size=pack_size)
+        for (link, digest, event), tweet_text in zip(batch, tweets):
+            # Event and tweet as a dictionary
+            event_with_tweet = event_row(event, tweet_text)
+            _record_processed(index, link, digest, event_with_tweet)
+            
+            logger.info(f"Successfully processed event: {event.title}")
+            yield event_with_tweet
+
+def process_event_links(urls: List[str], logger: logging.Logger, index: Optional[SeenEventsIndex] = None,
+                        refresh_after: Optional[float] = None, pack_size: int = 1,
+                        near_dups: Optional[NearDuplicateDetector] = None) -> List[dict]:
+    """
+    Extract and process events from a list of URLs.
+    
+    With a seen-events index, events whose extracted fields hash the same as on a
+    previous run are skipped (no tweet, no output row), and events checked less
+    than refresh_after seconds ago are not even fetched. With a near-duplicate
+    detector, events repeating the title and description of one already kept are
+    dropped before the tweet stage. Use stream_event_links to write rows as they
+    are produced instead of collecting them in a list.
+    
+    Args:
+        urls (List[str]): List of URLs to scrape
+        logger (logging.Logger): Logger instance
+        index (Optional[SeenEventsIndex]): Index of already processed events
+        refresh_after (Optional[float]): Seconds during which a checked event is not re-fetched
+        pack_size (int): Events packed into each LLM request
+        near_dups (Optional[NearDuplicateDetector]): Near-duplicate detector, None to keep every event
+        
+    Returns:
+        List[dict]: List of dictionaries containing event details and corresponding tweets
+    """
+    dedup = LinkDeduplicator()
+    events = iter_extracted_events(iter_event_links(urls, logger, dedup), logger, index, refresh_after)
+    events = iter_distinct_events(events, logger, near_dups)
+    events_with_tweets = list(iter_tweeted_events(events, logger, index, pack_size))
+    _log_dedup(dedup, events_with_tweets, logger)
+    return events_with_tweets
+
+def _log_dedup(dedup: LinkDeduplicator, events_with_tweets: Iterable[dict], logger: logging.Logger):
+    """Count the links whose events were tweeted and log what deduplication saved."""
+    for event_with_tweet in events_with_tweets:
+        if not event_with_tweet["Tweet"].startswith("Error:"):
+            dedup.mark_tweeted(event_with_tweet["event_url"])
+    incr('links.duplicates', dedup.fetches_avoided)
+    logger.info(dedup.summary())
+
+def _write_row(sink, event_with_tweet: dict, index: Optional[SeenEventsIndex], checkpoint: Optional[Checkpoint]):
+    """Sink stage: write one row, then persist the index and checkpoint now that the row is on disk."""
+    with timer('sink_write'):
+        sink.write(event_with_tweet)
+    incr('events.written')
+    if index is not None:
+        index.commit()
+    if checkpoint is not None:
+        checkpoint.mark(event_with_tweet["event_url"])
+
+def stream_event_links(urls: List[str], logger: logging.Logger, sink, checkpoint: Optional[Checkpoint] = None,
+                       index: Optional[SeenEventsIndex] = None, refresh_after: Optional[float] = None,
+                       pack_size: int = 1, near_dups: Optional[NearDuplicateDetector] = None) -> int:
+    """
+    Run the fetch -> parse -> Event -> near duplicates -> tweet -> sink pipeline, writing each row as soon as it is ready.
+    
+    Args:
+        urls (List[str]): List of URLs to scrape
+        logger (logging.Logger): Logger instance
+        sink: CsvSink or JsonlSink receiving the rows
+        checkpoint (Optional[Checkpoint]): Event URLs already written; updated after each row
+        index (Optional[SeenEventsIndex]): Index of already processed events
+        refresh_after (Optional[float]): Seconds during which a checked event is not re-fetched
+        pack_size (int): Events packed into each LLM request
+        near_dups (Optional[NearDuplicateDetector]): Near-duplicate detector, None to keep every event
+        
+    Returns:
+        int: Number of rows written
+    """
+    dedup = LinkDeduplicator()
+    events = iter_extracted_events(iter_event_links(urls, logger, dedup), logger, index, refresh_after, checkpoint)
+    events = iter_distinct_events(events, logger, near_dups)
+    written = []
+    for event_with_tweet in iter_tweeted_events(events, logger, index, pack_size):
+        _write_row(sink, event_with_tweet, index, checkpoint)
+        written.append(event_with_tweet)
+    _log_dedup(dedup, written, logger)
+    return len(written)
+
+async def _process_event_link_async(session, link: str, logger: logging.Logger,
+                                    index: Optional[SeenEventsIndex] = None,
+                                    refresh_after: Optional[float] = None, sink=None,
+                                    checkpoint: Optional[Checkpoint] = None,
+                                    near_dups: Optional[NearDuplicateDetector] = None) -> Optional[dict]:
+    """Fetch one event page and generate its tweet; returns None on failure or when skipped."""
+    if checkpoint is not None and link in checkpoint:
+        return None
+    if _recently_checked(index, link, refresh_after, logger):
+        return None
+    try:
+        fields = await extract_title_description_and_image_async(session, link)
+        digest = _is_unchanged(index, link, fields, logger)
+        if digest is None:
+            return None
+        # Checked and added with no await in between, so concurrent copies cannot both pass
+        if _is_near_duplicate(near_dups, link, fields[0], fields[1], logger):
+            return None
+        
+        # Tweet generation is blocking (requests), so it runs in the default executor
+        loop = asyncio.get_running_loop()
+        with timer('tweet'):
+            event_with_tweet = await loop.run_in_executor(None, build_event_with_tweet, link, fields)
+        _record_processed(index, link, digest, event_with_tweet)
+        if sink is not None:
+            _write_row(sink, event_with_tweet, index, checkpoint)
+        
+        logger.info(f"Successfully processed event: {fields[0]}")
+        return event_with_tweet
+        
+    except Exception as e:
+        logger.error(f"Error processing event link {link}: {str(e)}")
+        return None
+
+async def _process_bulletin_async(session, url: str, logger: logging.Logger,
+                                  index: Optional[SeenEventsIndex] = None,
+                                  refresh_after: Optional[float] = None, sink=None,
+                                  checkpoint: Optional[Checkpoint] = None,
+                                  dedup: Optional[LinkDeduplicator] = None,
+                                  near_dups: Optional[NearDuplicateDetector] = None) -> List[dict]:
+    """Extract the event links of one bulletin and process concurrently those not seen yet in the run."""
+    dedup = dedup if dedup is not None else LinkDeduplicator()
+    try:
+        logger.info(f"Processing URL: {url}")
+        event_links = await extract_event_links_from_calendar_async(session, url)
+        logger.info(f"Found {len(event_links)} event links in {url}")
+    except Exception as e:
+        logger.error(f"Error processing URL {url}: {str(e)}")
+        return []
+    
+    # Filtered synchronously, before any await, so concurrent bulletins never both claim a link
+    results = await asyncio.gather(*(_process_event_link_async(session, link, logger, index, refresh_after,
+                                                               sink, checkpoint, near_dups)
+                                     for link in list(dedup.filter(event_links))))
+    return [result for result in results if result is not None]
+
+async def process_event_links_async(urls: List[str], logger: logging.Logger, max_per_host: int = 8,
+                                    timeout: float = 30, index: Optional[SeenEventsIndex] = None,
+                                    refresh_after: Optional[float] = None, sink=None,
+                                    checkpoint: Optional[Checkpoint] = None,
+                                    near_dups: Optional[NearDuplicateDetector] = None) -> List[dict]:
+    """
+    Concurrent counterpart of process_event_links built on asyncio/aiohttp.
+    
+    Bulletins and event pages are fetched concurrently, with at most max_per_host
+    open connections to any single host. Results keep the order of the sequential
+    version (bulletin order, then link order within each bulletin), except that a
+    link shared by several bulletins is processed with whichever bulletin arrives
+    first. With a sink, each row is also written (and checkpointed) as soon as its
+    tweet is ready.
+    
+    Args:
+        urls (List[str]): List of URLs to scrape
+        logger (logging.Logger): Logger instance
+        max_per_host (int): Maximum number of simultaneous connections per host
+        timeout (float): Total timeout in seconds for each request
+        index (Optional[SeenEventsIndex]): Index of already processed events
+        refresh_after (Optional[float]): Seconds during which a checked event is not re-fetched
+        sink: Optional CsvSink or JsonlSink receiving rows as they complete
+        checkpoint (Optional[Checkpoint]): Event URLs already written; updated after each row
+        near_dups (Optional[NearDuplicateDetector]): Near-duplicate detector, None to keep every event
+        
+    Returns:
+        List[dict]: List of dictionaries containing event details and corresponding tweets
+    """
+    import aiohttp
     
+    dedup = LinkDeduplicator()
+    connector = aiohttp.TCPConnector(limit_per_host=max_per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        per_bulletin = await asyncio.gather(*(_process_bulletin_async(session, url, logger, index, refresh_after,
+                                                                      sink, checkpoint, dedup, near_dups)
+                                              for url in urls))
+    
+    events_with_tweets = [event_with_tweet for events in per_bulletin for event_with_tweet in events]
+    _log_dedup(dedup, events_with_tweets, logger)
     return events_with_tweets
 
-def save_events_to_csv(events_with_tweets: List[dict], filename: str = "events_with_tweets.csv") -> str:
+def save_events_to_csv(events_with_tweets: List[dict], filename: str = "events_with_tweets.csv",
+                       merge: bool = True) -> str:
     """
     Save events and their corresponding tweets to a CSV file.
     
     Args:
         events_with_tweets (List[dict]): List of dictionaries containing events and tweets
         filename (str): Name of the output file
+        merge (bool): Merge into the existing file by event URL instead of overwriting it
         
     Returns:
         str: Path to the saved file
@@ -94,10 +421,14 @@ def save_events_to_csv(events_with_tweets: List[dict], filename: str = "events_w
         os.makedirs(output_dir)
         
     filepath = os.path.join(output_dir, filename)
+    fieldnames = FIELDNAMES
+    
+    if merge:
+        merge_rows_into_csv(filepath, events_with_tweets, fieldnames, key=_event_url_of)
+        return filepath
     
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['Event', 'Tweet']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
         
         writer.writeheader()
         for event_with_tweet in events_with_tweets:
@@ -105,21 +436,122 @@ def save_events_to_csv(events_with_tweets: List[dict], filename: str = "events_w
     
     return filepath
 
-def scraping(urls: List[str]):
+def near_duplicate_detector(threshold: Optional[float], event_index_path: Optional[str],
+                            window_days: Optional[float] = NEAR_DUPLICATE_WINDOW_DAYS) -> Optional[NearDuplicateDetector]:
     """
-    Scrape event details and generate tweets, saving them to a CSV file.
+    Near-duplicate detector seeded with the events of the query index that started
+    in the last window_days days (every indexed event with None); None when threshold is None.
+    """
+    if threshold is None:
+        return None
+    near_dups = NearDuplicateDetector(threshold)
+    if event_index_path and os.path.exists(event_index_path):
+        start = datetime.now() - timedelta(days=window_days) if window_days is not None else None
+        with EventIndex(event_index_path) as event_index:
+            recent = event_index.query(start=start, limit=None)
+        near_dups.seed((row['canonical_url'], row['title'], row['description']) for row in recent)
+    return near_dups
+
+def finish_part(part_file: str, output_file: str, logger: logging.Logger,
+                archive_dir: Optional[str] = os.path.join("events_output", "archive"),
+                event_index_path: Optional[str] = os.path.join("events_output", "events.sqlite3"),
+                dataset_dir: Optional[str] = os.path.join("events_output", "dataset")) -> int:
+    """
+    Append a completed part file to the event archive, the query index and the
+    fine-tuning dataset, then merge it into the output (by event URL) and remove it.
+    
+    Returns:
+        int: Rows in the output after the merge
+    """
+    if archive_dir:
+        archived = EventArchive(archive_dir, extra_fields=['Event', 'Tweet']).append(read_rows(part_file))
+        if archived:
+            logger.info(f"Events archived to {archived}")
+    if event_index_path:
+        with EventIndex(event_index_path) as event_index:
+            event_index.upsert(read_rows(part_file))
+    if dataset_dir:
+        added = DatasetBuilder(dataset_dir).add_rows(read_rows(part_file))
+        logger.info(f"{added} new training examples added to {dataset_dir}")
+    return merge_part_into(part_file, output_file, FIELDNAMES, key=_event_url_of)
+
+@report_run("scraping", "events_output")
+def scraping(urls: List[str], concurrent: bool = False, max_per_host: int = 8,
+             index_path: Optional[str] = os.path.join("events_output", "seen_events.sqlite3"),
+             refresh_after: Optional[float] = None, pack_size: int = 1, output_format: str = "csv",
+             archive_dir: Optional[str] = os.path.join("events_output", "archive"),
+             dataset_dir: Optional[str] = os.path.join("events_output", "dataset"),
+             event_index_path: Optional[str] = os.path.join("events_output", "events.sqlite3"),
+             near_duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD):
+    """
+    Scrape event details and generate tweets, merging them into a CSV or JSONL file.
+    
+    Rows are streamed to a part file next to the output as soon as each tweet is
+    ready, with a checkpoint of the event URLs already written. If the run is
+    interrupted, the next one resumes from the checkpoint; once it completes, the
+    part file is appended to the columnar event archive, the query index
+    (event_index) and the fine-tuning dataset (dataset_builder), merged into the
+    output (by event URL) and the checkpoint removed. Only new or modified events are tweeted
+    and written, and near duplicates (the same title and description republished
+    under another URL, in this run or among the recent events of the query index)
+    are dropped; the merged clusters are written to events_output/near_duplicates.json.
+    Stage timings, bytes and cache hit rates are written to
+    events_output/scraping_metrics.json (see metrics.report_run).
     
     Args:
         urls (List[str]): List of URLs to scrape
+        concurrent (bool): Use the asyncio/aiohttp crawl engine instead of sequential requests
+        max_per_host (int): Connection limit per host for the concurrent engine
+        index_path (Optional[str]): SQLite seen-events index, None to reprocess everything
+        refresh_after (Optional[float]): Seconds during which a checked event is not re-fetched
+        pack_size (int): Events packed into each LLM request (sequential engine)
+        output_format (str): "csv" or "jsonl"
+        archive_dir (Optional[str]): Directory of the per-run event archive, None to disable it
+        dataset_dir (Optional[str]): Directory of the sharded fine-tuning dataset, None to disable it
+        event_index_path (Optional[str]): SQLite query index of the events, None to disable it
+        near_duplicate_threshold (Optional[float]): Jaccard similarity from which events are near
+            duplicates (NEAR_DUPLICATE_THRESHOLD, default 0.8), None to disable the stage
     """
     logger = setup_logging()
-    events_with_tweets = process_event_links(urls, logger)
+    get_service()  # Fail fast on missing credentials, before any page is fetched or part file written
+    output_dir = "events_output"
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"events_with_tweets.{output_format}")
+    part_file = os.path.join(output_dir, f"events_with_tweets.part.{output_format}")
     
-    output_file = save_events_to_csv(events_with_tweets)
-    logger.info(f"Events and tweets have been saved to: {output_file}")
+    index = SeenEventsIndex(index_path) if index_path else None
+    checkpoint = Checkpoint(output_file + ".checkpoint")
+    if len(checkpoint):
+        logger.info(f"Resuming interrupted run: {len(checkpoint)} events already written to {part_file}")
+    near_dups = near_duplicate_detector(near_duplicate_threshold, event_index_path)
+    if near_dups is not None:
+        if len(checkpoint) and os.path.exists(part_file):  # Events kept before the interruption
+            near_dups.seed((canonicalize_url(_event_url_of(row)), row.get('title'), row.get('description'))
+                           for row in read_rows(part_file))
+    try:
+        with open_sink(part_file, FIELDNAMES) as sink:
+            if concurrent:
+                written = len(asyncio.run(process_event_links_async(
+                    urls, logger, max_per_host=max_per_host, index=index, refresh_after=refresh_after,
+                    sink=sink, checkpoint=checkpoint, near_dups=near_dups)))
+            else:
+                written = stream_event_links(urls, logger, sink, checkpoint=checkpoint, index=index,
+                                             refresh_after=refresh_after, pack_size=pack_size, near_dups=near_dups)
+        if near_dups is not None:
+            logger.info(near_dups.summary())
+            write_report(near_dups, os.path.join(output_dir, "near_duplicates.json"))
+        
+        total = finish_part(part_file, output_file, logger, archive_dir, event_index_path, dataset_dir)
+        checkpoint.clear()
+        logger.info(f"{written} new or modified events and tweets have been saved to: {output_file} ({total} in total)")
+    finally:
+        checkpoint.close()
+        if index is not None:
+            index.close()
 
 if __name__ == "__main__":
-    # Define the range of URLs to scrape
-    urls_to_scrape = [f"http://boletin.itam.mx/mail/repertorio/2024/{i}/index.html" for i in range(34, 48)]
+    # Bulletins of 2024 from issue 34 on, up to the first missing issue (see backfill.py for several years)
+    from bulletin_discovery import discover_issues
+    urls_to_scrape = discover_issues(2024, first_issue=34)
     
-    scraping(urls_to_scrape)
\ No newline at end of file
+    scraping(urls_to_scrape, concurrent=True)
\ No newline at end of file
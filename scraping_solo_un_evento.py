@@ -1,12 +1,21 @@
 from event import Event
 from extract_links_calendar import extract_event_links_from_calendar
 from extract_title_description import extract_title_description_and_image
-from url_imagen import download_image
+from url_imagen import download_image, download_images
+from image_variants import DEFAULT_VARIANTS_DIR, VARIANT_FIELDS, ImageVariants, variant_columns
+from seen_events import SeenEventsIndex, content_hash
+from link_canonical import LinkDeduplicator
+from metrics import incr, report_run, timer
+from csv_output import merge_rows_into_csv, merge_part_into, open_sink, read_rows, batched, Checkpoint
+from event_archive import EventArchive
 import os
 import logging
 from datetime import datetime
 import csv
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+
+FIELDNAMES = ['title', 'date', 'time', 'location', 'description', 'event_url', 'image_url',
+              'starts_at', 'ends_at', 'created_at', 'local_image_path'] + VARIANT_FIELDS
 
 def sanitize_filename(title: str) -> str:
     """
@@ -22,25 +31,37 @@ def sanitize_filename(title: str) -> str:
     safe_title = safe_title.replace(' ', '_')
     return safe_title[:100]  # Limit length to avoid too long filenames
 
-def process_event(url: str, logger: logging.Logger) -> Optional[tuple[Event, str]]:
+def process_event(url: str, logger: logging.Logger, index: Optional[SeenEventsIndex] = None,
+                  download: bool = True, record: bool = True) -> Optional[tuple[Event, str]]:
     """
     Process a single event and its image.
     
     Args:
         url (str): URL of the event
         logger (logging.Logger): Logger instance
+        index (Optional[SeenEventsIndex]): Index of already processed events; unchanged events are skipped
+        download (bool): Download the image here; False leaves it to a batch download (image path None)
+        record (bool): Record the event in the index here; False leaves it to the caller, once its row is written
     
     Returns:
-        Optional[tuple[Event, str]]: Tuple of (Event object, image path) if successful
+        Optional[tuple[Event, str]]: Tuple of (Event object, image path) if successful and new or modified
     """
     try:
         logger.info(f"Processing event URL: {url}")
         
-        title, description, image_url, date, time, location = extract_title_description_and_image(url)
+        fields = extract_title_description_and_image(url)
+        title, description, image_url, date, time, location = fields
+        
+        digest = content_hash(fields)
+        if index is not None and index.is_unchanged(url, digest):
+            index.touch(url)
+            incr('events.unchanged')
+            logger.info(f"Skipping unchanged event: {title}")
+            return None
         
         # Download image if available using url_imagen module
         image_path = None
-        if image_url:
+        if image_url and download:
             image_path = download_image(image_url)
             if image_path:
                 logger.info(f"Image downloaded successfully to {image_path}")
@@ -58,19 +79,37 @@ def process_event(url: str, logger: logging.Logger) -> Optional[tuple[Event, str
             created_at=datetime.now()
         )
         
+        if index is not None and record:
+            index.record(url, digest)
+        
         return event, image_path
         
     except Exception as e:
         logger.error(f"Error processing event {url}: {str(e)}")
         return None
 
-def save_events_with_images(events_data: List[tuple[Event, str]], filename: str = "calendar_events.csv") -> str:
+def calendar_row(event: Event, image_path: Optional[str], variants: Optional[Dict[str, str]] = None) -> dict:
+    """CSV row for an event (its typed record), its downloaded image and its per-network variants (cache hints, see image_variants.variant_for_row)."""
+    return {
+        **event.to_record(),
+        'local_image_path': image_path or 'No image',
+        **variant_columns(variants or {})
+    }
+
+def save_events_with_images(events_data: List[tuple[Event, str]], filename: str = "calendar_events.csv",
+                            merge: bool = True, variants_dir: Optional[str] = DEFAULT_VARIANTS_DIR) -> str:
     """
     Save events and their corresponding image paths to a CSV file.
     
+    Each image is validated and its per-network variants (image_variants) are
+    rendered or taken from the cache; their paths are saved in the image_<network>
+    columns, next to the original's.
+    
     Args:
         events_data (List[tuple[Event, str]]): List of tuples containing (Event, image_path)
         filename (str): Name of the output file
+        merge (bool): Merge into the existing file by event_url instead of overwriting it
+        variants_dir (Optional[str]): Image variant cache directory, None to save only the originals
     
     Returns:
         str: Path to the saved file
@@ -80,32 +119,74 @@ def save_events_with_images(events_data: List[tuple[Event, str]], filename: str
         os.makedirs(output_dir)
         
     filepath = os.path.join(output_dir, filename)
+    fieldnames = FIELDNAMES
+    variants = {}
+    if variants_dir:
+        with ImageVariants(variants_dir) as variant_cache:
+            variants = variant_cache.render(image_path for _, image_path in events_data)
+    rows = [calendar_row(event, image_path, variants.get(image_path)) for event, image_path in events_data]
+    
+    if merge:
+        merge_rows_into_csv(filepath, rows, fieldnames, key=lambda row: row['event_url'])
+        return filepath
     
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['title', 'date', 'time', 'location', 'description', 'event_url', 'image_url', 'local_image_path']
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         
         writer.writeheader()
-        for event, image_path in events_data:
-            writer.writerow({
-                'title': event.title,
-                'date': event.date,
-                'time': event.time,
-                'location': event.location,
-                'description': event.description,
-                'event_url': event.event_url,
-                'image_url': event.image_url,
-                'local_image_path': image_path or 'No image'
-            })
+        writer.writerows(rows)
     
     return filepath
 
-def scrape_calendar(calendar_url: str):
+def _event_digest(event: Event) -> str:
+    """content_hash of an event's extracted fields, as process_event computes it."""
+    return content_hash((event.title, event.description, event.image_url, event.date, event.time, event.location))
+
+def iter_calendar_events(event_links: Iterable[str], logger: logging.Logger,
+                         index: Optional[SeenEventsIndex] = None,
+                         checkpoint: Optional[Checkpoint] = None) -> Iterator[Event]:
+    """
+    Fetch, parse and Event stages: yield the new or modified events, skipping those already checkpointed.
+
+    Events are not recorded in the index here: the caller records each one when
+    its row is written, so a crash mid-batch does not mark unwritten events as seen.
+    """
+    for link in event_links:
+        if checkpoint is not None and link in checkpoint:
+            continue
+        result = process_event(link, logger, index, download=False, record=False)
+        if result:
+            event, _ = result
+            logger.info(f"Successfully processed event: {event.title}")
+            yield event
+
+@report_run("calendar", "eventos")
+def scrape_calendar(calendar_url: str,
+                    index_path: Optional[str] = os.path.join("eventos", "seen_events.sqlite3"),
+                    max_downloads: int = 8, batch_size: int = 16, output_format: str = "csv",
+                    archive_dir: Optional[str] = os.path.join("eventos", "archive"),
+                    variants_dir: Optional[str] = DEFAULT_VARIANTS_DIR):
     """
     Main function to scrape all events from a calendar URL and save their images.
     
+    Events flow through fetch -> parse -> Event -> image download -> image variants
+    -> sink: images are downloaded concurrently for each batch of events (each
+    distinct URL once per run), validated and rendered into per-network variants
+    in worker processes (cached by content hash, see image_variants), and the rows
+    are appended to a part file as soon as their batch is
+    done, with a checkpoint of the event URLs written. An interrupted run resumes
+    from the checkpoint; a completed one appends the part file to the columnar
+    event archive and merges it into the output. Stage timings, bytes and cache
+    hit rates are written to eventos/calendar_metrics.json.
+    
     Args:
         calendar_url (str): URL of the calendar to scrape
+        index_path (Optional[str]): SQLite seen-events index, None to reprocess everything
+        max_downloads (int): Maximum simultaneous image downloads
+        batch_size (int): Events whose images are downloaded together
+        output_format (str): "csv" or "jsonl"
+        archive_dir (Optional[str]): Directory of the per-run event archive, None to disable it
+        variants_dir (Optional[str]): Image variant cache directory, None to keep only the originals
     """
     logger = setup_logging()
     
@@ -115,30 +196,66 @@ def scrape_calendar(calendar_url: str):
             os.makedirs(directory)
             logger.info(f"Created directory: {directory}")
     
+    output_file = os.path.join("eventos", f"calendar_events.{output_format}")
+    part_file = os.path.join("eventos", f"calendar_events.part.{output_format}")
+    index = SeenEventsIndex(index_path) if index_path else None
+    variant_cache = ImageVariants(variants_dir) if variants_dir else None
+    checkpoint = Checkpoint(output_file + ".checkpoint")
+    if len(checkpoint):
+        logger.info(f"Resuming interrupted run: {len(checkpoint)} events already written to {part_file}")
     try:
         logger.info(f"Extracting event links from calendar: {calendar_url}")
-        event_links = extract_event_links_from_calendar(calendar_url)
+        dedup = LinkDeduplicator()
+        event_links = list(dedup.filter(extract_event_links_from_calendar(calendar_url)))
         logger.info(f"Found {len(event_links)} events in calendar")
+        incr('links.duplicates', dedup.fetches_avoided)
+        logger.info(dedup.summary())
         
-        # Process each event and keep track of image paths
-        processed_events_data = []
-        for link in event_links:
-            result = process_event(link, logger)
-            if result:
-                event, image_path = result
-                processed_events_data.append((event, image_path))
-                logger.info(f"Successfully processed event: {event.title}")
+        written = 0
+        image_paths = {}  # Image URL -> local path for this run, so shared images are fetched once
+        variants = {}  # Local path -> {network: variant path}
+        with open_sink(part_file, FIELDNAMES) as sink:
+            for batch in batched(iter_calendar_events(event_links, logger, index, checkpoint), batch_size):
+                new_urls = {event.image_url for event in batch if event.image_url} - image_paths.keys()
+                image_paths.update(download_images(new_urls, save_directory='downloaded_images',
+                                                   max_workers=max_downloads))
+                if variant_cache is not None:
+                    variants.update(variant_cache.render(image_paths[url] for url in new_urls
+                                                         if image_paths.get(url) not in variants))
+                for event in batch:
+                    image_path = image_paths.get(event.image_url)
+                    if event.image_url and not image_path:
+                        logger.warning(f"Failed to download image for event: {event.title}")
+                    with timer('sink_write'):
+                        sink.write(calendar_row(event, image_path, variants.get(image_path)))
+                    incr('events.written')
+                    if index is not None:
+                        index.record(event.event_url, _event_digest(event))
+                        index.commit()
+                    checkpoint.mark(event.event_url)
+                    written += 1
         
-        # Save events with their image paths
-        if processed_events_data:
-            output_file = save_events_with_images(processed_events_data)
-            logger.info(f"Saved {len(processed_events_data)} events to: {output_file}")
+        if archive_dir:
+            archived = EventArchive(archive_dir, extra_fields=['local_image_path'] + VARIANT_FIELDS).append(
+                read_rows(part_file))
+            if archived:
+                logger.info(f"Events archived to {archived}")
+        total = merge_part_into(part_file, output_file, FIELDNAMES, key=lambda row: row['event_url'])
+        checkpoint.clear()
+        if written:
+            logger.info(f"Saved {written} new or modified events to: {output_file} ({total} in total)")
             logger.info("Calendar processing completed successfully")
         else:
-            logger.warning("No events were successfully processed")
+            logger.warning("No new or modified events were processed")
             
     except Exception as e:
         logger.error(f"Error processing calendar: {str(e)}")
+    finally:
+        checkpoint.close()
+        if variant_cache is not None:
+            variant_cache.close()
+        if index is not None:
+            index.close()
 
 def setup_logging() -> logging.Logger:
     """Configure logging for the scraping process."""
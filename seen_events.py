@@ -0,0 +1,110 @@
+# seen_events.py
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Optional
+
+def content_hash(fields: tuple) -> str:
+    """
+    Hash the extracted fields of an event page.
+
+    Args:
+        fields (tuple): (title, description, image_url, date, time, location) as returned by the extractor
+
+    Returns:
+        str: Hex SHA-256 of the fields
+    """
+    joined = '\x1f'.join('' if value is None else str(value) for value in fields)
+    return hashlib.sha256(joined.encode('utf-8')).hexdigest()
+
+class SeenEventsIndex:
+    """
+    Persistent SQLite index of already processed events, keyed by event URL.
+
+    Each row keeps the content hash of the extracted fields and the tweet that was
+    generated for them, so unchanged events can be skipped on later runs. record()
+    only queues an event; commit() writes the queue in one short transaction once
+    the event's output row has been saved, so a crash before that leaves the index
+    as it was. The connection is in autocommit mode and the database in WAL mode,
+    so processes sharing the index (backfill workers, the watch daemon) never hold
+    the write lock across page fetches or LLM calls.
+    """
+
+    def __init__(self, path: str = 'seen_events.sqlite3'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)  # Backfill workers share the index
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.pending = {}  # Event URL -> (content hash, tweet, checked at), written by commit()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_events (
+                event_url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                tweet TEXT,
+                first_seen REAL NOT NULL,
+                last_checked REAL NOT NULL
+            )
+        """)
+
+    def get(self, event_url: str) -> Optional[tuple]:
+        """Return (content_hash, tweet, last_checked) for a URL, or None if never seen."""
+        if event_url in self.pending:
+            return self.pending[event_url]
+        return self.conn.execute(
+            "SELECT content_hash, tweet, last_checked FROM seen_events WHERE event_url = ?",
+            (event_url,)
+        ).fetchone()
+
+    def checked_within(self, event_url: str, max_age: float) -> bool:
+        """Whether the event was checked less than max_age seconds ago."""
+        row = self.get(event_url)
+        return row is not None and time.time() - row[2] < max_age
+
+    def is_unchanged(self, event_url: str, digest: str) -> bool:
+        """Whether the event was seen before with the same content hash."""
+        row = self.get(event_url)
+        return row is not None and row[0] == digest
+
+    def touch(self, event_url: str):
+        """
+        Mark an unchanged event as checked now.
+
+        Written right away (autocommit): a run that only sees unchanged events
+        writes no row (and so never calls commit()), and refresh_after relies on
+        last_checked.
+        """
+        self.conn.execute(
+            "UPDATE seen_events SET last_checked = ? WHERE event_url = ?",
+            (time.time(), event_url)
+        )
+
+    def record(self, event_url: str, digest: str, tweet: Optional[str] = None):
+        """Queue an event after it has been (re)processed; it is written by the next commit()."""
+        self.pending[event_url] = (digest, tweet, time.time())
+
+    def commit(self):
+        """Write the queued events in one short transaction."""
+        if not self.pending:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany("""
+                INSERT INTO seen_events (event_url, content_hash, tweet, first_seen, last_checked)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(event_url) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    tweet = excluded.tweet,
+                    last_checked = excluded.last_checked
+            """, [(url, digest, tweet, checked, checked) for url, (digest, tweet, checked) in self.pending.items()])
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self.pending.clear()
+
+    def close(self):
+        """Close the connection; events queued since the last commit() are dropped."""
+        self.conn.close()
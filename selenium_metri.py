@@ -1,39 +1,25 @@
-from selenium_metri import webdriver
+from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from dotenv import load_dotenv
+from metricool_publisher import click_network_toggles
 import os
 import time
 
 def click_social_button(driver, icon_class, network_name):
     """Helper function to click social media buttons"""
+    click_social_buttons(driver, [(icon_class, network_name)])
+
+def click_social_buttons(driver, social_networks):
+    """Enable every social network toggle with one DOM query and JS click (no scroll, hover or sleeps)"""
     try:
-        print(f"Looking for {network_name} button...")
-        button = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((
-                By.XPATH,
-                f"//div[contains(@class, 'flex-grow-0')]//i[contains(@class, 'fa-{icon_class}')]/ancestor::div[contains(@class, 'cursor-pointer')]"
-            ))
-        )
-        
-        if "opacity-50" in button.get_attribute("class"):
-            print(f"{network_name} button appears disabled. Skipping click.")
-            return
-        
-        print(f"Scrolling into view for {network_name} button...")
-        driver.execute_script("arguments[0].scrollIntoView(true);", button)
-        time.sleep(1)
-        
-        print(f"Hovering over and clicking {network_name} button...")
-        action = ActionChains(driver)
-        action.move_to_element(button).click(button).perform()
-        time.sleep(1)
-        
+        print(f"Enabling {', '.join(name for _, name in social_networks)}...")
+        result = click_network_toggles(driver, social_networks, timeout=10)
+        print(f"Clicked: {result['clicked']}, disabled: {result['disabled']}, missing: {result['missing']}")
     except Exception as e:
-        print(f"Error clicking {network_name} button: {str(e)}")
+        print(f"Error clicking social media buttons: {str(e)}")
 
 def test_metricool_login():
     load_dotenv()
@@ -109,12 +95,7 @@ def test_metricool_login():
             ('linkedin', 'LinkedIn')
         ]
         
-        for icon_class, network_name in social_networks:
-            try:
-                click_social_button(driver, icon_class, network_name)
-            except Exception as e:
-                print(f"Error with {network_name}: {str(e)}")
-                continue
+        click_social_buttons(driver, social_networks)
         
         print("All social media buttons processed! Keeping browser open...")
         
@@ -0,0 +1,215 @@
+# token_budget.py
+"""
+Token counting, prompt budgets and length-bucketed batching.
+
+Usage:
+    python token_budget.py [SOURCE] [--budget N] [--batch-size N]
+
+Prompts are measured with an approximate counter (words split into pieces of
+up to four characters, punctuation apart), so the API path never imports
+transformers nor fetches the gated base model vocabulary, and the prompts (and
+the dataset ids hashed from them) are the same on every machine. With
+TWEET_BACKEND=local or TOKEN_COUNTER=exact the final_model tokenizer
+(local_tweet.load_tokenizer: the Llama-3.2 vocabulary plus
+final_model/tokenizer_config.json) is used instead, falling back to the
+approximate counter when it cannot be loaded.
+
+fit_text() truncates a text to a token budget; event_prompt (scraping_finetuning)
+uses it to cap the event description at PROMPT_TOKEN_BUDGET tokens for the
+whole prompt. length_batches() groups items of similar length so each padded
+batch wastes as little padding as possible. Tokens, tokens saved and padding
+are counted on the run metrics (prompt.* and batch.* counters).
+
+The CLI reports, for a scraper output file (default:
+events_output/events_with_tweets.csv), the prompt tokens before and after the
+budget and the padding of arrival-order vs length-bucketed batches.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Sequence
+
+from metrics import incr
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "256"))
+ELLIPSIS = "…"
+
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+_counter = None
+_counter_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+class TokenCounter:
+    """
+    Count and truncate text in tokens of a HuggingFace tokenizer, or approximately without one.
+
+    Args:
+        tokenizer: transformers tokenizer, None for the approximate counter
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is None:
+            return sum(1 for _ in _APPROX_TOKEN_RE.finditer(text))
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of `text` with at most `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is None:
+            for n, match in enumerate(_APPROX_TOKEN_RE.finditer(text), 1):
+                if n == max_tokens:
+                    return text[:match.end()]
+            return text
+        ids = self.tokenizer.encode(text, add_special_tokens=False)
+        return self.tokenizer.decode(ids[:max_tokens]) if len(ids) > max_tokens else text
+
+def _load_counter() -> TokenCounter:
+    from tweetllm import get_backend
+
+    mode = os.getenv("TOKEN_COUNTER")
+    if mode == "approx" or (mode != "exact" and get_backend() != "local"):
+        return TokenCounter()
+    try:
+        from local_tweet import load_tokenizer
+
+        return TokenCounter(load_tokenizer())
+    except Exception as e:  # transformers missing, or the base model vocabulary can't be fetched
+        logger.warning(f"Tokenizer unavailable ({e}); using approximate token counts")
+        return TokenCounter()
+
+def get_token_counter() -> TokenCounter:
+    """Return the process-wide TokenCounter, loading the tokenizer on first use."""
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                _counter = _load_counter()
+    return _counter
+
+def set_token_counter(counter: Optional[TokenCounter]):
+    """Replace the process-wide TokenCounter (None to load it again on next use)."""
+    global _counter
+    with _counter_lock:
+        _counter = counter
+
+def fit_text(text: str, max_tokens: int, counter: Optional[TokenCounter] = None) -> str:
+    """
+    Truncate `text` to at most `max_tokens` tokens, marking the cut with an ellipsis.
+
+    Args:
+        text (str): Text to fit
+        max_tokens (int): Token budget of the text
+        counter (Optional[TokenCounter]): Counter to use (default: the process-wide one)
+
+    Returns:
+        str: `text` unchanged if it fits, otherwise its truncated prefix followed by "…"
+    """
+    counter = counter or get_token_counter()
+    if counter.count(text) <= max_tokens:
+        return text
+    return counter.truncate(text, max_tokens - counter.count(ELLIPSIS)).rstrip() + ELLIPSIS
+
+def fit_prompt(render, text: str, max_tokens: Optional[int] = PROMPT_TOKEN_BUDGET,
+               counter: Optional[TokenCounter] = None) -> str:
+    """
+    Render a prompt around `text`, truncating `text` so the whole prompt fits the budget.
+
+    Args:
+        render (Callable[[str], str]): Builds the prompt from the (possibly truncated) text
+        text (str): Variable-length part of the prompt, e.g. an event description
+        max_tokens (Optional[int]): Token budget of the whole prompt, None for no limit
+        counter (Optional[TokenCounter]): Counter to use (default: the process-wide one)
+
+    Returns:
+        str: The rendered prompt
+    """
+    prompt = render(text)
+    if max_tokens is None:
+        return prompt
+    counter = counter or get_token_counter()
+    tokens = counter.count(prompt)
+    if tokens > max_tokens:
+        text_budget = max(0, max_tokens - counter.count(render("")))
+        prompt = render(fit_text(text, text_budget, counter))
+        fitted = counter.count(prompt)
+        incr('prompt.truncated')
+        incr('prompt.tokens_saved', tokens - fitted)
+        tokens = fitted
+    incr('prompt.tokens', tokens)
+    return prompt
+
+def length_batches(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """
+    Indices grouped into batches of similar length (shortest first).
+
+    Args:
+        lengths (Sequence[int]): Token length of each item
+        batch_size (int): Items per batch
+
+    Returns:
+        List[List[int]]: Batches of indices into `lengths`
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+def padding_stats(lengths: Sequence[int], batches: List[List[int]]) -> dict:
+    """Real and padding tokens of padding every batch to its longest item."""
+    tokens = sum(lengths)
+    padded = sum(max(lengths[i] for i in batch) * len(batch) for batch in batches if batch)
+    return {'tokens': tokens, 'padding': padded - tokens,
+            'padding_ratio': round((padded - tokens) / padded, 4) if padded else 0.0}
+
+def record_padding(lengths: Sequence[int], batches: List[List[int]]) -> dict:
+    """padding_stats, also counted on the run metrics (batch.tokens / batch.padding_tokens)."""
+    stats = padding_stats(lengths, batches)
+    incr('batch.tokens', stats['tokens'])
+    incr('batch.padding_tokens', stats['padding'])
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('source', nargs='?', default=os.path.join("events_output", "events_with_tweets.csv"),
+                        help='Scraper output (CSV/JSONL) or event archive directory')
+    parser.add_argument('--budget', type=int, default=PROMPT_TOKEN_BUDGET, help='Prompt token budget')
+    parser.add_argument('--batch-size', type=int, default=8, help='Prompts per generation batch')
+    args = parser.parse_args()
+
+    import token_budget  # The module event_prompt uses, not this __main__ copy
+    from dataset_builder import event_from_row, read_source
+    from scraping_finetuning import event_prompt
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    counter = token_budget.get_token_counter()
+    events = [event for event in map(event_from_row, read_source(args.source)) if event is not None]
+    before = [counter.count(event_prompt(event, max_tokens=None)) for event in events]
+    after = [counter.count(event_prompt(event, max_tokens=args.budget)) for event in events]
+    arrival = [list(range(start, min(start + args.batch_size, len(after))))
+               for start in range(0, len(after), args.batch_size)]
+    report = {
+        'events': len(events),
+        'exact_tokenizer': counter.exact,
+        'budget': args.budget,
+        'prompt_tokens': sum(before),
+        'prompt_tokens_budgeted': sum(after),
+        'tokens_saved': sum(before) - sum(after),
+        'truncated': sum(b > a for b, a in zip(before, after)),
+        'padding_arrival_order': padding_stats(after, arrival),
+        'padding_length_bucketed': padding_stats(after, length_batches(after, args.batch_size)),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
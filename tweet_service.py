@@ -0,0 +1,235 @@
+# tweet_service.py
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from http_session import create_session
+from metrics import incr, timer
+
+API_URL = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+DEFAULT_MODEL = "gpt-4-turbo"
+DEFAULT_TEMPERATURE = 0.1
+DEFAULT_CACHE_PATH = os.getenv("TWEET_CACHE_PATH", ".tweet_cache.sqlite3")
+
+SYSTEM_PROMPT = "Generate tweets for a university. Include emojis related to the topic but use them moderately. Return only the tweet without instructions."
+
+PACKED_INSTRUCTIONS = (
+    " You will receive several events, each introduced by a line '### EVENT <n>'."
+    " Write one tweet per event and introduce each tweet with a line '### TWEET <n>' using the same number."
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TweetCache:
+    """
+    Content-addressed SQLite cache of generated tweets.
+
+    The key is the SHA-256 of (system prompt, user prompt, model, temperature), so
+    the same event text with the same generation settings is only sent once.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS tweets (key TEXT PRIMARY KEY, tweet TEXT NOT NULL)")
+            self.conn.commit()
+
+    @staticmethod
+    def key(prompt: str, model: str, temperature: float, system: str = SYSTEM_PROMPT) -> str:
+        payload = json.dumps([system, prompt, model, temperature], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT tweet FROM tweets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, tweet: str):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO tweets (key, tweet) VALUES (?, ?)", (key, tweet))
+            self.conn.commit()
+
+class TweetAPIError(Exception):
+    """The chat-completions endpoint returned an error that retrying did not fix."""
+
+class TweetService:
+    """
+    Tweet generation over the chat-completions API.
+
+    Adds what the one-shot tweetllm.tweet call lacked: request timeouts, retries
+    with exponential backoff and jitter on 429/5xx (honouring Retry-After and
+    pausing every worker while the API is rate limiting), a content-addressed
+    cache, a concurrent request pool and optional packing of several events per
+    request. Errors are returned as "Error: ..." strings, like tweetllm.tweet.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 temperature: float = DEFAULT_TEMPERATURE, api_url: str = API_URL,
+                 cache: Optional[TweetCache] = None, max_workers: int = 4, max_retries: int = 5,
+                 backoff_factor: float = 1.0, timeout: float = 60):
+        self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+        self.model = model
+        self.temperature = temperature
+        self.api_url = api_url
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        # Retries are handled here (POST isn't retried by the session's urllib3 Retry)
+        self.session = create_session(pool_size=max_workers, retries=0, timeout=timeout)
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _wait_for_rate_limit(self):
+        with self._pause_lock:
+            delay = self._pause_until - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause(self, seconds: float):
+        """Hold back every worker for `seconds`, e.g. after a 429."""
+        with self._pause_lock:
+            self._pause_until = max(self._pause_until, time.time() + seconds)
+
+    def _retry_delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def complete(self, messages: List[dict]) -> str:
+        """
+        POST one chat-completions request, retrying transient failures.
+
+        Raises:
+            TweetAPIError: If the API keeps failing or returns a non-retryable error
+        """
+        if not self.api_key:
+            raise TweetAPIError("No API key available")
+
+        payload = {"model": self.model, "messages": messages, "temperature": self.temperature}
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_rate_limit()
+            response = None
+            try:
+                with timer('llm_request'):
+                    response = self.session.post(self.api_url, headers=headers, json=payload)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise TweetAPIError(str(e))
+            else:
+                if response.status_code == 200:
+                    data = response.json()
+                    usage = data.get("usage") or {}
+                    incr('llm.prompt_tokens', usage.get("prompt_tokens", 0))
+                    incr('llm.completion_tokens', usage.get("completion_tokens", 0))
+                    return data["choices"][0]["message"]["content"].strip()
+                incr(f'llm.http_{response.status_code}')
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    try:
+                        message = response.json().get("error", {}).get("message", "Unknown error")
+                    except ValueError:
+                        message = f"HTTP {response.status_code}"
+                    raise TweetAPIError(message)
+
+            delay = self._retry_delay(response, attempt)
+            if response is not None and response.status_code == 429:
+                self._pause(delay)
+            else:
+                time.sleep(delay)
+        raise TweetAPIError("Retries exhausted")
+
+    def _messages(self, query: str, system: str = SYSTEM_PROMPT) -> List[dict]:
+        return [{"role": "system", "content": system}, {"role": "user", "content": query}]
+
+    def tweet(self, query: str) -> str:
+        """Generate (or fetch from cache) the tweet for one event description."""
+        key = self.cache.key(query, self.model, self.temperature) if self.cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                incr('tweet_cache.hit')
+                return cached
+            incr('tweet_cache.miss')
+        try:
+            tweet_text = self.complete(self._messages(query))
+        except Exception as e:
+            return f"Error: {str(e)}"
+        if key:
+            self.cache.put(key, tweet_text)
+        return tweet_text
+
+    @staticmethod
+    def pack(queries: List[str]) -> str:
+        return "\n\n".join(f"### EVENT {n}\n{query}" for n, query in enumerate(queries, start=1))
+
+    @staticmethod
+    def unpack(reply: str, expected: int) -> Optional[List[str]]:
+        """Split a packed reply into tweets; None if it doesn't contain exactly `expected` numbered tweets."""
+        parts = re.split(r"^\s*###\s*TWEET\s*(\d+)\s*$", reply, flags=re.MULTILINE)
+        tweets = {}
+        for number, text in zip(parts[1::2], parts[2::2]):
+            tweets[int(number)] = text.strip()
+        if sorted(tweets) != list(range(1, expected + 1)) or not all(tweets.values()):
+            return None
+        return [tweets[n] for n in range(1, expected + 1)]
+
+    def _tweet_pack(self, queries: List[str]) -> List[str]:
+        """Generate tweets for several events in one request, falling back to one request each."""
+        if len(queries) == 1:
+            return [self.tweet(queries[0])]
+        try:
+            reply = self.complete(self._messages(self.pack(queries), SYSTEM_PROMPT + PACKED_INSTRUCTIONS))
+            tweets = self.unpack(reply, len(queries))
+        except Exception:
+            tweets = None
+        if tweets is None:
+            return [self.tweet(query) for query in queries]
+        if self.cache:
+            incr('tweet_cache.miss', len(queries))
+            # Cached under each event's own key, so later single or packed runs reuse them
+            for query, tweet_text in zip(queries, tweets):
+                self.cache.put(self.cache.key(query, self.model, self.temperature), tweet_text)
+        return tweets
+
+    def tweet_many(self, queries: List[str], pack_size: int = 1) -> List[str]:
+        """
+        Generate tweets for many events concurrently.
+
+        Args:
+            queries (List[str]): Event descriptions
+            pack_size (int): Events per request; above 1, several events share one
+                             request and the reply is split back into tweets
+
+        Returns:
+            List[str]: One tweet (or "Error: ..." string) per query, in order
+        """
+        results: List[Optional[str]] = [None] * len(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            cached = self.cache.get(self.cache.key(query, self.model, self.temperature)) if self.cache else None
+            if cached is not None:
+                incr('tweet_cache.hit')
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        packs = [pending[i:i + pack_size] for i in range(0, len(pending), max(pack_size, 1))]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for pack, tweets in zip(packs, pool.map(lambda p: self._tweet_pack([queries[i] for i in p]), packs)):
+                for i, tweet_text in zip(pack, tweets):
+                    results[i] = tweet_text
+        return results
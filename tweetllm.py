@@ -1,53 +1,63 @@
 import os
-from dotenv import load_dotenv
-import requests
+import threading
 
-# Load the environment variables from a .env file
-load_dotenv()
+_service = None
+_service_lock = threading.Lock()
+_env_loaded = False
 
-# Fetch the OpenAI API key from the environment
-API_KEY = os.getenv("OPENAI_API_KEY")
+def load_env():
+    """Load the environment variables from a .env file (once, on first use rather than at import)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
-if not API_KEY:
-    raise ValueError("No API key found. Please set OPENAI_API_KEY in your environment variables.")
+def get_backend() -> str:
+    # "openai" (chat-completions API) or "local" (final_model LoRA adapter on CPU, see local_tweet)
+    load_env()
+    return os.getenv("TWEET_BACKEND", "openai")
+
+def get_api_key() -> str:
+    """
+    Fetch the OpenAI API key from the environment.
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not set
+    """
+    load_env()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("No API key found. Please set OPENAI_API_KEY in your environment variables.")
+    return api_key
+
+def get_service():
+    """
+    Return the shared tweet backend, creating it on first use.
+
+    With TWEET_BACKEND=local the final_model adapter is loaded once (int8 dynamic
+    quantization with LOCAL_MODEL_QUANTIZE=1); otherwise a TweetService over the
+    API, cached unless TWEET_CACHE_DISABLED is set. Credentials are only checked
+    here, so importing this module never fails and never loads torch.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                if get_backend() == "local":
+                    from local_tweet import LocalTweetModel
+                    _service = LocalTweetModel(quantize=bool(os.getenv("LOCAL_MODEL_QUANTIZE")))
+                else:
+                    from tweet_service import TweetService, TweetCache
+                    api_key = get_api_key()
+                    cache = None if os.getenv("TWEET_CACHE_DISABLED") else TweetCache()
+                    _service = TweetService(api_key=api_key, cache=cache)
+    return _service
 
 def tweet(query: str) -> str:
-    try:
-        # Ensure the API key exists
-        if not API_KEY:
-            return "Error: No API key available"
-
-        # Make a POST request to OpenAI's API
-        response = requests.post(
-            url="https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "gpt-4-turbo",  # Use GPT-4 turbo (mini version, if applicable)
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "Generate tweets for a university. Include emojis related to the topic but use them moderately. Return only the tweet without instructions."
-                    },
-                    {
-                        "role": "user",
-                        "content": query
-                    }
-                ],
-                "temperature": 0.1
-            }
-        )
-        
-        # Parse the JSON response
-        result = response.json()
-        if response.status_code != 200:
-            error_message = result.get("error", {}).get("message", "Unknown error")
-            return f"Error: {error_message}"
-            
-        # Extract and return the tweet content
-        return result['choices'][0]['message']['content'].strip()
-
-    except Exception as e:
-        return f"Error: {str(e)}"
+    # Timeouts, retries with backoff and caching are handled by the shared TweetService
+    return get_service().tweet(query)
+
+def tweet_many(queries, pack_size: int = 1):
+    # Concurrent (and optionally packed) generation for many events; keeps the order of queries
+    return get_service().tweet_many(queries, pack_size=pack_size)
@@ -1,15 +1,70 @@
 import requests
 import os
+import hashlib
+import mimetypes
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
 from urllib.parse import urlparse
+from http_session import fetch
+from metrics import incr, timer
 
-def download_image(image_url, save_directory='./downloaded_images'):
+CHUNK_SIZE = 64 * 1024
+
+def _extension(image_url, content_type=None):
+    """File extension from the URL path, else from the Content-Type, else .jpg."""
+    ext = os.path.splitext(os.path.basename(urlparse(image_url).path))[1].lower()
+    if not ext and content_type:
+        ext = mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+    return ext or '.jpg'
+
+def _stream_to_store(image_url, save_directory, session=None):
+    """
+    Stream an image to disk in chunks and store it under its content hash.
+
+    The body is written to a temporary file while being hashed, then renamed to
+    <sha256 prefix><ext>. An image already stored (same bytes, any URL) is reused
+    instead of being written twice.
+    """
+    with timer('image_download'):
+        response = fetch(image_url, session=session, stream=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=save_directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        finally:
+            response.close()
+    incr('image.bytes', size)
+
+    save_path = os.path.join(save_directory, digest.hexdigest()[:16] + _extension(image_url, response.headers.get('Content-Type')))
+    if os.path.exists(save_path):
+        incr('image_store.hit')
+        os.remove(tmp_path)  # Same content already stored
+    else:
+        incr('image_store.miss')
+        os.replace(tmp_path, save_path)
+    return save_path
+
+def download_image(image_url, save_directory='./downloaded_images', session=None):
     """
     Download an image from a URL and save it to a specified directory.
-    
+
+    The image is streamed to disk and named after a hash of its content, so two
+    different images never overwrite each other and identical ones are stored once.
+
     Parameters:
     image_url (str): The URL of the image to download
     save_directory (str): Directory to save the image (default: 'downloaded_images')
-    
+    session (requests.Session): Session to use instead of the shared pooled one
+
     Returns:
     str: Path to the saved image if successful, None if failed
     """
@@ -17,29 +72,13 @@ def download_image(image_url, save_directory='./downloaded_images'):
         # Create the save directory if it doesn't exist
         if not os.path.exists(save_directory):
             os.makedirs(save_directory)
-        
-        # Get the filename from the URL
-        parsed_url = urlparse(image_url)
-        filename = os.path.basename(parsed_url.path)
-        
-        # If no filename is found, use a default name
-        if not filename:
-            filename = 'downloaded_image.jpg'
-        
-        # Full path for saving the image
-        save_path = os.path.join(save_directory, filename)
-        
-        # Download the image
-        response = requests.get(image_url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        # Save the image
-        with open(save_path, 'wb') as file:
-            file.write(response.content)
-            
+
+        # Download the image through the shared pooled session
+        save_path = _stream_to_store(image_url, save_directory, session=session)
+
         print(f"Image successfully downloaded: {save_path}")
         return save_path
-    
+
     except requests.exceptions.RequestException as e:
         print(f"Error downloading image: {e}")
         return None
@@ -47,8 +86,30 @@ def download_image(image_url, save_directory='./downloaded_images'):
         print(f"An error occurred: {e}")
         return None
 
+def download_images(image_urls: Iterable[str], save_directory='./downloaded_images', max_workers=8,
+                    session=None) -> Dict[str, Optional[str]]:
+    """
+    Download many images concurrently, fetching each distinct URL once.
+
+    Parameters:
+    image_urls (Iterable[str]): Image URLs, possibly repeated (e.g. the ITAM logo)
+    save_directory (str): Directory to save the images (default: 'downloaded_images')
+    max_workers (int): Maximum simultaneous downloads
+    session (requests.Session): Session to use instead of the shared pooled one
+
+    Returns:
+    Dict[str, Optional[str]]: Local path for every distinct URL (None if the download failed)
+    """
+    unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+    if not unique_urls:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        paths = pool.map(lambda url: download_image(url, save_directory, session=session), unique_urls)
+        return dict(zip(unique_urls, paths))
+
 # Example usage
 if __name__ == "__main__":
     # Your example URL
     image_url = "https://eventos.itam.mx/sites/all/themes/zmagazine/images/logo-ITAM.png"
-    downloaded_path = download_image(image_url)
\ No newline at end of file
+    downloaded_path = download_image(image_url)
@@ -0,0 +1,336 @@
+# watch_daemon.py
+"""
+Resident watcher that tweets the events of new bulletins as they are published.
+
+Usage:
+    python watch_daemon.py [--year 2024] [--first-issue 34] [--min-interval 30] [--max-interval 600]
+
+Instead of one cron run per bulletin, the watcher stays up with everything a
+run sets up kept warm: the pooled HTTP session, the tweet service, the
+seen-events index, the near-duplicate detector and the event links already
+handled. Each poll revalidates the latest bulletin with a conditional GET and
+probes (HEAD) whether the next issue exists; only event links not seen before
+go through extraction -> near duplicates -> tweet -> sink, and each poll that
+writes rows merges them into events_output/events_with_tweets.<format> (and
+the archive, query index and dataset) right away. Event pages that fail to
+load are retried on the following polls, up to MAX_LINK_ATTEMPTS times.
+
+Polls are adaptive: right after new links the interval drops to
+--min-interval, then grows by POLL_GROWTH on every quiet poll up to
+--max-interval. Failed polls back off exponentially with full jitter. Every
+delay is jittered so several watchers never poll in lockstep. SIGINT/SIGTERM
+stop the watcher between polls.
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from datetime import date
+from typing import List, Optional, Tuple
+
+from bulletin_discovery import bulletin_exists, bulletin_url, discover_issues
+from csv_output import Checkpoint, open_sink, read_rows
+from extract_links_calendar import extract_event_links_from_calendar
+from http_cache import HTTPCache, get_default_cache
+from link_canonical import LinkDeduplicator
+from metrics import get_metrics, percentile, reset_metrics
+from near_duplicates import DEFAULT_THRESHOLD
+from seen_events import SeenEventsIndex
+
+OUTPUT_DIR = "events_output"
+DEFAULT_MIN_INTERVAL = 30.0
+DEFAULT_MAX_INTERVAL = 600.0
+POLL_GROWTH = 1.5
+POLL_JITTER = 0.1
+MAX_LINK_ATTEMPTS = 3  # Fetches of an event page before it is given up on
+
+class PollSchedule:
+    """
+    Adaptive, jittered delay between polls.
+
+    Args:
+        min_interval (float): Delay after a poll that found something, in seconds
+        max_interval (float): Longest delay, reached after quiet or failed polls
+        growth (float): Factor applied to the delay after each quiet poll
+        jitter (float): Relative random spread of every delay (0.1 = ±10%)
+        rng (Optional[random.Random]): Random generator (seeded in tests/benchmarks)
+    """
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 growth: float = POLL_GROWTH, jitter: float = POLL_JITTER, rng: Optional[random.Random] = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.interval = min_interval
+        self.failures = 0
+
+    def found(self):
+        """Something was published: poll again soon."""
+        self.interval = self.min_interval
+        self.failures = 0
+
+    def idle(self):
+        """Nothing new: slow down."""
+        self.interval = min(self.interval * self.growth, self.max_interval)
+        self.failures = 0
+
+    def failed(self):
+        """The poll failed: exponential backoff with full jitter."""
+        self.failures += 1
+        ceiling = min(self.max_interval, self.min_interval * 2 ** self.failures)
+        self.interval = self.rng.uniform(self.min_interval, ceiling)
+
+    def next_delay(self) -> float:
+        return self.interval * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+class BulletinWatcher:
+    """
+    In-memory state of the watch daemon: the latest bulletin, the event links
+    already handled, and the open indexes and sinks of the scraping pipeline.
+
+    Args:
+        year (int): Year of the bulletins to watch
+        first_issue (int): First issue number probed when looking for the latest bulletin
+        output_format (str): "csv" or "jsonl"
+        pack_size (int): Events packed into each LLM request
+        index_path (Optional[str]): SQLite seen-events index, None to reprocess everything
+        archive_dir (Optional[str]): Directory of the event archive, None to disable it
+        dataset_dir (Optional[str]): Directory of the fine-tuning dataset, None to disable it
+        event_index_path (Optional[str]): SQLite query index of the events, None to disable it
+        near_duplicate_threshold (Optional[float]): Near-duplicate threshold, None to disable the stage
+        logger (Optional[logging.Logger]): Logger (default: the scraper's)
+    """
+
+    def __init__(self, year: int, first_issue: int = 1, output_format: str = "csv", pack_size: int = 1,
+                 index_path: Optional[str] = os.path.join(OUTPUT_DIR, "seen_events.sqlite3"),
+                 archive_dir: Optional[str] = os.path.join(OUTPUT_DIR, "archive"),
+                 dataset_dir: Optional[str] = os.path.join(OUTPUT_DIR, "dataset"),
+                 event_index_path: Optional[str] = os.path.join(OUTPUT_DIR, "events.sqlite3"),
+                 near_duplicate_threshold: Optional[float] = DEFAULT_THRESHOLD,
+                 logger: Optional[logging.Logger] = None):
+        from scraping_finetuning import near_duplicate_detector, setup_logging
+
+        self.logger = logger or setup_logging()
+        self.year = year
+        self.first_issue = first_issue
+        self.issue: Optional[int] = None
+        self.pack_size = pack_size
+        self.archive_dir = archive_dir
+        self.dataset_dir = dataset_dir
+        self.event_index_path = event_index_path
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        self.output_file = os.path.join(OUTPUT_DIR, f"events_with_tweets.{output_format}")
+        # Own part file and checkpoint, so a one-shot scraping run can share the output directory
+        self.part_file = os.path.join(OUTPUT_DIR, f"events_with_tweets.watch.part.{output_format}")
+        self.checkpoint = Checkpoint(self.part_file + ".checkpoint")
+        self.index = SeenEventsIndex(index_path) if index_path else None
+        self.dedup = LinkDeduplicator()
+        self.near_dups = near_duplicate_detector(near_duplicate_threshold, event_index_path)
+        # The latest bulletin is always revalidated (conditional GET), never served from the cache unchecked
+        self.bulletin_cache = HTTPCache(ttl=0) if get_default_cache() is not None else None
+        self.first_seen = {}  # Event link -> time it was discovered, for the publication-to-tweet latency
+        self.retry = {}  # Event link whose page failed -> failed attempts, retried on the following polls
+        if os.path.exists(self.part_file):
+            self.logger.info(f"Merging {len(self.checkpoint)} events left in {self.part_file} by the last run")
+            self._finish()
+
+    @property
+    def bulletin(self) -> Optional[str]:
+        return bulletin_url(self.year, self.issue) if self.issue is not None else None
+
+    def find_latest(self):
+        """Locate the latest published bulletin of the year (or of the previous one, early in January)."""
+        for year in (self.year, self.year - 1):
+            issues = discover_issues(year, self.first_issue if year == self.year else 1)
+            if issues:
+                self.year, self.issue = year, int(issues[-1].rstrip('/').split('/')[-2])
+                self.logger.info(f"Watching from bulletin {self.bulletin}")
+                return
+        raise RuntimeError(f"No bulletin found for {self.year} or {self.year - 1}")
+
+    def _next_bulletin(self) -> Optional[Tuple[int, int]]:
+        """(year, issue) of the bulletin published after the current one, or None if there is none yet."""
+        candidates = [(self.year, self.issue + 1)]
+        if date.today().year > self.year:
+            candidates.append((self.year + 1, 1))
+        for year, issue in candidates:
+            if bulletin_exists(bulletin_url(year, issue)):
+                return year, issue
+        return None
+
+    def new_links(self) -> List[str]:
+        """
+        Event links not handled yet, from the current bulletin and any newer ones.
+
+        Raises:
+            requests.exceptions.RequestException: If the current bulletin cannot be fetched
+        """
+        if self.issue is None:
+            self.find_latest()
+        links = list(self.dedup.filter(extract_event_links_from_calendar(self.bulletin, cache=self.bulletin_cache)))
+        while (following := self._next_bulletin()) is not None:
+            self.year, self.issue = following
+            self.logger.info(f"New bulletin published: {self.bulletin}")
+            links += self.dedup.filter(extract_event_links_from_calendar(self.bulletin, cache=self.bulletin_cache))
+        now = time.time()
+        for link in links:
+            self.first_seen.setdefault(link, now)
+        return links
+
+    def process(self, links: List[str]) -> int:
+        """
+        Run new links through extraction -> near duplicates -> tweet -> sink and merge the rows written.
+
+        Links whose page could not be fetched are kept in the retry set, which the
+        next polls process again, whatever bulletin they came from, until
+        MAX_LINK_ATTEMPTS attempts have failed.
+        """
+        from scraping_finetuning import (FIELDNAMES, _write_row, iter_distinct_events, iter_extracted_events,
+                                         iter_tweeted_events)
+
+        written, latencies, failed = 0, [], set()
+        with open_sink(self.part_file, FIELDNAMES) as sink:
+            events = iter_extracted_events(links, self.logger, self.index, checkpoint=self.checkpoint, failed=failed)
+            events = iter_distinct_events(events, self.logger, self.near_dups)
+            for event_with_tweet in iter_tweeted_events(events, self.logger, self.index, self.pack_size):
+                _write_row(sink, event_with_tweet, self.index, self.checkpoint)
+                written += 1
+                seen = self.first_seen.pop(event_with_tweet["event_url"], None)
+                if seen is not None:
+                    latencies.append(time.time() - seen)
+        for link in links:
+            if link in failed:
+                self.retry[link] = self.retry.get(link, 0) + 1
+                if self.retry[link] < MAX_LINK_ATTEMPTS:
+                    continue
+                del self.retry[link]
+                self.logger.error(f"Giving up on {link} after {MAX_LINK_ATTEMPTS} failed attempts")
+            else:
+                self.retry.pop(link, None)
+            self.first_seen.pop(link, None)
+        if failed:
+            self.logger.warning(f"{len(failed)} event pages failed; {len(self.retry)} links to retry")
+        # Rows left by a poll that crashed after writing are merged too, not only this poll's
+        if written or len(self.checkpoint) or self._part_has_rows():
+            self._finish()
+            if written:
+                self.logger.info(f"{written} new events tweeted")
+        elif os.path.exists(self.part_file):
+            os.remove(self.part_file)  # Header only
+        if latencies:
+            self.logger.info(f"Discovery to saved tweet: p50 {percentile(latencies, 50):.1f} s, max {max(latencies):.1f} s")
+        return written
+
+    def _part_has_rows(self) -> bool:
+        return os.path.exists(self.part_file) and next(read_rows(self.part_file), None) is not None
+
+    def _finish(self):
+        from scraping_finetuning import finish_part
+
+        total = finish_part(self.part_file, self.output_file, self.logger, self.archive_dir,
+                            self.event_index_path, self.dataset_dir)
+        self.checkpoint.clear()
+        self.checkpoint = Checkpoint(self.part_file + ".checkpoint")  # clear() closes it; the next poll needs one
+        self.logger.info(f"Saved to {self.output_file} ({total} in total)")
+
+    def poll(self) -> int:
+        """
+        One poll: look for new event links and tweet them, with the links whose page failed before.
+
+        Returns:
+            int: Number of new event links found (retried ones are not counted, so
+                 they do not keep the schedule at its shortest interval)
+        """
+        reset_metrics()
+        links = self.new_links()
+        retries = [link for link in self.retry if link not in links]
+        if links:
+            self.logger.info(f"{len(links)} new event links in {self.bulletin}")
+        if retries:
+            self.logger.info(f"Retrying {len(retries)} event links that failed before")
+        if links or retries:
+            try:
+                self.process(links + retries)
+            except Exception:
+                self.dedup.seen.difference_update(links)  # Retried next poll; rows already written are checkpointed
+                raise
+            get_metrics().write_summary(os.path.join(OUTPUT_DIR, "watch_metrics.json"))
+        return len(links)
+
+    def run(self, schedule: Optional[PollSchedule] = None, stop: Optional[threading.Event] = None,
+            max_polls: Optional[int] = None):
+        """
+        Poll until stop is set (or max_polls polls have run).
+
+        Args:
+            schedule (Optional[PollSchedule]): Delays between polls
+            stop (Optional[threading.Event]): Set it to stop the watcher; also ends the wait between polls
+            max_polls (Optional[int]): Stop after this many polls (None: run until stopped)
+        """
+        schedule = schedule or PollSchedule()
+        stop = stop or threading.Event()
+        polls = 0
+        while not stop.is_set() and (max_polls is None or polls < max_polls):
+            polls += 1
+            try:
+                if self.poll():
+                    schedule.found()
+                else:
+                    schedule.idle()
+            except Exception as e:
+                schedule.failed()
+                self.logger.error(f"Poll failed ({schedule.failures} in a row): {e}")
+            if max_polls is not None and polls >= max_polls:
+                break
+            delay = schedule.next_delay()
+            self.logger.debug(f"Next poll in {delay:.0f} s")
+            stop.wait(delay)
+
+    def close(self):
+        if len(self.checkpoint):
+            self.checkpoint.close()  # Rows of an unfinished poll: merged on the next start
+        else:
+            self.checkpoint.clear()
+        if self.index is not None:
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def watch(year: Optional[int] = None, first_issue: int = 1, min_interval: float = DEFAULT_MIN_INTERVAL,
+          max_interval: float = DEFAULT_MAX_INTERVAL, output_format: str = "csv", pack_size: int = 1,
+          once: bool = False):
+    """Run the watcher until SIGINT/SIGTERM (or for one poll with once)."""
+    from tweetllm import get_service
+
+    get_service()  # Fail fast on missing credentials, and keep the service warm
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    with BulletinWatcher(year or date.today().year, first_issue, output_format, pack_size) as watcher:
+        watcher.run(PollSchedule(min_interval, max_interval), stop, max_polls=1 if once else None)
+        watcher.logger.info("Watcher stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--year', type=int, help='Bulletin year (default: current year)')
+    parser.add_argument('--first-issue', type=int, default=1, help='First issue number probed at startup')
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL, help='Seconds between busy polls')
+    parser.add_argument('--max-interval', type=float, default=DEFAULT_MAX_INTERVAL, help='Seconds between quiet polls')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format')
+    parser.add_argument('--pack-size', type=int, default=1, help='Events per LLM request')
+    parser.add_argument('--once', action='store_true', help='Poll once and exit')
+    args = parser.parse_args()
+
+    watch(args.year, args.first_issue, args.min_interval, args.max_interval, args.format, args.pack_size, args.once)
+
+if __name__ == '__main__':
+    main()